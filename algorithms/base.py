@@ -1,10 +1,23 @@
 import abc
+import copy
+import os
 
 from time import time
-from typing import Sequence, Tuple
+from typing import Sequence, Tuple, Any, Callable, Dict, List, Iterable, Optional, Union
 from pathlib import Path
 
-from tools.file_operations import load_from_pickle_file, load_json_and_validate, save_to_csv_file, append_to_csv_file
+import numpy as np
+
+from algorithms.budget import Budget
+from algorithms.local_search import LocalSearch
+from algorithms.neighbours import load_candidate_neighbours
+from algorithms.profiler import Profiler, NULL_PROFILER
+from algorithms.split import GiantTourSplit
+from tools.distance_matrix_storage import read_distance_matrix
+from tools.file_operations import load_json_and_validate, save_to_csv_file, append_to_csv_file, load_csv_header, \
+    replace_csv_header, append_to_jsonl_file
+from tools.resource_usage import PeakMemoryMeter, get_cpu_time
+from tools.results_store import ResultsStore, is_results_store
 
 
 class SolverException(Exception):
@@ -15,50 +28,217 @@ class BaseSolver(metaclass=abc.ABCMeta):
     CONFIGURATION_SCHEMA_PATH = Path('data', 'schemas', 'configuration_schema.json')
     VEHICLES_SCHEMA_PATH = Path('data', 'schemas', 'vehicles_schema.json')
     DEFAULT_OUTPUT_PATH = Path('data', 'results', 'default.csv')
-    OUTPUT_HEADER = ['destinations_count', 'cost', 'execution_time', 'sequence']
-
-    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str):
-        distance_matrix = load_from_pickle_file(path=distance_matrix_path)
+    ALGORITHM = 'default'  # Label of results in a results store
+    OUTPUT_HEADER = ['destinations_count', 'cost', 'execution_time', 'sequence', 'cpu_time', 'peak_memory_kb',
+                     'evaluations', 'evaluations_per_second']
+    profiler: Profiler = NULL_PROFILER  # Replaced by an enabled profiler to time phases of the search
 
-        self.destinations = distance_matrix['destination_addresses']
+    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        self.distance_matrix_path = distance_matrix_path
+        self.destinations, self.distance_matrix = load_distance_matrix(distance_matrix_path)
         self.destinations_count = len(self.destinations)
         self.sequence_len = self.destinations_count - 1  # Depot destination is outside of sequence
         self.sequence_max_index = self.destinations_count - 2
 
-        self.distance_matrix = distance_matrix['matrix']
         self.distance_matrix_size = len(self.distance_matrix)
         if (self.distance_matrix_size < 2) or (self.destinations_count < 2):
             raise SolverException('Please provide at least 2 destinations in distance matrix.')
 
-        self.configuration = load_json_and_validate(schema_path=self.CONFIGURATION_SCHEMA_PATH,
-                                                    file_path=configuration_path)
-        self.vehicles = load_json_and_validate(schema_path=self.VEHICLES_SCHEMA_PATH,
-                                               file_path=vehicles_path)
+        self.configuration = load_validated_json(schema_path=self.CONFIGURATION_SCHEMA_PATH,
+                                                 file_path=configuration_path)
+        self.vehicles = load_validated_json(schema_path=self.VEHICLES_SCHEMA_PATH,
+                                            file_path=vehicles_path)
+        self.vehicles_count = len(self.vehicles)
+        self.minimize_longest_route = self.configuration['configuration']['minimize_longest_single_route']
+        self._split = self._create_split()
+        self._post_optimization = self.configuration.get('local_search', {}).get('post_optimization', False)
+        conf = self.configuration['configuration']
+        self.budget = Budget(conf.get('time_limit'), conf.get('evaluations_limit'))
+        self.convergence_trace = conf.get('convergence_trace', False)
         self.output_path = Path(output_path) if output_path else self.DEFAULT_OUTPUT_PATH
+        self.dataset, self.experiment = self.get_results_labels(distance_matrix_path, configuration_path)
+        self._rng = np.random.default_rng(seed)
+        self.cpu_time = 0.0
+        self.peak_memory_kb: Optional[int] = None
 
     def solve(self):
+        sequence, sequence_cost, execution_time = self.run()
+
+        self._print_results(sequence, sequence_cost, execution_time)
+        self._save_results(sequence, sequence_cost, execution_time)
+        if self.profiler.enabled:
+            self.profiler.print_report()
+            append_to_jsonl_file(self.get_profile_path(self.output_path),
+                                 [{'destinations_count': self.destinations_count, 'cost': sequence_cost,
+                                   'execution_time': execution_time, **self.profiler.get_report()}])
+
+    def run(self) -> Tuple[Sequence, float, float]:
+        """
+        Solves the problem without printing or saving anything. The search stops early, when the budget runs out.
+        CPU time and peak memory of the run are kept in 'cpu_time' and 'peak_memory_kb'.
+
+        :return: The best sequence, its cost and execution time in seconds.
+        """
         start = time()
+        cpu_start = get_cpu_time()
+        memory_meter = PeakMemoryMeter()
+        memory_meter.start()
+        self.budget.start()
         sequence, sequence_cost = self._solve()
+        if self._post_optimization:
+            sequence, sequence_cost = self._improve_routes(sequence)
+        self.budget.record(sequence_cost)
+        self.cpu_time = get_cpu_time() - cpu_start
+        self.peak_memory_kb = memory_meter.get_peak_memory_kb()
         end = time()
-        execution_time = end - start
 
-        self._print_results(sequence, sequence_cost, execution_time)
-        self._save_results(sequence, sequence_cost, execution_time)
+        return sequence, sequence_cost, end - start
 
     @abc.abstractmethod
     def _solve(self) -> Tuple[Sequence, float]:
         pass
 
+    @staticmethod
+    def _normalize_distance_matrix(matrix: Any) -> np.ndarray:
+        """
+        Converts a list of lists (or any stacked matrix) into a contiguous, square ndarray.
+        Integer, float32 and float64 distances keep their dtype (a memory-mapped matrix is not copied),
+        everything else is stored as float64.
+        """
+        matrix = np.asarray(matrix)
+        if matrix.ndim != 2 or matrix.shape[0] != matrix.shape[1]:
+            raise SolverException(f'Distance matrix has to be square, got shape: {matrix.shape}')
+
+        if np.issubdtype(matrix.dtype, np.integer) or matrix.dtype.type in (np.float32, np.float64):
+            dtype = matrix.dtype.newbyteorder('=')
+        else:
+            dtype = np.dtype(np.float64)
+
+        return np.ascontiguousarray(matrix, dtype=dtype)
+
     def _arc_cost(self, from_node: int, to_node: int) -> float:
-        return self.distance_matrix[from_node][to_node]
+        return self.distance_matrix[from_node, to_node].item()
 
     def _get_sequence_cost(self, sequence: Sequence) -> float:
-        cost = self._arc_cost(0, sequence[0])
-        for i in range(0, len(sequence) - 1):
-            cost += self._arc_cost(sequence[i], sequence[i + 1])
-        cost += self._arc_cost(sequence[-1], 0)
+        """
+        Cost of a single route, which starts and ends in the depot.
+        """
+        route = np.empty(len(sequence) + 2, dtype=np.intp)
+        route[0] = route[-1] = 0
+        route[1:-1] = sequence
+
+        return self.distance_matrix[route[:-1], route[1:]].sum().item()
+
+    def _get_sequences_costs(self, sequences: np.ndarray) -> np.ndarray:
+        """
+        Costs of a 2-D batch of routes (one sequence per row), evaluated with a single gather.
+        """
+        sequences = np.asarray(sequences)
+        routes = np.zeros((sequences.shape[0], sequences.shape[1] + 2), dtype=np.intp)
+        routes[:, 1:-1] = sequences
+
+        return self.distance_matrix[routes[:, :-1], routes[:, 1:]].sum(axis=1)
+
+    def _load_candidate_neighbours(self, default_neighbours_count: int = None) -> Optional[np.ndarray]:
+        """
+        :return: The closest destinations of every node, when 'candidate_neighbours_count' is configured
+                 (or the default count is given).
+        """
+        neighbours_count = self.configuration['configuration'].get('candidate_neighbours_count',
+                                                                    default_neighbours_count)
+        if neighbours_count is None:
+            return None
+        return load_candidate_neighbours(self.distance_matrix_path, self.distance_matrix, neighbours_count)
+
+    def _create_local_search(self) -> Optional[LocalSearch]:
+        candidate_neighbours = self._load_candidate_neighbours(LocalSearch.CANDIDATE_NEIGHBOURS_COUNT)
+        if candidate_neighbours is None:
+            return None
+        return LocalSearch(self.distance_matrix, candidate_neighbours)
+
+    def _improve_routes(self, sequence: Sequence) -> Tuple[List[int], float]:
+        """
+        Polishes every route of a sequence (routes are separated by the depot) with local search.
+        """
+        routes = self._get_routes(sequence)
+        local_search = self._create_local_search()
+        if local_search is not None:
+            routes = [local_search.improve(route, self.budget)[0] for route in routes]
+
+        return self._join_routes(routes)
+
+    @staticmethod
+    def _get_routes(sequence: Sequence) -> List[List[int]]:
+        routes: List[List[int]] = [[]]
+        for node in sequence:
+            if node == 0:
+                routes.append([])
+            else:
+                routes[-1].append(node)
+
+        return routes
+
+    def _join_routes(self, routes: List[List[int]]) -> Tuple[List[int], float]:
+        """
+        :return: Routes separated by the depot (0) and their cost - the total distance or the longest route.
+        """
+        routes_costs = [self._get_sequence_cost(route) for route in routes]
+        sequence = routes[0]
+        for route in routes[1:]:
+            sequence = [*sequence, 0, *route]
+
+        if self.vehicles_count > 1 and self.minimize_longest_route:
+            return sequence, max(routes_costs)
+        return sequence, sum(routes_costs)
+
+    def _create_split(self) -> Optional[GiantTourSplit]:
+        if self.vehicles_count == 1:
+            return None
+
+        max_route_length = self.configuration['configuration'].get('max_route_destinations')
+        if max_route_length is not None and max_route_length * self.vehicles_count < self.sequence_len:
+            raise SolverException(f'{self.vehicles_count} vehicles with at most {max_route_length} destinations each '
+                                  f'cannot serve {self.sequence_len} destinations.')
+        return GiantTourSplit(self.distance_matrix, self.vehicles_count, self.minimize_longest_route, max_route_length)
+
+    def _get_giant_tours_costs(self, sequences: np.ndarray) -> np.ndarray:
+        """
+        Costs of a 2-D batch of sequences. For more vehicles each sequence is a giant tour - its cost is the cost
+        of its best split into vehicle routes.
+        """
+        if self._split is None:
+            return self._get_sequences_costs(sequences)
+        return self._split.get_costs(sequences)
+
+    def _get_giant_tour_cost(self, sequence: Sequence) -> float:
+        return self._get_giant_tours_costs(np.asarray([sequence], dtype=np.intp))[0].item()
+
+    def _decode_giant_tour(self, sequence: Sequence) -> Tuple[List[int], float]:
+        """
+        :return: Routes of the best split of a giant tour, separated by the depot (0), and their cost -
+                 the total distance or the longest route.
+        """
+        if self._split is None:
+            return list(sequence), self._get_sequence_cost(sequence)
+
+        return self._join_routes(self._split.split(sequence))
 
-        return cost
+    def _get_nearest_neighbour_sequence(self) -> List[int]:
+        """
+        Greedy route, which always goes to the closest destination not visited yet.
+        """
+        unvisited = np.ones(self.destinations_count, dtype=bool)
+        unvisited[0] = False
+        sequence = []
+        node = 0
+        for _ in range(0, self.sequence_len):
+            candidates = np.flatnonzero(unvisited)
+            node = int(candidates[self.distance_matrix[node, candidates].argmin()])
+            unvisited[node] = False
+            sequence.append(node)
+
+        return sequence
 
     def _print_results(self, sequence: Sequence, sequence_cost: float, execution_time: float) -> None:
         route = f'0  {self.destinations[0]} \n'
@@ -68,11 +248,153 @@ class BaseSolver(metaclass=abc.ABCMeta):
 
         print("Route:\n" + route)
         print(f"Total distance: {sequence_cost} meters")
-        print(f'Algorithm took {execution_time} seconds to perform.')
+        print(f'Algorithm took {execution_time} seconds to perform ({self.cpu_time} seconds of CPU time).')
+        if self.budget.evaluations:
+            print(f'Evaluations: {self.budget.evaluations} '
+                  f'({self._get_evaluations_per_second(execution_time):.1f} per second)')
 
     def _save_results(self, sequence, sequence_cost, execution_time):
-        row = (self.destinations_count, sequence_cost, f'{execution_time:.20f}', sequence)
-        if self.output_path.exists():
-            append_to_csv_file(self.output_path, rows=[row])
-        else:
-            save_to_csv_file(self.output_path, self.OUTPUT_HEADER, rows=[row])
+        self.save_results_rows(self.output_path, [self.get_results_row(sequence, sequence_cost, execution_time)],
+                               self.dataset, self.experiment)
+        if self.convergence_trace:
+            self.save_traces(self.output_path, [self.get_trace_record(sequence_cost)])
+
+    def get_results_row(self, sequence: Sequence, sequence_cost: float, execution_time: float) -> tuple:
+        """
+        Peak memory and evaluations are left empty, when they are unknown (e.g. evaluations of OR-Tools).
+        """
+        peak_memory_kb = '' if self.peak_memory_kb is None else self.peak_memory_kb
+        evaluations = self.budget.evaluations or ''
+        evaluations_per_second = f'{self._get_evaluations_per_second(execution_time):.1f}' if evaluations else ''
+
+        return (self.destinations_count, sequence_cost, f'{execution_time:.20f}', sequence, f'{self.cpu_time:.6f}',
+                peak_memory_kb, evaluations, evaluations_per_second)
+
+    def _get_evaluations_per_second(self, execution_time: float) -> float:
+        return self.budget.evaluations / execution_time if execution_time > 0 else 0.0
+
+    def get_trace_record(self, sequence_cost: float) -> dict:
+        """
+        :return: Convergence trace of the last run - (elapsed seconds, best cost) points.
+        """
+        return {'destinations_count': self.destinations_count, 'cost': sequence_cost,
+                'evaluations': self.budget.evaluations, 'trace': self.budget.trace}
+
+    @staticmethod
+    def get_trace_path(output_path: Path) -> Path:
+        return output_path.with_name(f'{output_path.stem}.trace.jsonl')
+
+    @staticmethod
+    def get_profile_path(output_path: Path) -> Path:
+        return output_path.with_name(f'{output_path.stem}.profile.jsonl')
+
+    @classmethod
+    def save_traces(cls, output_path: Path, records: Iterable[dict]) -> None:
+        """
+        Traces are appended to a sidecar of the results file, a JSON line per run.
+        """
+        append_to_jsonl_file(cls.get_trace_path(output_path), records)
+
+    @staticmethod
+    def get_results_labels(distance_matrix_path: str, configuration_path: str) -> Tuple[str, str]:
+        """
+        :return: Dataset (directory of the distance matrix, e.g. 'A') and experiment (name of the configuration)
+                 labeling results in a results store.
+        """
+        return Path(distance_matrix_path).parent.name, Path(configuration_path).stem
+
+    @classmethod
+    def save_results_rows(cls, output_path: Path, rows: Iterable[tuple], dataset: str = '',
+                          experiment: str = '') -> None:
+        """
+        Rows are inserted into a results store ('.db' file) in a single transaction, labeled with the algorithm,
+        'dataset' and 'experiment'. Other files are CSV files, rows are appended to an existing one by column
+        names. Columns missing in the file are added to its header (older rows have them empty), columns missing
+        in rows are left empty.
+        """
+        if is_results_store(output_path):
+            with ResultsStore(output_path) as store:
+                store.insert_many(cls.ALGORITHM, dataset, experiment, cls.OUTPUT_HEADER, rows)
+            return
+
+        if not output_path.exists():
+            save_to_csv_file(output_path, cls.OUTPUT_HEADER, rows=rows)
+            return
+
+        header = load_csv_header(output_path)
+        missing_columns = [column for column in cls.OUTPUT_HEADER if column not in header]
+        if missing_columns:
+            header = [*header, *missing_columns]
+            replace_csv_header(output_path, header)
+        if header != cls.OUTPUT_HEADER:
+            indexes = [cls.OUTPUT_HEADER.index(column) if column in cls.OUTPUT_HEADER else None for column in header]
+            rows = [[row[i] if i is not None else '' for i in indexes] for row in rows]
+        append_to_csv_file(output_path, rows=rows)
+
+
+def create_distance_callback(distance_matrix: np.ndarray) -> Callable[[int, int], int]:
+    """
+    Arc cost callback for native solvers (OR-Tools), which call it for every arc evaluated during the search.
+    It only indexes a flat list of Python ints - no attribute lookups, no numpy scalars. Costs are rounded,
+    as native solvers work with integer costs.
+    """
+    if not np.issubdtype(distance_matrix.dtype, np.integer):
+        distance_matrix = np.rint(distance_matrix)
+    distances = distance_matrix.astype(np.int64).ravel().tolist()
+    size = len(distance_matrix)
+
+    def distance_callback(from_node: int, to_node: int) -> int:
+        return distances[from_node * size + to_node]
+
+    return distance_callback
+
+
+# Inputs loaded in the current process, by path - a single entry per path, replaced when the file changes
+_distance_matrixes: Dict[str, Tuple[Optional[int], List[str], np.ndarray]] = {}
+_validated_jsons: Dict[Tuple[str, str], Tuple[Tuple[Optional[int], Optional[int]], Any]] = {}
+
+
+def load_distance_matrix(path: Union[Path, str]) -> Tuple[List[str], np.ndarray]:
+    """
+    Matrix is loaded once per process and shared (read-only) by all solvers using it, e.g. during simulations.
+    It is loaded again, when the file is modified.
+    Both legacy pickle files and memory-mapped '.npy' files (with a JSON sidecar) are accepted.
+    """
+    modification_time = _get_modification_time(path)
+    if str(path) not in _distance_matrixes or _distance_matrixes[str(path)][0] != modification_time:
+        destinations, matrix = read_distance_matrix(path)
+        matrix = BaseSolver._normalize_distance_matrix(matrix)
+        matrix.flags.writeable = False
+        _distance_matrixes[str(path)] = modification_time, destinations, matrix
+
+    _, destinations, matrix = _distance_matrixes[str(path)]
+    return destinations, matrix
+
+
+def register_distance_matrix(path: Union[Path, str], destinations: List[str], matrix: np.ndarray) -> None:
+    """
+    Makes solvers use an already loaded matrix (e.g. attached from shared memory) instead of loading 'path'.
+    """
+    _distance_matrixes[str(path)] = _get_modification_time(path), destinations, matrix
+
+
+def load_validated_json(schema_path: Union[Path, str], file_path: Union[Path, str]) -> Any:
+    """
+    Files are parsed and validated once per process (again, when one of them is modified). Every caller gets its
+    own copy, so changes of a configuration do not leak into other solvers.
+    """
+    key = str(schema_path), str(file_path)
+    modification_times = _get_modification_time(schema_path), _get_modification_time(file_path)
+    cached = _validated_jsons.get(key)
+    if cached is None or cached[0] != modification_times:
+        cached = modification_times, load_json_and_validate(schema_path=schema_path, file_path=file_path)
+        _validated_jsons[key] = cached
+
+    return copy.deepcopy(cached[1])
+
+
+def _get_modification_time(path: Union[Path, str]) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
@@ -0,0 +1,73 @@
+from time import monotonic
+from typing import List, Optional, Tuple
+
+
+class Budget:
+    """
+    Wall-clock and evaluation limits of a single run. Solvers check the budget once per block of work (an SA block,
+    a GA generation, a batch of permutations) and return the best solution found, when it runs out.
+
+    An evaluation is pricing a single solution - a whole sequence or a move. Every improvement of the best cost is
+    traced as an (elapsed seconds, cost) point, which is cheap as improvements get rare quickly.
+    """
+    TIME_CHECK_EVALUATIONS = 65536  # Block-based solvers check the time at least this often
+
+    def __init__(self, time_limit: Optional[float] = None, evaluations_limit: Optional[int] = None):
+        """
+        :param time_limit: Seconds, unlimited by default.
+        :param evaluations_limit: Unlimited by default.
+        """
+        self.time_limit = time_limit
+        self.evaluations_limit = evaluations_limit
+        self.evaluations = 0
+        self.trace: List[Tuple[float, float]] = []
+        self._start = monotonic()
+
+    def start(self) -> None:
+        self.evaluations = 0
+        self.trace = []
+        self._start = monotonic()
+
+    def fork(self) -> 'Budget':
+        """
+        :return: Budget of the same run (e.g. for a worker process) with its own evaluations count and trace.
+        """
+        budget = Budget(self.time_limit, self.evaluations_limit)
+        budget.evaluations = self.evaluations
+        budget._start = self._start
+        return budget
+
+    @property
+    def elapsed(self) -> float:
+        return monotonic() - self._start
+
+    def count(self, evaluations: int) -> None:
+        self.evaluations += evaluations
+
+    def get_evaluations_left(self) -> Optional[int]:
+        if self.evaluations_limit is None:
+            return None
+        return max(0, self.evaluations_limit - self.evaluations)
+
+    def get_block_length(self, block_length: int, evaluations_per_iteration: int = 1) -> int:
+        """
+        :return: Number of iterations of the next block of work - limited, so the budget is checked often enough and
+                 evaluations do not go over the limit. Zero, when the budget is exhausted.
+        """
+        if self.time_limit is not None:
+            if self.elapsed >= self.time_limit:
+                return 0
+            block_length = min(block_length, max(1, self.TIME_CHECK_EVALUATIONS // evaluations_per_iteration))
+        if self.evaluations_limit is not None:
+            block_length = min(block_length, -(-self.get_evaluations_left() // evaluations_per_iteration))
+
+        return block_length
+
+    def is_exhausted(self) -> bool:
+        if self.evaluations_limit is not None and self.evaluations >= self.evaluations_limit:
+            return True
+        return self.time_limit is not None and self.elapsed >= self.time_limit
+
+    def record(self, cost: float) -> None:
+        if not self.trace or cost < self.trace[-1][1]:
+            self.trace.append((round(self.elapsed, 6), cost))
@@ -0,0 +1,137 @@
+import abc
+
+from typing import Optional
+
+import numpy as np
+
+LOGARITHMIC = 'logarithmic'
+GEOMETRIC = 'geometric'
+REHEATING = 'reheating'
+ACCEPTANCE_RATIO = 'acceptance_ratio'
+COOLING_SCHEDULES = (LOGARITHMIC, GEOMETRIC, REHEATING, ACCEPTANCE_RATIO)
+
+MIN_TEMPERATURE = 1e-9  # Keeps acceptance probabilities defined, when geometric cooling underflows
+
+
+class CoolingSchedule(metaclass=abc.ABCMeta):
+    """
+    Temperatures of simulated annealing are generated in blocks. Adaptive schedules get feedback about
+    the search after every 'update_interval' iterations and change temperatures of the following blocks.
+    """
+    update_interval: Optional[int] = None  # Static schedules are never updated
+
+    @abc.abstractmethod
+    def get_temperatures(self, first_iteration: int, iterations_count: int) -> np.ndarray:
+        pass
+
+    def update(self, iteration: int, last_improvement: int, accepted_count: int, worse_count: int) -> None:
+        """
+        :param iteration: Number of iterations done so far.
+        :param last_improvement: Iteration, in which the best sequence was improved for the last time.
+        :param accepted_count: Accepted moves out of 'worse_count' moves not improving the best sequence, drawn
+                               since the previous update.
+        """
+        pass
+
+
+class LogarithmicSchedule(CoolingSchedule):
+    def __init__(self, temperature_factor: float):
+        self.temperature_factor = temperature_factor
+
+    def get_temperatures(self, first_iteration: int, iterations_count: int) -> np.ndarray:
+        iterations = np.arange(first_iteration, first_iteration + iterations_count)
+        return self.temperature_factor / np.log(iterations + 2)
+
+
+class GeometricSchedule(CoolingSchedule):
+    def __init__(self, initial_temperature: float, cooling_rate: float):
+        self.initial_temperature = initial_temperature
+        self.cooling_rate = cooling_rate
+
+    def get_temperatures(self, first_iteration: int, iterations_count: int) -> np.ndarray:
+        iterations = np.arange(first_iteration, first_iteration + iterations_count)
+        return np.maximum(self.initial_temperature * self.cooling_rate ** iterations, MIN_TEMPERATURE)
+
+
+class ReheatingSchedule(CoolingSchedule):
+    """
+    Geometric cooling, which starts over after 'reheating_window' iterations without improving the best
+    sequence. Every restart begins at 'reheating_ratio' of the previous starting temperature.
+    """
+    UPDATE_INTERVAL = 1000
+
+    def __init__(self, initial_temperature: float, cooling_rate: float, reheating_window: int,
+                 reheating_ratio: float):
+        self.cooling_rate = cooling_rate
+        self.reheating_window = reheating_window
+        self.reheating_ratio = reheating_ratio
+        self.update_interval = min(self.UPDATE_INTERVAL, reheating_window)
+        self._cycle_start = 0
+        self._cycle_temperature = initial_temperature
+
+    def get_temperatures(self, first_iteration: int, iterations_count: int) -> np.ndarray:
+        iterations = np.arange(first_iteration - self._cycle_start,
+                               first_iteration - self._cycle_start + iterations_count)
+        return np.maximum(self._cycle_temperature * self.cooling_rate ** iterations, MIN_TEMPERATURE)
+
+    def update(self, iteration: int, last_improvement: int, accepted_count: int, worse_count: int) -> None:
+        if iteration - max(last_improvement, self._cycle_start) >= self.reheating_window:
+            self._cycle_start = iteration
+            self._cycle_temperature *= self.reheating_ratio
+
+
+class AcceptanceRatioSchedule(CoolingSchedule):
+    """
+    Keeps the ratio of accepted moves, which do not improve the best sequence, close to a target lowered
+    geometrically from 'initial_ratio' to 'final_ratio' over all iterations. The temperature is raised or lowered
+    by 'ADJUSTMENT_FACTOR' after every 'update_interval' iterations.
+    """
+    UPDATE_INTERVAL = 1000
+    ADJUSTMENT_FACTOR = 1.25
+
+    def __init__(self, initial_temperature: float, iterations_count: int, initial_ratio: float,
+                 final_ratio: float):
+        self.iterations_count = iterations_count
+        self.initial_ratio = initial_ratio
+        self.final_ratio = final_ratio
+        self.update_interval = self.UPDATE_INTERVAL
+        self._temperature = initial_temperature
+
+    def get_temperatures(self, first_iteration: int, iterations_count: int) -> np.ndarray:
+        return np.full(iterations_count, self._temperature)
+
+    def update(self, iteration: int, last_improvement: int, accepted_count: int, worse_count: int) -> None:
+        if worse_count == 0:
+            return
+        if accepted_count / worse_count > self.get_target_ratio(iteration):
+            self._temperature = max(self._temperature / self.ADJUSTMENT_FACTOR, MIN_TEMPERATURE)
+        else:
+            self._temperature *= self.ADJUSTMENT_FACTOR
+
+    def get_target_ratio(self, iteration: int) -> float:
+        progress = min(iteration / self.iterations_count, 1.0)
+        return self.initial_ratio * (self.final_ratio / self.initial_ratio) ** progress
+
+
+def create_cooling_schedule(conf: dict) -> CoolingSchedule:
+    """
+    :param conf: 'simulated_annealing' section of a configuration. 'temperature_factor' is the initial temperature
+                 of all schedules, but the logarithmic one.
+    """
+    schedule = conf.get('cooling_schedule', LOGARITHMIC)
+    temperature_factor = conf['temperature_factor']
+    cooling_rate = conf.get('cooling_rate', 0.9995)
+
+    if schedule == LOGARITHMIC:
+        return LogarithmicSchedule(temperature_factor)
+    elif schedule == GEOMETRIC:
+        return GeometricSchedule(temperature_factor, cooling_rate)
+    elif schedule == REHEATING:
+        return ReheatingSchedule(temperature_factor, cooling_rate, conf.get('reheating_window', 10000),
+                                 conf.get('reheating_ratio', 0.5))
+    elif schedule == ACCEPTANCE_RATIO:
+        return AcceptanceRatioSchedule(temperature_factor, conf['iterations_count'],
+                                       conf.get('initial_acceptance_ratio', 0.5),
+                                       conf.get('final_acceptance_ratio', 0.01))
+    else:
+        raise ValueError(f'Unknown cooling schedule: {schedule}')
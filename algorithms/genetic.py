@@ -1,18 +1,28 @@
+import os
+
 from sys import maxsize as max_integer_size
-from random import sample, shuffle, randint
-from typing import List, Tuple
+from typing import List, Optional, Tuple, Union
 from pathlib import Path
 
-from ordered_set import OrderedSet
+import numpy as np
 
 from algorithms.base import BaseSolver
+from algorithms.budget import Budget
+from algorithms.crossover import cross, PMX
+from algorithms.profiler import Profiler, NULL_PROFILER
+from tools.parallel import create_pool
+
+RING_TOPOLOGY = 'ring'
+RANDOM_TOPOLOGY = 'random'
 
 
 class GeneticSolver(BaseSolver):
     DEFAULT_OUTPUT_PATH = Path('data', 'results', 'default_genetic.csv')
+    ALGORITHM = 'genetic'
 
-    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str):
-        super(GeneticSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path)
+    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        super(GeneticSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path, seed)
         conf = self.configuration['genetic']
         self._iterations_count = conf['iterations_count']
         self._population_size = conf['population_size']
@@ -21,133 +31,243 @@ class GeneticSolver(BaseSolver):
         self._elite_count = int(self.sequence_len * conf['elite_sequences_ratio'])
         if self._elite_count == 0:
             self._elite_count = 1
+        self._elite_count = min(self._elite_count, self._population_size)
         self._tournament_groups_count = int(self._population_size / conf['tournament_group_size'])
         self._mutated_sequences_per_population = int(self._population_size * conf['mutated_sequences_ratio'])
-        self._pmx_crossing_size = int(self.sequence_max_index * conf['pmx_crossing_ratio'])
+        self._crossing_size = int(self.sequence_max_index * conf['pmx_crossing_ratio'])
+        self._crossover_operator = conf.get('crossover_operator', PMX)
+
+        self._islands_count = conf.get('islands_count', 1)
+        self._migration_interval = conf.get('migration_interval', 50)
+        self._migration_size = conf.get('migration_size', 1)
+        self._migration_topology = conf.get('migration_topology', RING_TOPOLOGY)
+        self._candidate_neighbours = self._load_candidate_neighbours()
+        self._memetic_count = int(self._population_size * conf.get('memetic_ratio', 0.0))
+        self._local_search = self._create_local_search() if self._memetic_count else None
 
         self._population = self._generate_initial_population()
 
     def _solve(self):
-        best_sequence = None
+        if self._islands_count > 1:
+            best_sequence, _ = self._solve_on_islands()
+        else:
+            self._population, best_sequence, _ = self._evolve(self._population, self._iterations_count)
+
+        return self._decode_giant_tour(best_sequence)
+
+    def _evolve(self, population: np.ndarray, generations_count: int) -> Tuple[np.ndarray, List[int], float]:
+        """
+        Runs 'generations_count' generations (fewer, when the budget runs out), returns the last population
+        and the best sequence found.
+        """
+        best_sequence: List[int] = []
         best_cost = max_integer_size
 
-        for _ in range(0, self._iterations_count):
-            population_with_costs = self._get_population_with_costs()
-            elite_sequences, population_best_cost = self._select_elites(population_with_costs)
+        profiler = self.profiler
+        for generation in range(0, generations_count):
+            if generation > 0 and self.budget.is_exhausted():
+                break
+            start = profiler.start()
+            costs = self._get_giant_tours_costs(population)
+            start = profiler.stop('evaluation', start)
+            self.budget.count(len(population))
+            elite_sequences, population_best_cost = self._select_elites(population, costs)
+            start = profiler.stop('elite_selection', start)
             if population_best_cost < best_cost:
-                best_sequence = elite_sequences[0]
+                best_sequence = elite_sequences[0].tolist()
                 best_cost = population_best_cost
-            new_population = self._perform_tournament_selection(elite_sequences, population_with_costs)
+                self.budget.record(best_cost)
+                profiler.count('improvements')
+            new_population = self._perform_tournament_selection(elite_sequences, population, costs)
+            start = profiler.stop('tournament_selection', start)
             new_population = self._perform_crossing(new_population)
-            self._population = self._mutate_population(new_population)
+            start = profiler.stop('crossing', start)
+            population = self._mutate_population(new_population)
+            start = profiler.stop('mutation', start)
+            if self._local_search is not None:
+                population = self._improve_population(population)
+                profiler.stop('local_search', start)
+            profiler.count('generations')
+            profiler.count('evaluations', len(population))
+            profiler.count('crossovers', len(population) // 2)
+            profiler.count('mutations', self._mutated_sequences_per_population)
+
+        return population, best_sequence, best_cost
+
+    def _solve_on_islands(self):
+        """
+        Island model - independent populations evolve in a process pool and every 'migration_interval'
+        generations the best sequences of each island replace the worst ones of its neighbour.
+        """
+        populations = [self._generate_initial_population() for _ in range(0, self._islands_count)]
+        best_sequence: List[int] = []
+        best_cost = max_integer_size
+
+        workers_count = min(self._islands_count, os.cpu_count() or 1)
+        with create_pool(workers_count, _init_island_worker, (self,)) as pool:
+            for epoch_start in range(0, self._iterations_count, self._migration_interval):
+                if epoch_start > 0 and self.budget.is_exhausted():
+                    break
+                generations_count = min(self._migration_interval, self._iterations_count - epoch_start)
+                evaluations_left = self.budget.get_evaluations_left()
+                if evaluations_left is not None:
+                    epoch_evaluations = self._islands_count * self._population_size
+                    generations_count = max(1, min(generations_count, -(-evaluations_left // epoch_evaluations)))
+                seeds = self._rng.integers(0, 2 ** 63, size=self._islands_count).tolist()
+                tasks = [(population, generations_count, seed, self.budget.fork())
+                         for population, seed in zip(populations, seeds)]
+
+                populations = []
+                epoch_start_evaluations = self.budget.evaluations
+                for population, island_best_sequence, island_best_cost, evaluations, profiler in pool.map(
+                        _evolve_island, tasks):
+                    populations.append(population)
+                    self.budget.count(evaluations - epoch_start_evaluations)
+                    self.profiler.merge(profiler)
+                    if island_best_cost < best_cost:
+                        best_sequence = island_best_sequence
+                        best_cost = island_best_cost
+                self.budget.record(best_cost)
+
+                start = self.profiler.start()
+                populations = self._migrate(populations)
+                self.profiler.stop('migration', start)
 
         return best_sequence, best_cost
 
-    def _generate_initial_population(self) -> List[List[int]]:
-        basic_sequence = list(range(1, len(self.destinations)))
-        population = [basic_sequence] * self._population_size
+    def _migrate(self, populations: List[np.ndarray]) -> List[np.ndarray]:
+        costs = [self._get_giant_tours_costs(population) for population in populations]
+        emigrants = [population[np.argsort(population_costs, kind='stable')[:self._migration_size]]
+                     for population, population_costs in zip(populations, costs)]
 
-        for i in range(0, len(population)):
-            population[i] = sample(population[i], k=len(self.destinations) - 1)
+        arrivals: List[List[np.ndarray]] = [[] for _ in populations]
+        for island, island_emigrants in enumerate(emigrants):
+            arrivals[self._get_migration_target(island)].append(island_emigrants)
 
-        return population
+        for island, island_arrivals in enumerate(arrivals):
+            if island_arrivals:
+                immigrants = np.concatenate(island_arrivals)[:self._population_size]
+                worst_ids = np.argsort(costs[island], kind='stable')[::-1][:len(immigrants)]
+                populations[island][worst_ids] = immigrants
 
-    def _get_population_with_costs(self) -> List[Tuple[float, List[int]]]:
-        population_with_costs = []
-        for sequence in self._population:
-            population_with_costs.append(
-                (self._get_sequence_cost(sequence), sequence)
-            )
-
-        return population_with_costs
-
-    def _select_elites(self, population_with_costs: List[Tuple[float, List[int]]]) -> Tuple[List[List[int]], float]:
-        sorted_population = sorted(population_with_costs)
-        elites = [sorted_population[i][1] for i in range(0, self._elite_count)]
-        best_sequence_cost = sorted_population[0][0]
-
-        return elites, best_sequence_cost
-
-    def _perform_tournament_selection(self, selected_sequences: List[List[int]],
-                                      population_with_costs: List[Tuple[float, List[int]]]) -> List[List[int]]:
-        while True:
-            shuffle(population_with_costs)
-            tournament_groups = [population_with_costs[i::self._tournament_groups_count]
-                                 for i in range(self._tournament_groups_count)]
-            for group in tournament_groups:
-                best_sequence_in_group = sorted(group)[0]
-                selected_sequences.append(best_sequence_in_group[1])
-                if len(selected_sequences) == self._population_size:
-                    return selected_sequences
-
-    def _perform_crossing(self, population: List[List[int]]) -> List[List[int]]:
-        shuffle(population)
-        for i in range(0, len(population), 2):
-            population[i], population[i + 1] = self._pmx_crossing(population[i], population[i + 1])
+        return populations
 
-        return population
+    def _get_migration_target(self, island: int) -> int:
+        if self._migration_topology == RANDOM_TOPOLOGY:
+            return (island + int(self._rng.integers(1, self._islands_count))) % self._islands_count
+        else:
+            return (island + 1) % self._islands_count
+
+    def _generate_initial_population(self) -> np.ndarray:
+        """
+        Population is a 2-D array with a single sequence per row.
+        """
+        basic_sequence = np.arange(1, len(self.destinations), dtype=np.intp)
+        population = np.tile(basic_sequence, (self._population_size, 1))
+
+        return self._rng.permuted(population, axis=1)
 
-    def _pmx_crossing(self, sequence_a: List[int], sequence_b: List[int]) -> Tuple[List[int], List[int]]:
-        start_index = randint(0, self.sequence_max_index - self._pmx_crossing_size)
-        end_index = start_index + self._pmx_crossing_size
-
-        part_from_a = OrderedSet(sequence_a[start_index:end_index])
-        part_from_b = OrderedSet(sequence_b[start_index:end_index])
-        os_sequence_a = OrderedSet(sequence_a)
-        os_sequence_b = OrderedSet(sequence_b)
-
-        new_sequence_1 = self._get_pmx_crossed_sequence(os_sequence_a, os_sequence_b,
-                                                        part_from_a, part_from_b,
-                                                        start_index, end_index)
-        new_sequence_2 = self._get_pmx_crossed_sequence(os_sequence_b, os_sequence_a,
-                                                        part_from_b, part_from_a,
-                                                        start_index, end_index)
-        return new_sequence_1, new_sequence_2
-
-    @staticmethod
-    def _get_pmx_crossed_sequence(sequence_a: OrderedSet, sequence_b: OrderedSet,
-                                  part_from_a: OrderedSet, part_from_b: OrderedSet,
-                                  start_index: int, end_index: int) -> List[int]:
+    def _select_elites(self, population: np.ndarray, costs: np.ndarray) -> Tuple[np.ndarray, float]:
+        elite_ids = np.argpartition(costs, self._elite_count - 1)[:self._elite_count]
+        elite_ids = elite_ids[np.argsort(costs[elite_ids], kind='stable')]
+        best_sequence_cost = costs[elite_ids[0]].item()
+
+        return population[elite_ids], best_sequence_cost
+
+    def _perform_tournament_selection(self, selected_sequences: np.ndarray, population: np.ndarray,
+                                      costs: np.ndarray) -> np.ndarray:
         """
-        Returns a sequence, which base is from 'sequence_b' and 'part_from_a' is copied in
+        Every round shuffles the population and splits it into groups - the cheapest sequence of a group wins.
+        Rounds are repeated until the population is filled up.
         """
-        new_sequence = list(sequence_b)
+        missing_count = self._population_size - len(selected_sequences)
+        if missing_count <= 0:
+            return selected_sequences[:self._population_size]
 
-        elements_requiring_correction = {}
+        rounds_count = -(-missing_count // self._tournament_groups_count)
+        group_size = len(population) // self._tournament_groups_count
+        shuffled_ids = self._rng.random((rounds_count, len(population))).argsort(axis=1)
+        groups = shuffled_ids[:, :self._tournament_groups_count * group_size].reshape(-1, group_size)
 
-        uniques_from_b_part = part_from_b - part_from_a
-        for unique_from_b_part in uniques_from_b_part:
-            index_in_part = part_from_b.index(unique_from_b_part)
-            elements_requiring_correction[unique_from_b_part] = part_from_a[index_in_part]
+        winners = groups[np.arange(len(groups)), costs[groups].argmin(axis=1)]
 
-        for elem_from_b, elem_from_a in elements_requiring_correction.items():
-            while elem_from_a in part_from_b:
-                index_of_elem_from_b = sequence_b.index(elem_from_a)
-                elem_from_a = sequence_a[index_of_elem_from_b]
+        return np.concatenate((selected_sequences, population[winners[:missing_count]]))
 
-            new_index = sequence_b.index(elem_from_a)
-            new_sequence[new_index] = elem_from_b
+    def _perform_crossing(self, population: np.ndarray) -> np.ndarray:
+        """
+        Crosses random pairs of sequences, all pairs in a single batch.
+        """
+        population = population[self._rng.permutation(len(population))]
+        pairs_count = len(population) // 2
+        starts = self._rng.integers(0, self.sequence_max_index - self._crossing_size + 1, size=pairs_count)
+        ends = starts + self._crossing_size
 
-        new_sequence[start_index:end_index] = part_from_a
+        population[0::2], population[1::2] = cross(self._crossover_operator,
+                                                   population[0::2], population[1::2], starts, ends)
 
-        return new_sequence
+        return population
 
-    def _mutate_population(self, population: List[List[int]]) -> List[List[int]]:
-        sequence_ids_to_mutate = [
-            randint(0, self._population_size - 1) for _ in range(0, self._mutated_sequences_per_population)
-        ]
+    def _mutate_population(self, population: np.ndarray) -> np.ndarray:
+        sequence_ids_to_mutate = self._rng.integers(0, self._population_size,
+                                                    size=self._mutated_sequences_per_population)
         for sequence_id in sequence_ids_to_mutate:
-            population[sequence_id] = self._mutate_by_inversion(population[sequence_id])
+            self._mutate_by_inversion(population[sequence_id])
 
         return population
 
-    def _mutate_by_inversion(self, sequence: List[int]) -> List[int]:
-        index_a = randint(0, self.sequence_max_index)
-        index_b = randint(0, self.sequence_max_index)
+    def _improve_population(self, population: np.ndarray) -> np.ndarray:
+        """
+        Memetic step - polishes random sequences (as single routes) with local search.
+        """
+        if self._local_search is None:
+            return population
+
+        for sequence_id in self._rng.choice(len(population), size=self._memetic_count, replace=False):
+            population[sequence_id], _ = self._local_search.improve(population[sequence_id].tolist(), self.budget)
+
+        return population
 
-        if index_a <= index_b:
-            sequence[index_a:index_b] = reversed(sequence[index_a:index_b])
+    def _mutate_by_inversion(self, sequence: np.ndarray) -> np.ndarray:
+        """
+        Reverses a random part of a sequence in place. With candidate neighbours, the reversal makes
+        a random destination and one of its close neighbours adjacent.
+        """
+        if self._candidate_neighbours is None:
+            index_a, index_b = sorted(self._rng.integers(0, self.sequence_max_index + 1, size=2).tolist())
         else:
-            sequence[index_b:index_a] = reversed(sequence[index_b:index_a])
+            index = int(self._rng.integers(0, len(sequence)))
+            ranks_count = self._candidate_neighbours.shape[1]
+            neighbour = self._candidate_neighbours[sequence[index], self._rng.integers(0, ranks_count)]
+            neighbour_index = int(np.flatnonzero(sequence == neighbour)[0])
+            index_a, index_b = sorted((index, neighbour_index))
+            index_a, index_b = index_a + 1, index_b + 1
+        sequence[index_a:index_b] = sequence[index_a:index_b][::-1].copy()
 
         return sequence
+
+
+# Island worker process state, set once by '_init_island_worker'
+_island_solver: Optional[GeneticSolver] = None
+
+
+def _init_island_worker(solver: GeneticSolver) -> None:
+    global _island_solver
+    _island_solver = solver
+
+
+def _evolve_island(task: Tuple[np.ndarray, int, int, Budget]) -> Tuple[np.ndarray, List[int], float, int, Profiler]:
+    """
+    Islands check the time limit of the whole run, their evaluations and profiles are merged by the main process.
+
+    :return: Population and the best sequence found, with the evaluations count of the budget and the profiler
+             of the epoch.
+    """
+    population, generations_count, seed, budget = task
+    _island_solver._rng = np.random.default_rng(seed)
+    solver_budget, solver_profiler = _island_solver.budget, _island_solver.profiler
+    _island_solver.budget = budget
+    _island_solver.profiler = Profiler() if solver_profiler.enabled else NULL_PROFILER
+    try:
+        return (*_island_solver._evolve(population, generations_count), budget.evaluations, _island_solver.profiler)
+    finally:
+        _island_solver.budget, _island_solver.profiler = solver_budget, solver_profiler
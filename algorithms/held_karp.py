@@ -0,0 +1,107 @@
+from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
+
+from algorithms.base import BaseSolver, SolverException
+
+
+class HeldKarpSolver(BaseSolver):
+    """
+    Exact solver based on Held-Karp dynamic programming over subsets of destinations - O(2^n * n^2) time
+    and O(2^n * n) memory instead of O(n! * n) time of scanning all permutations.
+    """
+    DEFAULT_OUTPUT_PATH = Path('data', 'results', 'default_held_karp.csv')
+    ALGORITHM = 'held_karp'
+    MAX_TABLE_SIZE_BYTES = 4 * 1024 ** 3
+
+    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        super(HeldKarpSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path, seed)
+        self._dtype, self._infinity = self._get_table_dtype()
+        table_size = (2 ** self.sequence_len) * self.sequence_len * self._dtype.itemsize
+        if table_size > self.MAX_TABLE_SIZE_BYTES:
+            raise SolverException(f'Held-Karp table for {self.destinations_count} destinations would take '
+                                  f'{table_size / 1024 ** 3:.1f} GiB, which is more than the allowed '
+                                  f'{self.MAX_TABLE_SIZE_BYTES / 1024 ** 3:.1f} GiB.')
+
+    def _solve(self):
+        # Destination 'i' of the sub-problem is the node 'i + 1' of the distance matrix
+        arcs = self.distance_matrix[1:, 1:].astype(self._dtype)
+        from_depot = self.distance_matrix[0, 1:].astype(self._dtype)
+        to_depot = self.distance_matrix[1:, 0].astype(self._dtype)
+
+        costs = self._fill_costs_table(arcs, from_depot)
+        if costs is None:
+            # Exact solution is all or nothing - a greedy route is the best one known, when the budget runs out
+            sequence = self._get_nearest_neighbour_sequence()
+            return sequence, self._get_sequence_cost(sequence)
+        sequence, cost = self._reconstruct_sequence(costs, arcs, to_depot)
+
+        return sequence, cost
+
+    def _get_table_dtype(self) -> Tuple[np.dtype, float]:
+        """
+        The table is by far the biggest memory consumer, so the narrowest dtype able to hold any route cost is used.
+        'Infinity' marks states, which are impossible to reach.
+        """
+        if np.issubdtype(self.distance_matrix.dtype, np.integer):
+            max_route_cost = int(self.distance_matrix.max()) * self.destinations_count
+            for dtype in (np.dtype(np.int32), np.dtype(np.int64)):
+                infinity = np.iinfo(dtype).max // 2
+                if max_route_cost < infinity // 2:
+                    return dtype, infinity
+
+        return np.dtype(np.float64), np.inf
+
+    def _fill_costs_table(self, arcs: np.ndarray, from_depot: np.ndarray) -> Optional[np.ndarray]:
+        """
+        costs[subset, j] is the cost of the cheapest path, which starts in the depot, visits all destinations
+        from 'subset' (bit mask) and ends in destination 'j'. Subsets are processed in layers of the same size,
+        each layer is vectorized over its subsets.
+
+        :return: The table or None, when the budget runs out before it is filled.
+        """
+        n = self.sequence_len
+        costs = np.full((2 ** n, n), self._infinity, dtype=self._dtype)
+        singletons = np.arange(0, n)
+        costs[1 << singletons, singletons] = from_depot
+
+        for subsets_size, subsets in enumerate(self._get_subsets_by_size(n)[2:], start=2):
+            if self.budget.is_exhausted():
+                return None
+            for j in range(0, n):
+                subsets_with_j = subsets[(subsets >> j) & 1 == 1]
+                previous_subsets = subsets_with_j ^ (1 << j)
+                costs[subsets_with_j, j] = (costs[previous_subsets] + arcs[:, j]).min(axis=1)
+            # Every state of the layer prices 'n' paths
+            self.budget.count(len(subsets) * subsets_size * n)
+
+        return costs
+
+    @staticmethod
+    def _get_subsets_by_size(n: int) -> List[np.ndarray]:
+        subsets_sizes = np.zeros(2 ** n, dtype=np.uint8)
+        for bit in range(0, n):
+            subsets_sizes[1 << bit:1 << (bit + 1)] = subsets_sizes[:1 << bit] + 1
+
+        order = np.argsort(subsets_sizes, kind='stable')
+        layers_ends = np.cumsum(np.bincount(subsets_sizes, minlength=n + 1))
+
+        return np.split(order, layers_ends[:-1])
+
+    def _reconstruct_sequence(self, costs: np.ndarray, arcs: np.ndarray,
+                              to_depot: np.ndarray) -> Tuple[List[int], float]:
+        subset = 2 ** self.sequence_len - 1
+        last = int((costs[subset] + to_depot).argmin())
+        cost = (costs[subset, last] + to_depot[last]).item()
+
+        sequence = [last + 1]
+        while subset != 1 << last:
+            subset ^= 1 << last
+            last = int((costs[subset] + arcs[:, last]).argmin())
+            sequence.append(last + 1)
+
+        sequence.reverse()
+
+        return sequence, cost
@@ -0,0 +1,147 @@
+from collections import deque
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from algorithms.budget import Budget
+from algorithms.moves import RouteMoves, REVERSAL, get_neighbour_move_positions, get_distance_rows
+
+
+class LocalSearch:
+    """
+    Improves a single depot-closed route with 2-opt and Or-opt moves until no improving move is left.
+
+    Moves are searched around every destination and its candidate neighbours only and the first improving
+    move is applied. Don't-look bits skip destinations, around which nothing improved, until a move
+    changes one of their arcs - so a pass over an almost optimal route is nearly free.
+    """
+    OR_OPT_SEGMENT_LENGTHS = (1, 2, 3)
+    CANDIDATE_NEIGHBOURS_COUNT = 10  # Used, unless 'candidate_neighbours_count' is configured
+    IMPROVEMENT_THRESHOLD = 1e-9  # Float deltas of equivalent routes are not improvements
+
+    def __init__(self, distance_matrix: np.ndarray, candidate_neighbours: np.ndarray):
+        self.distance_matrix = distance_matrix
+        self._candidate_neighbours: List[List[int]] = np.asarray(candidate_neighbours).tolist()
+        self._distances = get_distance_rows(distance_matrix)
+        self._symmetric = bool((distance_matrix == distance_matrix.T).all())
+        self._evaluations = 0  # Evaluated moves not counted by the budget yet
+
+    def improve(self, sequence: Sequence[int], budget: Optional[Budget] = None,
+                record: bool = False) -> Tuple[List[int], float]:
+        """
+        :param sequence: Destinations of a route (without the depot).
+        :param budget: Counts evaluated moves and is checked once per processed destination - the route improved
+                       so far is returned, when it runs out.
+        :param record: The route is the whole solution, so its improvements are traced by the budget.
+        :return: Improved sequence and its cost.
+        """
+        route = RouteMoves(self.distance_matrix, sequence, self._distances, self._symmetric)
+        # Destinations with the don't-look bit off
+        queue = deque(route.sequence)
+        queued = set(queue)
+        self._evaluations = 0
+
+        while queue:
+            if budget is not None:
+                budget.count(self._evaluations)
+                self._evaluations = 0
+                if budget.is_exhausted():
+                    break
+            node = queue.popleft()
+            queued.discard(node)
+
+            touched_nodes = self._apply_improving_move(route, node)
+            if touched_nodes and record:
+                budget.record(route.cost)
+            for touched_node in touched_nodes:
+                if touched_node not in queued:
+                    queue.append(touched_node)
+                    queued.add(touched_node)
+
+        if budget is not None:
+            budget.count(self._evaluations)
+        return route.sequence, route.cost
+
+    def _apply_improving_move(self, route: RouteMoves, node: int) -> List[int]:
+        """
+        :return: Destinations with changed arcs ('node' included) - empty, when no move around 'node' improves
+                 the route.
+        """
+        position = route.position(node)
+        for neighbour in self._candidate_neighbours[node]:
+            neighbour_position = route.position(neighbour)
+            if neighbour_position == 0:
+                continue  # Neighbour belongs to another route
+
+            touched_nodes = self._apply_two_opt(route, position, neighbour_position)
+            if not touched_nodes:
+                touched_nodes = self._apply_or_opt(route, position, neighbour_position)
+            if touched_nodes:
+                return [n for n in touched_nodes if n != 0]
+
+        # The depot (on both ends of the route) is a neighbour of every destination, so reversals replacing
+        # its first or last arc are searched too
+        for depot_position in (0, len(route.route) - 1):
+            touched_nodes = self._apply_two_opt(route, position, depot_position)
+            if touched_nodes:
+                return [n for n in touched_nodes if n != 0]
+
+        return []
+
+    def _apply_two_opt(self, route: RouteMoves, position: int, neighbour_position: int) -> List[int]:
+        """
+        Reverses a part of the route, so the destination and its neighbour become adjacent - the neighbour follows
+        the destination or precedes it, so both new arcs of a reversal are tried as the candidate one.
+        """
+        r = route.route
+        for first, last in self._get_two_opt_moves(position, neighbour_position, len(r) - 2):
+            self._evaluations += 1
+            delta = route.reversal_delta(first, last)
+            if delta < -self.IMPROVEMENT_THRESHOLD:
+                if self._symmetric:
+                    touched_nodes = [r[first - 1], r[first], r[last], r[last + 1]]
+                else:
+                    # Every arc of the reversed part changes its direction and so its cost
+                    touched_nodes = r[first - 1:last + 2]
+                route.apply(REVERSAL, first, last, delta)
+                return touched_nodes
+
+        return []
+
+    @staticmethod
+    def _get_two_opt_moves(position: int, neighbour_position: int, last_position: int) -> List[Tuple[int, int]]:
+        """
+        :return: Reversals (first and last position), which make the destination and its neighbour adjacent.
+        """
+        first, last = get_neighbour_move_positions(REVERSAL, position, neighbour_position)
+        if neighbour_position > position:
+            moves = [(first, last), (position, neighbour_position - 1)]
+        else:
+            moves = [(first, last), (neighbour_position, position - 1)]
+
+        return [(first, last) for first, last in moves if 1 <= first < last <= last_position]
+
+    def _apply_or_opt(self, route: RouteMoves, position: int, neighbour_position: int) -> List[int]:
+        """
+        Moves a short segment starting with the destination right after or right before its neighbour.
+        """
+        r = route.route
+        for segment_length in self.OR_OPT_SEGMENT_LENGTHS:
+            first, last = position, position + segment_length - 1
+            if last > len(r) - 2:
+                break
+            if first <= neighbour_position <= last:
+                break  # Longer segments would contain the neighbour too
+
+            for position_after in (neighbour_position, neighbour_position - 1):
+                if first - 1 <= position_after <= last:
+                    continue
+                self._evaluations += 1
+                delta = route.segment_move_delta(first, last, position_after)
+                if delta < -self.IMPROVEMENT_THRESHOLD:
+                    touched_nodes = [r[first - 1], r[first], r[last], r[last + 1],
+                                     r[position_after], r[position_after + 1]]
+                    route.move_segment(first, last, position_after, delta)
+                    return touched_nodes
+
+        return []
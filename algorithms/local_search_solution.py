@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from algorithms.base import BaseSolver
+
+
+class LocalSearchSolver(BaseSolver):
+    """
+    Builds a nearest neighbour route and polishes it with 2-opt and Or-opt local search. For more vehicles
+    the route is split and every vehicle route is polished again.
+    """
+    DEFAULT_OUTPUT_PATH = Path('data', 'results', 'default_local_search.csv')
+    ALGORITHM = 'local_search'
+
+    def _solve(self):
+        sequence = self._get_nearest_neighbour_sequence()
+        self.budget.record(self._get_giant_tour_cost(sequence))
+        local_search = self._create_local_search()
+        if local_search is not None:
+            # With more vehicles the cost of the solution is the cost of the split, not of the route
+            sequence, _ = local_search.improve(sequence, self.budget, record=self._split is None)
+
+        if self._split is None:
+            return sequence, self._get_sequence_cost(sequence)
+
+        sequence, _ = self._decode_giant_tour(sequence)
+        return self._improve_routes(sequence)
@@ -0,0 +1,322 @@
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+SWAP = 'swap'
+RELOCATE = 'relocate'
+REVERSAL = 'reversal'
+MOVE_TYPES = (SWAP, RELOCATE, REVERSAL)
+
+DistanceRows = List[memoryview]
+
+
+def get_distance_rows(distance_matrix: np.ndarray) -> DistanceRows:
+    """
+    Rows of a C-contiguous matrix as memoryviews. Scalar lookups ('rows[a][b]') return Python numbers and are
+    as cheap as on nested lists, but the matrix is not copied - it stays shared or memory-mapped.
+    """
+    return [memoryview(row) for row in distance_matrix]
+
+
+class RouteMoves:
+    """
+    Keeps a single depot-closed route and evaluates neighbourhood moves from the arcs they touch,
+    so a delta costs O(1) no matter how long the route is. The route is only changed by 'apply'.
+
+    Positions are 1-based indexes of the padded route [0, *sequence, 0], so position 1 is the
+    first destination after the depot and position 'len(sequence)' is the last one.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, sequence: Sequence[int], distances: DistanceRows = None,
+                 symmetric: bool = None):
+        """
+        :param sequence: Any subset of destinations.
+        :param distances: 'get_distance_rows(distance_matrix)' and 'symmetric' can be passed, when they are already
+                          known - checking symmetry takes O(n^2).
+        """
+        self._distances = distances if distances is not None else get_distance_rows(distance_matrix)
+        if symmetric is None:
+            symmetric = bool((distance_matrix == distance_matrix.T).all())
+        self._symmetric = symmetric
+        self.route: List[int] = [0, *sequence, 0]
+        self.cost = sum(self._distances[a][b] for a, b in zip(self.route, self.route[1:]))
+        self._positions = [0] * len(self._distances)  # 0 for nodes outside of the route
+        self._update_positions(1, len(self.route) - 2)
+        # Prefix sums of arcs in both directions, used by reversals of asymmetric routes. They are updated lazily -
+        # only entries below '_valid_prefix_length' are up to date.
+        self._forward_prefix = [0] * len(self.route)
+        self._backward_prefix = [0] * len(self.route)
+        self._valid_prefix_length = 1
+
+    @property
+    def sequence(self) -> List[int]:
+        return self.route[1:-1]
+
+    def position(self, node: int) -> int:
+        return self._positions[node]
+
+    def delta(self, move_type: str, position_a: int, position_b: int) -> float:
+        if move_type == SWAP:
+            return self.swap_delta(position_a, position_b)
+        elif move_type == RELOCATE:
+            return self.relocate_delta(position_a, position_b)
+        elif move_type == REVERSAL:
+            return self.reversal_delta(position_a, position_b)
+        else:
+            raise ValueError(f'Unsupported move type: {move_type}')
+
+    def apply(self, move_type: str, position_a: int, position_b: int, delta: float) -> None:
+        move_route(self.route, move_type, position_a, position_b)
+        self.cost += delta
+        self._update_positions(min(position_a, position_b), max(position_a, position_b))
+        self._valid_prefix_length = min(self._valid_prefix_length, position_a, position_b)
+
+    def segment_move_delta(self, first: int, last: int, position_after: int) -> float:
+        """
+        Moves the part of a route between two positions (Or-opt move), so it follows 'position_after'.
+        The part keeps its direction, so its own cost does not change.
+        """
+        d, r = self._distances, self.route
+        before, after = r[first - 1], r[last + 1]
+        insert_after, insert_before = r[position_after], r[position_after + 1]
+
+        return (d[before][after] - d[before][r[first]] - d[r[last]][after]
+                + d[insert_after][r[first]] + d[r[last]][insert_before] - d[insert_after][insert_before])
+
+    def move_segment(self, first: int, last: int, position_after: int, delta: float) -> None:
+        r = self.route
+        segment = r[first:last + 1]
+        del r[first:last + 1]
+        insert_at = position_after + 1 if position_after < first else position_after - len(segment) + 1
+        r[insert_at:insert_at] = segment
+
+        self.cost += delta
+        self._update_positions(min(first, position_after + 1), max(last, position_after))
+        self._valid_prefix_length = min(self._valid_prefix_length, first, position_after + 1)
+
+    def swap_delta(self, position_a: int, position_b: int) -> float:
+        """
+        Exchanges destinations placed on two positions.
+        """
+        if position_a > position_b:
+            position_a, position_b = position_b, position_a
+        d, r = self._distances, self.route
+        a, b = r[position_a], r[position_b]
+        before_a, after_b = r[position_a - 1], r[position_b + 1]
+
+        if position_b == position_a + 1:
+            return (d[before_a][b] + d[b][a] + d[a][after_b]
+                    - d[before_a][a] - d[a][b] - d[b][after_b])
+
+        after_a, before_b = r[position_a + 1], r[position_b - 1]
+        return (d[before_a][b] + d[b][after_a] + d[before_b][a] + d[a][after_b]
+                - d[before_a][a] - d[a][after_a] - d[before_b][b] - d[b][after_b])
+
+    def relocate_delta(self, position_from: int, position_to: int) -> float:
+        """
+        Takes out a destination and inserts it back, so it lands on 'position_to'.
+        """
+        d, r = self._distances, self.route
+        moved = r[position_from]
+        before, after = r[position_from - 1], r[position_from + 1]
+        if position_to > position_from:
+            insert_after, insert_before = r[position_to], r[position_to + 1]
+        else:
+            insert_after, insert_before = r[position_to - 1], r[position_to]
+
+        return (d[before][after] - d[before][moved] - d[moved][after]
+                + d[insert_after][moved] + d[moved][insert_before] - d[insert_after][insert_before])
+
+    def reversal_delta(self, position_a: int, position_b: int) -> float:
+        """
+        Reverses the part of a route between two positions (2-opt move). For asymmetric matrices
+        the reversed part changes its cost too - it is read from prefix sums of both directions.
+        """
+        if position_a > position_b:
+            position_a, position_b = position_b, position_a
+        d, r = self._distances, self.route
+        first, last = r[position_a], r[position_b]
+        before, after = r[position_a - 1], r[position_b + 1]
+
+        delta = d[before][last] + d[first][after] - d[before][first] - d[last][after]
+        if not self._symmetric:
+            self._update_prefix_sums(position_b)
+            delta += (self._backward_prefix[position_b] - self._backward_prefix[position_a]
+                      - self._forward_prefix[position_b] + self._forward_prefix[position_a])
+
+        return delta
+
+    def _update_positions(self, first: int, last: int) -> None:
+        for position in range(first, last + 1):
+            self._positions[self.route[position]] = position
+
+    def _update_prefix_sums(self, position: int) -> None:
+        """
+        Brings prefix sums up to date up to 'position'. A move invalidates them only from its first changed
+        position on, so after moves near the end of a route just a few entries are recomputed.
+        """
+        if position < self._valid_prefix_length:
+            return
+
+        d, r = self._distances, self.route
+        forward, backward = self._forward_prefix, self._backward_prefix
+        for i in range(self._valid_prefix_length, position + 1):
+            a, b = r[i - 1], r[i]
+            forward[i] = forward[i - 1] + d[a][b]
+            backward[i] = backward[i - 1] + d[b][a]
+        self._valid_prefix_length = position + 1
+
+
+def get_neighbour_move_positions(move_type: str, position: int, neighbour_position: int) -> Tuple[int, int]:
+    """
+    Positions of a move, which places a neighbour right next to the destination on 'position'.
+    Both positions are the same, when they are neighbours already.
+    """
+    if move_type == RELOCATE:
+        return neighbour_position, position + 1 if neighbour_position > position else position - 1
+    elif neighbour_position > position:
+        return position + 1, neighbour_position
+    else:
+        return neighbour_position + 1, position
+
+
+def move_route(route: List[int], move_type: str, position_a: int, position_b: int) -> None:
+    """
+    Applies a move to a padded route in place.
+    """
+    if move_type == SWAP:
+        route[position_a], route[position_b] = route[position_b], route[position_a]
+    elif move_type == RELOCATE:
+        route.insert(position_b, route.pop(position_a))
+    elif move_type == REVERSAL:
+        if position_a > position_b:
+            position_a, position_b = position_b, position_a
+        route[position_a:position_b + 1] = route[position_b:position_a - 1:-1]
+    else:
+        raise ValueError(f'Unsupported move type: {move_type}')
+
+
+def get_neighbour_moves_positions(move_type: str, positions: np.ndarray,
+                                  neighbour_positions: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Vectorized 'get_neighbour_move_positions'.
+    """
+    after = neighbour_positions > positions
+    if move_type == RELOCATE:
+        return neighbour_positions, np.where(after, positions + 1, positions - 1)
+    return np.where(after, positions + 1, neighbour_positions + 1), np.where(after, neighbour_positions, positions)
+
+
+def get_moves_sources(move_type: str, positions_a: np.ndarray, positions_b: np.ndarray,
+                      route_length: int) -> np.ndarray:
+    """
+    Moves applied to a batch of padded routes (one move per row) as source indexes of every route position,
+    so all of them are applied by a single 'np.take_along_axis'.
+    """
+    columns = np.arange(0, route_length)[None, :]
+    a, b = positions_a[:, None], positions_b[:, None]
+    if move_type == SWAP:
+        return np.where(columns == a, b, np.where(columns == b, a, columns))
+    elif move_type == RELOCATE:
+        sources = np.where((columns >= a) & (columns < b), columns + 1, columns)
+        sources = np.where((columns > b) & (columns <= a), columns - 1, sources)
+        return np.where(columns == b, a, sources)
+    elif move_type == REVERSAL:
+        first, last = np.minimum(a, b), np.maximum(a, b)
+        return np.where((columns >= first) & (columns <= last), first + last - columns, columns)
+    else:
+        raise ValueError(f'Unsupported move type: {move_type}')
+
+
+class BatchRouteMoves:
+    """
+    Vectorized 'RouteMoves' - keeps a batch of routes (one per row) and evaluates one move per route at once.
+    Deltas cost O(1) per route, applying moves costs O(n) per route.
+    Costs, deltas and prefix sums are accumulated in int64 or float64, whatever the matrix dtype is - narrow integers
+    would overflow and float32 would lose precision over many applied moves.
+    """
+
+    def __init__(self, distance_matrix: np.ndarray, sequences: np.ndarray):
+        self._distances = distance_matrix
+        self._symmetric = bool((distance_matrix == distance_matrix.T).all())
+        self.routes = np.zeros((sequences.shape[0], sequences.shape[1] + 2), dtype=np.intp)
+        self.routes[:, 1:-1] = sequences
+        self._rows = np.arange(0, len(self.routes))
+        self._row_offsets = self._rows * self.routes.shape[1]
+        self._flat_distances = distance_matrix.ravel()
+        self._size = len(distance_matrix)
+        self._dtype = np.dtype(np.int64 if np.issubdtype(distance_matrix.dtype, np.integer) else np.float64)
+        self.costs = distance_matrix[self.routes[:, :-1], self.routes[:, 1:]].sum(axis=1, dtype=self._dtype)
+        self.positions = np.zeros((len(self.routes), len(distance_matrix)), dtype=np.intp)
+        self._forward_prefix = np.zeros(self.routes.shape, dtype=self._dtype)
+        self._backward_prefix = np.zeros(self.routes.shape, dtype=self._dtype)
+        self._update(self._rows)
+
+    @property
+    def sequences(self) -> np.ndarray:
+        return self.routes[:, 1:-1]
+
+    def deltas(self, move_type: str, positions_a: np.ndarray, positions_b: np.ndarray) -> np.ndarray:
+        d, r = self._get_arcs, self._get_nodes
+        if move_type == RELOCATE:
+            moved, before, after = r(positions_a), r(positions_a - 1), r(positions_a + 1)
+            later = positions_b > positions_a
+            insert_after = r(np.where(later, positions_b, positions_b - 1))
+            insert_before = r(np.where(later, positions_b + 1, positions_b))
+            return (d(before, after) - d(before, moved) - d(moved, after)
+                    + d(insert_after, moved) + d(moved, insert_before) - d(insert_after, insert_before))
+
+        first, last = np.minimum(positions_a, positions_b), np.maximum(positions_a, positions_b)
+        a, b, before, after = r(first), r(last), r(first - 1), r(last + 1)
+        if move_type == SWAP:
+            after_a, before_b = r(first + 1), r(last - 1)
+            adjacent_deltas = d(before, b) + d(b, a) + d(a, after) - d(before, a) - d(a, b) - d(b, after)
+            deltas = (d(before, b) + d(b, after_a) + d(before_b, a) + d(a, after)
+                      - d(before, a) - d(a, after_a) - d(before_b, b) - d(b, after))
+            return np.where(last == first + 1, adjacent_deltas, deltas)
+        elif move_type == REVERSAL:
+            deltas = d(before, b) + d(a, after) - d(before, a) - d(b, after)
+            if not self._symmetric:
+                deltas += (self._backward_prefix.take(self._row_offsets + last)
+                           - self._backward_prefix.take(self._row_offsets + first)
+                           - self._forward_prefix.take(self._row_offsets + last)
+                           + self._forward_prefix.take(self._row_offsets + first))
+            return deltas
+        else:
+            raise ValueError(f'Unsupported move type: {move_type}')
+
+    def _get_nodes(self, positions: np.ndarray) -> np.ndarray:
+        """
+        Node on the given position of every route. Flat 'take' is a lot cheaper than 2-D fancy indexing.
+        """
+        return self.routes.take(self._row_offsets + positions)
+
+    def _get_arcs(self, from_nodes: np.ndarray, to_nodes: np.ndarray) -> np.ndarray:
+        return self._flat_distances.take(from_nodes * self._size + to_nodes).astype(self._dtype, copy=False)
+
+    def apply(self, move_type: str, positions_a: np.ndarray, positions_b: np.ndarray, deltas: np.ndarray,
+              accepted: np.ndarray) -> None:
+        """
+        Applies moves of routes marked in 'accepted'.
+        """
+        rows = np.flatnonzero(accepted)
+        if len(rows) == 0:
+            return
+
+        sources = get_moves_sources(move_type, positions_a[rows], positions_b[rows], self.routes.shape[1])
+        self.routes[rows] = np.take_along_axis(self.routes[rows], sources, axis=1)
+        self.costs[rows] += deltas[rows]
+        self._update(rows)
+
+    def _update(self, rows: np.ndarray) -> None:
+        """
+        Refreshes positions and (for asymmetric matrices) prefix sums of arc costs in both directions
+        of changed routes.
+        """
+        routes = self.routes[rows]
+        self.positions[rows[:, None], routes[:, 1:-1]] = np.arange(1, routes.shape[1] - 1)
+        if not self._symmetric:
+            self._forward_prefix[rows, 1:] = np.cumsum(self._distances[routes[:, :-1], routes[:, 1:]], axis=1,
+                                                       dtype=self._dtype)
+            self._backward_prefix[rows, 1:] = np.cumsum(self._distances[routes[:, 1:], routes[:, :-1]], axis=1,
+                                                        dtype=self._dtype)
@@ -0,0 +1,65 @@
+import os
+
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+
+from tools.file_operations import load_from_npy_file, save_to_npy_file
+
+CHUNK_SIZE = 1024  # rows
+
+
+def get_candidate_neighbours(distance_matrix: np.ndarray, neighbours_count: int) -> np.ndarray:
+    """
+    Lists the closest destinations of every node (depot included), sorted by distance. The depot and the node
+    itself are never candidates, as only destinations can be moved within a sequence.
+
+    :return: Matrix of shape (nodes count, neighbours count) with the smallest sufficient integer dtype.
+    """
+    size = len(distance_matrix)
+    neighbours_count = min(neighbours_count, size - 2)
+    candidates = np.empty((size, neighbours_count), dtype=np.min_scalar_type(size - 1))
+
+    for start in range(0, size, CHUNK_SIZE):
+        rows = np.arange(start, min(start + CHUNK_SIZE, size))
+        distances = distance_matrix[rows].astype(np.float64)
+        distances[:, 0] = np.inf
+        distances[np.arange(len(rows)), rows] = np.inf
+
+        closest = np.argpartition(distances, neighbours_count - 1, axis=1)[:, :neighbours_count]
+        order = np.take_along_axis(distances, closest, axis=1).argsort(axis=1, kind='stable')
+        candidates[rows] = np.take_along_axis(closest, order, axis=1)
+
+    return candidates
+
+
+def get_candidate_neighbours_path(distance_matrix_path: Union[Path, str], neighbours_count: int) -> Path:
+    path = Path(distance_matrix_path)
+    return path.with_name(f'{path.stem}.knn{neighbours_count}.npy')
+
+
+def load_candidate_neighbours(distance_matrix_path: Union[Path, str], distance_matrix: np.ndarray,
+                              neighbours_count: int) -> Optional[np.ndarray]:
+    """
+    Candidates are cached next to the distance matrix file and rebuilt when the matrix file is newer.
+
+    :return: Candidate neighbours or None, when there are too few destinations to have any.
+    """
+    if len(distance_matrix) < 3:
+        return None
+
+    path = get_candidate_neighbours_path(distance_matrix_path, neighbours_count)
+    if path.exists() and path.stat().st_mtime >= Path(distance_matrix_path).stat().st_mtime:
+        return load_from_npy_file(path)
+
+    candidates = get_candidate_neighbours(distance_matrix, neighbours_count)
+    try:
+        # Parallel solvers may build the same file - the complete one replaces it atomically
+        temporary_path = path.with_name(f'{path.stem}.{os.getpid()}.tmp')
+        save_to_npy_file(temporary_path, candidates)
+        os.replace(temporary_path, path)
+    except OSError:
+        pass  # Read-only location - candidates are just not cached
+
+    return candidates
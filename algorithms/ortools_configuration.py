@@ -0,0 +1,79 @@
+from ast import literal_eval
+from pathlib import Path
+from typing import Dict, List, Union
+
+from algorithms.base import BaseSolver, SolverException
+from algorithms.budget import Budget
+from tools.results_store import load_results
+
+
+class OrtoolsConfiguration:
+    """
+    'ortools' section of a configuration. It does not depend on OR-Tools - the solver applies search parameters
+    returned by 'get_search_parameters' to OR-Tools ones.
+    """
+    # Search parameters set by names of OR-Tools enum values, by the name of their enum
+    ENUM_PARAMETERS = {
+        'first_solution_strategy': 'FirstSolutionStrategy',
+        'local_search_metaheuristic': 'LocalSearchMetaheuristic',
+    }
+
+    def __init__(self, conf: dict):
+        self.first_solution_strategy = conf.get('first_solution_strategy')
+        self.local_search_metaheuristic = conf.get('local_search_metaheuristic')
+        self.time_limit_ms = conf.get('time_limit_ms')
+        self.solution_limit = conf.get('solution_limit')
+        self.warm_start_solver = conf.get('warm_start_solver')
+        self.warm_start_results_path = conf.get('warm_start_results_path')
+
+    def get_search_parameters(self, budget: Budget) -> Dict[str, Union[str, int]]:
+        """
+        Only configured parameters are returned, OR-Tools defaults are kept for the others. The time limit of
+        the whole run (warm start included) caps the configured one.
+
+        :return: Values of search parameters - enum values (see 'ENUM_PARAMETERS') by their OR-Tools names.
+        """
+        parameters = {}
+        if self.first_solution_strategy is not None:
+            parameters['first_solution_strategy'] = self.first_solution_strategy.upper()
+        if self.local_search_metaheuristic is not None:
+            parameters['local_search_metaheuristic'] = self.local_search_metaheuristic.upper()
+        if self.solution_limit is not None:
+            parameters['solution_limit'] = self.solution_limit
+
+        time_limits_ms = [] if self.time_limit_ms is None else [self.time_limit_ms]
+        if budget.time_limit is not None:
+            time_limits_ms.append(max(1, int((budget.time_limit - budget.elapsed) * 1000)))
+        if time_limits_ms:
+            parameters['time_limit_ms'] = min(time_limits_ms)
+
+        return parameters
+
+
+def load_best_sequence(results_path: Union[Path, str], destinations_count: int) -> List[int]:
+    """
+    :return: The cheapest sequence saved for the same number of destinations in a results file or store.
+    """
+    _, results = load_results(results_path, ['destinations_count', 'cost', 'sequence'])
+    results = [r for r in results if int(r['destinations_count']) == destinations_count]
+    if not results:
+        raise SolverException(f'No results for {destinations_count} destinations in {results_path}.')
+
+    best_result = min(results, key=lambda r: float(r['cost']))
+    # Sequences are saved as Python lists or tuples (older files) or as JSON lists
+    return list(literal_eval(best_result['sequence']))
+
+
+def get_initial_routes(sequence: List[int], destinations_count: int, vehicles_count: int) -> List[List[int]]:
+    """
+    :param sequence: Routes separated by the depot.
+    :return: Route of every vehicle - empty routes are kept, as OR-Tools expects a route per vehicle.
+    """
+    routes = [route for route in BaseSolver._get_routes(sequence) if route]
+    if sorted(node for route in routes for node in route) != list(range(1, destinations_count)):
+        raise SolverException('Initial sequence has to visit every destination exactly once.')
+    if len(routes) > vehicles_count:
+        raise SolverException(f'Initial sequence has {len(routes)} routes, but there are only '
+                              f'{vehicles_count} vehicles.')
+
+    return [*routes, *[[] for _ in range(len(routes), vehicles_count)]]
@@ -1,44 +1,112 @@
-from typing import Callable, Any, List
+from typing import Callable, Any, List, Optional, Union
 
-from ortools.constraint_solver import pywrapcp
+import numpy as np
+from ortools.constraint_solver import pywrapcp, routing_enums_pb2
 
-from algorithms.base import BaseSolver, SolverException
+from algorithms.base import BaseSolver, SolverException, create_distance_callback
+from algorithms.genetic import GeneticSolver
+from algorithms.local_search_solution import LocalSearchSolver
+from algorithms.ortools_configuration import OrtoolsConfiguration, load_best_sequence, get_initial_routes
+from algorithms.simulated_annealing import SimulatedAnnealingSolver
+
+# Solvers, which can find an initial solution for OR-Tools, by the name of their configuration section
+WARM_START_SOLVERS = {
+    'genetic': GeneticSolver,
+    'simulated_annealing': SimulatedAnnealingSolver,
+    'local_search': LocalSearchSolver,
+}
 
 
 class OrtoolsSolver(BaseSolver):
-    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str):
-        super(OrtoolsSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path)
-        self.distance_callback = self._create_distance_callback()
+    ALGORITHM = 'ortools'
+
+    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        super(OrtoolsSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path, seed)
+        self._solver_arguments = (distance_matrix_path, configuration_path, vehicles_path)
+        self._conf = OrtoolsConfiguration(self.configuration.get('ortools', {}))
         self.depot = 0
 
     def _solve(self):
-        routing = pywrapcp.RoutingModel(self.destinations_count, len(self.vehicles), self.depot)
-        search_parameters = pywrapcp.RoutingModel.DefaultSearchParameters()
-        routing.SetArcCostEvaluatorOfAllVehicles(self.distance_callback)
-        assignment = routing.SolveWithParameters(search_parameters)
+        initial_sequence = self._get_initial_sequence()
+
+        manager = pywrapcp.RoutingIndexManager(self.destinations_count, self.vehicles_count, self.depot)
+        routing = pywrapcp.RoutingModel(manager)
+        # The engine calls the callback with its variable indexes - start and end of every vehicle has its own one
+        self.distance_callback = self._create_distance_callback(manager, routing)
+        routing.SetArcCostEvaluatorOfAllVehicles(routing.RegisterTransitCallback(self.distance_callback))
+        search_parameters = self._create_search_parameters()
+
+        if initial_sequence is None:
+            assignment = routing.SolveWithParameters(search_parameters)
+        else:
+            routing.CloseModelWithParameters(search_parameters)
+            initial_routes = [[manager.NodeToIndex(node) for node in route] for route in
+                              get_initial_routes(initial_sequence, self.destinations_count, self.vehicles_count)]
+            initial_assignment = routing.ReadAssignmentFromRoutes(initial_routes, True)
+            if not initial_assignment:
+                raise SolverException('Initial sequence is not a valid assignment.')
+            assignment = routing.SolveFromAssignmentWithParameters(initial_assignment, search_parameters)
 
         if not assignment:
             raise SolverException('No solution found.')
 
-        best_sequnece = self._get_best_sequence(routing, assignment)
-        best_sequence_cost = self._get_sequence_cost(best_sequnece)
+        routes = [route for route in self._get_routes_of_vehicles(manager, routing, assignment) if route]
+        return self._join_routes(routes or [[]])
+
+    def _create_search_parameters(self) -> Any:
+        """
+        Default parameters, but the configured ones.
+        """
+        search_parameters = pywrapcp.DefaultRoutingSearchParameters()
+        for name, value in self._conf.get_search_parameters(self.budget).items():
+            if name == 'time_limit_ms':
+                search_parameters.time_limit.FromMilliseconds(value)
+                continue
+            if name in OrtoolsConfiguration.ENUM_PARAMETERS:
+                # Values are attributes of the message wrapping the enum, e.g. FirstSolutionStrategy.SAVINGS
+                value = getattr(getattr(routing_enums_pb2, OrtoolsConfiguration.ENUM_PARAMETERS[name]), value)
+            setattr(search_parameters, name, value)
+
+        return search_parameters
 
-        return best_sequnece, best_sequence_cost
+    def _get_initial_sequence(self) -> Optional[List[int]]:
+        """
+        :return: Sequence found by the warm start solver or the best one of the results file - routes separated
+                 by the depot. None without a warm start.
+        """
+        if self._conf.warm_start_solver is not None:
+            solver_class = WARM_START_SOLVERS[self._conf.warm_start_solver]
+            if self._conf.warm_start_solver not in self.configuration and solver_class is not LocalSearchSolver:
+                raise SolverException(f"Warm start solver needs the '{self._conf.warm_start_solver}' configuration.")
+            solver = solver_class(*self._solver_arguments, None, seed=int(self._rng.integers(0, 2 ** 63)))
+            sequence, _, _ = solver.run()
+            return list(sequence)
 
-    def _get_best_sequence(self, routing: Any, assignment: Any) -> List[int]:
-        best_sequence = []
+        if self._conf.warm_start_results_path is not None:
+            return load_best_sequence(self._conf.warm_start_results_path, self.destinations_count)
 
-        index = routing.Start(self.depot)
-        best_sequence.append(routing.IndexToNode(index))
-        while not routing.IsEnd(index):
-            index = assignment.Value(routing.NextVar(index))
-            best_sequence.append(routing.IndexToNode(index))
+        return None
 
-        # Remove depot node
-        best_sequence.pop(0)
-        best_sequence.pop(-1)
+    def _get_routes_of_vehicles(self, manager: Any, routing: Any, assignment: Any) -> List[List[int]]:
+        """
+        :return: Route (without the depot) of every vehicle.
+        """
+        routes = []
+        for vehicle in range(0, self.vehicles_count):
+            route = []
+            index = assignment.Value(routing.NextVar(routing.Start(vehicle)))
+            while not routing.IsEnd(index):
+                route.append(manager.IndexToNode(index))
+                index = assignment.Value(routing.NextVar(index))
+            routes.append(route)
 
-        return best_sequence
+        return routes
 
-    def _create_distance_callback(self) -> Callable:
-        return self._arc_cost
+    def _create_distance_callback(self, manager: Any, routing: Any) -> Callable[[int, int], int]:
+        """
+        Arc costs are looked up by variable indexes directly - the matrix is reindexed once, so the callback does not
+        map indexes to nodes on every call.
+        """
+        nodes = [manager.IndexToNode(index) for index in range(0, routing.Size() + self.vehicles_count)]
+        return create_distance_callback(self.distance_matrix[np.ix_(nodes, nodes)])
@@ -0,0 +1,81 @@
+from collections import defaultdict
+from time import perf_counter
+from typing import Dict
+
+
+class Profiler:
+    """
+    Accumulates wall time of solver phases and named counters over a whole run. Phases are timed by chained
+    timestamps - 'stop' closes a phase and opens the next one, so a phase costs a single clock read.
+    """
+    enabled = True
+
+    def __init__(self):
+        self.times: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def start(self) -> float:
+        return perf_counter()
+
+    def stop(self, phase: str, start: float) -> float:
+        """
+        :return: Start of the next phase.
+        """
+        now = perf_counter()
+        self.times[phase] += now - start
+        self.calls[phase] += 1
+        return now
+
+    def count(self, counter: str, value: int = 1) -> None:
+        self.counters[counter] += value
+
+    def merge(self, profiler: 'Profiler') -> None:
+        """
+        Adds times and counters of another profiler, e.g. of a worker process.
+        """
+        for phase, time in profiler.times.items():
+            self.times[phase] += time
+            self.calls[phase] += profiler.calls[phase]
+        for counter, value in profiler.counters.items():
+            self.counters[counter] += value
+
+    def get_report(self) -> dict:
+        total_time = sum(self.times.values())
+        return {
+            'phases': {phase: {'time': time, 'calls': self.calls[phase],
+                               'share': time / total_time if total_time else 0.0}
+                       for phase, time in self.times.items()},
+            'counters': dict(self.counters),
+        }
+
+    def print_report(self) -> None:
+        report = self.get_report()
+        print('Profile:')
+        for phase, stats in sorted(report['phases'].items(), key=lambda item: -item[1]['time']):
+            print(f"  {phase}: {stats['time']:.6f} s ({stats['share']:.1%}), {stats['calls']} calls, "
+                  f"{stats['time'] / stats['calls'] * 1000:.4f} ms per call")
+        for counter, value in report['counters'].items():
+            print(f'  {counter}: {value}')
+
+
+class NullProfiler(Profiler):
+    """
+    Used, unless profiling is enabled - every method does nothing, so instrumented loops stay as fast as without it.
+    """
+    enabled = False
+
+    def start(self) -> float:
+        return 0.0
+
+    def stop(self, phase: str, start: float) -> float:
+        return 0.0
+
+    def count(self, counter: str, value: int = 1) -> None:
+        pass
+
+    def merge(self, profiler: Profiler) -> None:
+        pass
+
+
+NULL_PROFILER = NullProfiler()
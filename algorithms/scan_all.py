@@ -1,27 +1,170 @@
 import itertools
+import os
 
+from multiprocessing import Lock, RawValue
 from sys import maxsize as max_integer_size
 from pathlib import Path
+from typing import List, Optional, Tuple, Union
+
+import numpy as np
 
 from algorithms.base import BaseSolver
+from tools.parallel import create_pool
+
+PERMUTATIONS = 'permutations'
+BRANCH_AND_BOUND = 'branch_and_bound'
+
+# Branch and bound worker process state, set once by '_init_branch_and_bound_worker'
+_distances: List[List[float]] = []
+_closest_first: List[List[int]] = []
+_min_outgoing: List[float] = []
+_best_cost = None
+_best_cost_lock = None
 
 
 class ScanAllSolver(BaseSolver):
     DEFAULT_OUTPUT_PATH = Path('data', 'results', 'default_scan_all.csv')
+    ALGORITHM = 'scan_all'
+    PERMUTATIONS_BATCH_SIZE = 50_000
 
-    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str):
-        super(ScanAllSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path)
+    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
+        super(ScanAllSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path, output_path, seed)
+        conf = self.configuration.get('scan_all', {})
+        self._search = conf.get('search', PERMUTATIONS)
+        self._workers_count = conf.get('workers_count', os.cpu_count())
+        self._prefix_length = min(conf.get('prefix_length', 2), self.sequence_len)
 
     def _solve(self):
+        if self._search == BRANCH_AND_BOUND:
+            return self._solve_by_branch_and_bound()
+        else:
+            return self._solve_by_permutations()
+
+    def _solve_by_permutations(self):
         destination_ids = range(1, self.destinations_count)
         permutations = itertools.permutations(destination_ids)
 
         best_sequence = None
         best_sequence_cost = max_integer_size
-        for sequence in permutations:
-            cost = self._get_sequence_cost(sequence)
+        while best_sequence is None or not self.budget.is_exhausted():
+            batch_size = self.budget.get_block_length(self.PERMUTATIONS_BATCH_SIZE) or 1
+            batch = list(itertools.islice(permutations, batch_size))
+            if not batch:
+                break
+
+            costs = self._get_sequences_costs(np.array(batch, dtype=np.intp))
+            self.budget.count(len(batch))
+            batch_best_index = int(costs.argmin())
+            cost = costs[batch_best_index].item()
             if cost < best_sequence_cost:
                 best_sequence_cost = cost
-                best_sequence = sequence
+                best_sequence = batch[batch_best_index]
+                self.budget.record(cost)
 
         return best_sequence, best_sequence_cost
+
+    def _solve_by_branch_and_bound(self):
+        """
+        Depth-first search, which drops partial routes that cannot beat the best known one.
+        The search tree is split by fixed route prefixes, which are explored by a pool of processes
+        sharing the best known cost. The budget is checked after every explored prefix.
+        """
+        best_sequence = tuple(self._get_nearest_neighbour_sequence())
+        best_cost = self._get_sequence_cost(best_sequence)
+        self.budget.record(best_cost)
+
+        distances = self.distance_matrix.copy()
+        np.fill_diagonal(distances, distances.max() + 1)
+        closest_first = np.argsort(distances, axis=1, kind='stable')[:, :-1].tolist()
+        min_outgoing = distances.min(axis=1).tolist()
+
+        shared_best_cost = RawValue('d', best_cost)
+        initargs = (self.distance_matrix.tolist(), closest_first, min_outgoing, shared_best_cost, Lock())
+        with create_pool(self._workers_count, _init_branch_and_bound_worker, initargs) as pool:
+            for cost, sequence in pool.imap_unordered(_search_subtree, self._get_prefixes()):
+                if sequence is not None and cost < best_cost:
+                    best_cost = self._get_sequence_cost(sequence)
+                    best_sequence = sequence
+                    self.budget.record(best_cost)
+                if self.budget.is_exhausted():
+                    break
+
+        return best_sequence, best_cost
+
+    def _get_prefixes(self) -> List[Tuple[int, ...]]:
+        """
+        Cheapest prefixes go first, so good routes are found (and shared) early.
+        """
+        prefixes = list(itertools.permutations(range(1, self.destinations_count), self._prefix_length))
+        prefixes_costs = [self._arc_cost(0, p[0]) + sum(self._arc_cost(a, b) for a, b in zip(p, p[1:]))
+                          for p in prefixes]
+
+        return [prefixes[i] for i in np.argsort(prefixes_costs, kind='stable')]
+
+
+def _init_branch_and_bound_worker(distances: List[List[float]], closest_first: List[List[int]],
+                                  min_outgoing: List[float], best_cost, best_cost_lock) -> None:
+    global _distances, _closest_first, _min_outgoing, _best_cost, _best_cost_lock
+    _distances = distances
+    _closest_first = closest_first
+    _min_outgoing = min_outgoing
+    _best_cost = best_cost
+    _best_cost_lock = best_cost_lock
+
+
+def _search_subtree(prefix: Tuple[int, ...]) -> Tuple[float, Optional[Tuple[int, ...]]]:
+    """
+    Finds the best route starting with 'prefix'. Lower bound of a partial route is its cost increased by
+    the cheapest outgoing arc of the last and of every unvisited destination.
+    """
+    d = _distances
+    route = [0, *prefix]
+    visited = [False] * len(d)
+    for node in route:
+        visited[node] = True
+    unvisited_count = len(d) - len(route)
+    remaining_bound = sum(_min_outgoing[node] for node in range(0, len(d)) if not visited[node])
+
+    best_cost = _best_cost.value
+    best_route: Optional[List[int]] = None
+    best_route_cost = best_cost
+
+    def search(cost: float, remaining_bound: float, unvisited_count: int) -> None:
+        nonlocal best_cost, best_route, best_route_cost
+        last = route[-1]
+        if unvisited_count == 0:
+            cost += d[last][0]
+            best_cost = _best_cost.value
+            if cost < best_cost:
+                best_cost = best_route_cost = cost
+                best_route = [*route]
+                with _best_cost_lock:
+                    if cost < _best_cost.value:
+                        _best_cost.value = cost
+            return
+
+        if cost + _min_outgoing[last] + remaining_bound >= best_cost:
+            best_cost = min(best_cost, _best_cost.value)
+            return
+
+        for node in _closest_first[last]:
+            if visited[node]:
+                continue
+            new_cost = cost + d[last][node]
+            # 'remaining_bound' still contains the cheapest outgoing arc of 'node', so it is its lower bound.
+            # Candidates are sorted by distance, so any further one is too expensive as well.
+            if new_cost + remaining_bound >= best_cost:
+                break
+            visited[node] = True
+            route.append(node)
+            search(new_cost, remaining_bound - _min_outgoing[node], unvisited_count - 1)
+            route.pop()
+            visited[node] = False
+
+    prefix_cost = d[0][route[1]] + sum(d[a][b] for a, b in zip(route[1:], route[2:]))
+    search(prefix_cost, remaining_bound, unvisited_count)
+
+    if best_route is None:
+        return best_route_cost, None
+    return best_route_cost, tuple(best_route[1:])
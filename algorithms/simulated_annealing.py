@@ -1,68 +1,222 @@
+from math import exp
 from pathlib import Path
-from typing import List
-from random import shuffle, random, randint
+from typing import Iterator, List, Optional, Sequence, Tuple, Union
 
 import numpy as np
 
 from algorithms.base import BaseSolver
+from algorithms.cooling import create_cooling_schedule
+from algorithms.moves import RouteMoves, BatchRouteMoves, SWAP, get_neighbour_move_positions, \
+    get_neighbour_moves_positions
+from algorithms.split import GiantTourMoves, BatchGiantTourMoves
 
 
 class SimulatedAnnealingSolver(BaseSolver):
     DEFAULT_OUTPUT_PATH = Path('data', 'results', 'default_simulated_annealing.csv')
+    ALGORITHM = 'simulated_annealing'
+    RANDOM_BLOCK_SIZE = 4096
+    MAX_RANDOM_BLOCK_ELEMENTS = 2 ** 20  # Limits block size of multiple chains
+    OUTPUT_HEADER = [*BaseSolver.OUTPUT_HEADER, 'iterations']
 
-    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str):
+    def __init__(self, distance_matrix_path: str, configuration_path: str, vehicles_path: str, output_path: str,
+                 seed: Optional[Union[int, np.random.SeedSequence]] = None):
         super(SimulatedAnnealingSolver, self).__init__(distance_matrix_path, configuration_path, vehicles_path,
-                                                       output_path)
+                                                       output_path, seed)
         conf = self.configuration['simulated_annealing']
         self._iterations_count = conf['iterations_count']
-        self._temperature_factor = conf['temperature_factor']
+        self._cooling_schedule = create_cooling_schedule(conf)
+        self._stagnation_window = conf.get('stagnation_window', self._iterations_count)
+        self._move_types = conf.get('moves', [SWAP])
+        self._chains_count = conf.get('chains_count', 1)
+        self._candidate_neighbours = self._load_candidate_neighbours()
 
         self._best_sequence = self._generate_initial_sequence()
-        self._best_sequence_cost = self._get_sequence_cost(self._best_sequence)
+        self._best_sequence_cost = self._get_giant_tour_cost(self._best_sequence)
+        self.iterations_done = 0
 
     def _solve(self):
-        sequence = [*self._best_sequence]
-
-        for i in range(0, self._iterations_count):
-            new_sequence = self._create_new_sequence([*sequence])
-            cost = self._get_sequence_cost(new_sequence)
-
-            if cost < self._best_sequence_cost:
-                sequence = new_sequence
-                self._best_sequence = [*sequence]
-                self._best_sequence_cost = cost
-                # print(f"New solution: {self._best_sequence} cost: {self._best_sequence_cost}")
-            else:
-                if self.calculate_probability(i, cost) > random():
-                    sequence = new_sequence
-
-        return self._best_sequence, self._best_sequence_cost
-
-    def _generate_initial_sequence(self) -> List[int]:
-        init_sequence = list(range(1, len(self.destinations)))
-        shuffle(init_sequence)
-
-        return init_sequence
-
-    def _create_new_sequence(self, sequence: List[int]) -> List[int]:
+        self.iterations_done = 0
+        self.budget.record(self._best_sequence_cost)
+        if self.sequence_len < 2:
+            return self._decode_giant_tour(self._best_sequence)
+        if self._chains_count > 1:
+            return self._solve_with_chains()
+
+        if self._split is None:
+            route = RouteMoves(self.distance_matrix, self._best_sequence)
+        else:
+            route = GiantTourMoves(self._split, self._best_sequence)
+        if self._candidate_neighbours is not None:
+            candidate_neighbours = self._candidate_neighbours.tolist()
+
+        last_improvement = 0
+        for block_start, block_size in self._get_blocks(self.RANDOM_BLOCK_SIZE):
+            if self._split is not None and block_start > 0:
+                # Moves are priced against the split of the giant tour made at the start of their block
+                route.resplit()
+                if route.cost < self._best_sequence_cost:
+                    self._best_sequence, self._best_sequence_cost = route.sequence, route.cost
+                    last_improvement = block_start
+                    self.budget.record(route.cost)
+            move_ids, positions_a, positions_b, draws = self._draw_moves(block_size)
+            if self._candidate_neighbours is not None:
+                positions_b = self._draw_neighbour_ranks(block_size).tolist()
+            temperatures = self._cooling_schedule.get_temperatures(block_start, block_size).tolist()
+            stop = min(block_size, last_improvement + self._stagnation_window - block_start)
+            accepted_count = worse_count = 0
+
+            for i in range(0, block_size):
+                if i == stop:
+                    break
+                move_type = self._move_types[move_ids[i]]
+                position_a, position_b = positions_a[i], positions_b[i]
+                if self._candidate_neighbours is not None:
+                    neighbour = candidate_neighbours[route.route[position_a]][position_b]
+                    position_a, position_b = get_neighbour_move_positions(move_type, position_a,
+                                                                          route.position(neighbour))
+                    if position_a == position_b:
+                        continue
+
+                delta = route.delta(move_type, position_a, position_b)
+                cost = route.cost + delta
+
+                if cost < self._best_sequence_cost:
+                    route.apply(move_type, position_a, position_b, delta)
+                    self._best_sequence = route.sequence
+                    self._best_sequence_cost = cost
+                    last_improvement = block_start + i + 1
+                    stop = min(block_size, i + 1 + self._stagnation_window)
+                    self.budget.record(cost)
+                else:
+                    worse_count += 1
+                    if exp((self._best_sequence_cost - cost) / temperatures[i]) > draws[i]:
+                        route.apply(move_type, position_a, position_b, delta)
+                        accepted_count += 1
+
+            self.iterations_done = block_start + stop
+            self.budget.count(stop)
+            if stop < block_size:
+                break
+            self._cooling_schedule.update(self.iterations_done, last_improvement, accepted_count, worse_count)
+
+        return self._decode_giant_tour(self._best_sequence)
+
+    def _solve_with_chains(self):
         """
-        Changes 2 points place in a sequence
+        Advances independent chains in lockstep - each of them starts from its own random sequence, but moves,
+        acceptance and costs of all chains are evaluated together as arrays. Every chain accepts worse moves
+        with regard to its own best cost, the best sequence of all chains is returned.
         """
-        index_a = randint(0, self.sequence_max_index)
-        index_b = randint(0, self.sequence_max_index)
-
-        if index_a != index_b:
-            sequence[index_a], sequence[index_b] = sequence[index_b], sequence[index_a]
+        sequences = np.array([self._best_sequence, *[self._generate_initial_sequence()
+                                                     for _ in range(1, self._chains_count)]], dtype=np.intp)
+        if self._split is None:
+            chains = BatchRouteMoves(self.distance_matrix, sequences)
         else:
-            self._create_new_sequence(sequence)
-
-        return sequence
-
-    def calculate_probability(self, iteration_number: int, cost: float) -> float:
-        temperature = self._calculate_temperature(iteration_number)
-        probability = np.power(np.e, -1 * (cost - self._best_sequence_cost) / temperature)
+            chains = BatchGiantTourMoves(self._split, sequences)
+        chains_best_costs = chains.costs.copy()
+        self._update_best_sequence(chains, chains_best_costs)
+        rows = np.arange(0, self._chains_count)
+
+        last_improvement = 0
+        block_length = max(1, min(self.RANDOM_BLOCK_SIZE, self.MAX_RANDOM_BLOCK_ELEMENTS // self._chains_count))
+        for block_start, block_size in self._get_blocks(block_length, self._chains_count):
+            move_ids, positions_a, positions_b, draws = self._draw_moves(block_size, self._chains_count)
+            if self._candidate_neighbours is not None:
+                positions_b = self._draw_neighbour_ranks((block_size, self._chains_count))
+            temperatures = self._cooling_schedule.get_temperatures(block_start, block_size)
+            stop = min(block_size, last_improvement + self._stagnation_window - block_start)
+            accepted_count = worse_count = 0
+
+            for i in range(0, block_size):
+                if i == stop:
+                    break
+                move_type = self._move_types[move_ids[i]]
+                chains_positions_a, chains_positions_b = positions_a[i], positions_b[i]
+                valid = True
+                if self._candidate_neighbours is not None:
+                    neighbours = self._candidate_neighbours[chains.routes[rows, chains_positions_a], positions_b[i]]
+                    chains_positions_a, chains_positions_b = get_neighbour_moves_positions(
+                        move_type, chains_positions_a, chains.positions[rows, neighbours])
+                    valid = chains_positions_a != chains_positions_b
+
+                deltas = chains.deltas(move_type, chains_positions_a, chains_positions_b)
+                costs = chains.costs + deltas
+                improved = (costs < chains_best_costs) & valid
+                worse = ~improved & valid
+                probabilities = np.exp(np.minimum(chains_best_costs - costs, 0) / temperatures[i])
+                accepted_worse = (probabilities > draws[i]) & worse
+                accepted_count += np.count_nonzero(accepted_worse)
+                worse_count += np.count_nonzero(worse)
+
+                chains.apply(move_type, chains_positions_a, chains_positions_b, deltas, improved | accepted_worse)
+                if improved.any():
+                    chains_best_costs[improved] = costs[improved]
+                    if self._update_best_sequence(chains, chains_best_costs):
+                        last_improvement = block_start + i + 1
+                        stop = min(block_size, i + 1 + self._stagnation_window)
+                        self.budget.record(self._best_sequence_cost)
+
+            self.iterations_done = block_start + stop
+            self.budget.count(stop * self._chains_count)
+            if stop < block_size:
+                break
+            self._cooling_schedule.update(self.iterations_done, last_improvement, accepted_count, worse_count)
+
+        return self._decode_giant_tour(self._best_sequence)
+
+    def _update_best_sequence(self, chains: Union[BatchRouteMoves, BatchGiantTourMoves],
+                              chains_best_costs: np.ndarray) -> bool:
+        """
+        :return: Whether the best sequence of all chains was improved.
+        """
+        best_chain = int(chains_best_costs.argmin())
+        if chains_best_costs[best_chain] < self._best_sequence_cost:
+            self._best_sequence = chains.sequences[best_chain].tolist()
+            self._best_sequence_cost = chains_best_costs[best_chain].item()
+            return True
+        return False
+
+    def _get_blocks(self, block_length: int, chains_count: int = 1) -> Iterator[Tuple[int, int]]:
+        """
+        :return: First iteration and size of consecutive blocks, until 'iterations_done' reaches the iterations count
+                 or the budget runs out. Blocks end at every update of an adaptive cooling schedule.
+        """
+        if self._cooling_schedule.update_interval is not None:
+            block_length = min(block_length, self._cooling_schedule.update_interval)
+        while self.iterations_done < self._iterations_count:
+            block_size = self.budget.get_block_length(min(block_length, self._iterations_count - self.iterations_done),
+                                                      chains_count)
+            if block_size == 0:
+                return
+            yield self.iterations_done, block_size
+
+    def get_results_row(self, sequence: Sequence, sequence_cost: float, execution_time: float) -> tuple:
+        return (*super(SimulatedAnnealingSolver, self).get_results_row(sequence, sequence_cost, execution_time),
+                self.iterations_done)
 
-        return probability
+    def _generate_initial_sequence(self) -> List[int]:
+        return self._rng.permutation(np.arange(1, len(self.destinations))).tolist()
 
-    def _calculate_temperature(self, iteration_number: int) -> float:
-        return self._temperature_factor / np.log(iteration_number + 2)
+    def _draw_moves(self, block_size: int, chains_count: int = None):
+        """
+        Draws a block of random moves at once - a move type and 2 different route positions per iteration.
+        Positions are 1-based, as the depot opens the route. With 'chains_count', positions and draws are
+        arrays with a column per chain, otherwise lists.
+        """
+        shape = block_size if chains_count is None else (block_size, chains_count)
+        move_ids = self._rng.integers(0, len(self._move_types), size=block_size)
+        positions_a = self._rng.integers(0, self.sequence_len, size=shape)
+        offsets = self._rng.integers(1, self.sequence_len, size=shape)
+        positions_b = (positions_a + offsets) % self.sequence_len
+        draws = self._rng.random(size=shape)
+
+        if chains_count is None:
+            return move_ids.tolist(), (positions_a + 1).tolist(), (positions_b + 1).tolist(), draws.tolist()
+        return move_ids.tolist(), positions_a + 1, positions_b + 1, draws
+
+    def _draw_neighbour_ranks(self, shape) -> np.ndarray:
+        """
+        With candidate neighbours, the second position of a move is the position of a random close neighbour
+        of the destination on the first one.
+        """
+        return self._rng.integers(0, self._candidate_neighbours.shape[1], size=shape)
@@ -0,0 +1,330 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from numpy.lib.stride_tricks import sliding_window_view
+
+from algorithms.moves import DistanceRows, RouteMoves, SWAP, RELOCATE, REVERSAL, get_distance_rows, \
+    get_moves_sources, move_route
+
+
+class GiantTourSplit:
+    """
+    Optimally splits a giant tour - a sequence of all destinations - into at most 'vehicles_count' routes,
+    which keep the order of the sequence and start and end in the depot.
+
+    Cost of a route serving positions i..j-1 of a sequence is separable: first[i] - prefix[i + 1] + prefix[j] +
+    last[j - 1], where 'prefix' holds running sums of arcs along the sequence. So minimizing total distance is
+    a dynamic program with a running minimum - O(n) per vehicle. Minimizing the longest route (a bottleneck
+    objective) cannot use the running minimum and costs O(n^2) per vehicle instead, still vectorized.
+    Costs are computed for 2-D batches of sequences (one per row), so a whole population is split at once.
+
+    With 'max_route_length' (destinations of a single route) only routes starting in a window of that many
+    positions before their end are considered - O(n * max_route_length) per vehicle for both objectives.
+    """
+    MAX_CHUNK_ELEMENTS = 2 ** 22  # Limits memory of (sequences x ends x starts) route costs
+
+    def __init__(self, distance_matrix: np.ndarray, vehicles_count: int, minimize_longest_route: bool,
+                 max_route_length: Optional[int] = None):
+        self.distance_matrix = distance_matrix
+        self.vehicles_count = vehicles_count
+        self.minimize_longest_route = minimize_longest_route
+        self.max_route_length = max_route_length
+
+    def get_costs(self, sequences: np.ndarray) -> np.ndarray:
+        """
+        :return: The best split cost (total distance or the longest route) of every sequence.
+        """
+        sequences = np.asarray(sequences)
+        chunk_size = len(sequences)
+        if self.minimize_longest_route:
+            size = sequences.shape[1]
+            chunk_size = max(1, self.MAX_CHUNK_ELEMENTS // (size * self._get_window(size)))
+
+        return np.concatenate([self._get_costs(sequences[start:start + chunk_size])
+                               for start in range(0, len(sequences), chunk_size)])
+
+    def _get_costs(self, sequences: np.ndarray) -> np.ndarray:
+        """
+        Only the last destination of the last layer is needed, so that layer costs O(n) per sequence.
+        """
+        opening_costs, closing_costs = self._get_route_cost_terms(sequences)
+        layer = self._get_layers(opening_costs, closing_costs)[-1]
+        first_start = sequences.shape[1] - self._get_window(sequences.shape[1])
+        candidates = self._combine(layer[:, first_start:-1], opening_costs[:, first_start:] + closing_costs[:, -1:])
+
+        return np.minimum(layer[:, -1], candidates.min(axis=1))
+
+    def split(self, sequence: Sequence[int]) -> List[List[int]]:
+        """
+        :return: Non-empty routes (without the depot) of the best split.
+        """
+        sequence = np.asarray(sequence, dtype=np.intp)
+        opening_costs, closing_costs = self._get_route_cost_terms(sequence[None, :])
+        layers = self._get_layers(opening_costs, closing_costs)
+
+        routes: List[List[int]] = []
+        end = len(sequence)
+        for vehicle in range(self.vehicles_count, 0, -1):
+            if end == 0:
+                break
+            previous = layers[vehicle - 1][0]
+            first_start = max(0, end - self._get_window(len(sequence)))
+            candidates = self._combine(previous[first_start:end],
+                                       opening_costs[0, first_start:end] + closing_costs[0, end])
+            start = first_start + int(candidates.argmin())
+            if previous[end] <= candidates[start - first_start]:
+                continue  # This vehicle stays in the depot
+            routes.append(sequence[start:end].tolist())
+            end = start
+
+        return routes[::-1]
+
+    def _get_layers(self, opening_costs: np.ndarray, closing_costs: np.ndarray) -> List[np.ndarray]:
+        """
+        Layer k holds the best costs of serving the first j destinations (column j) by at most k vehicles.
+        Layers for 0..K-1 vehicles are returned, the last vehicle closes the sequence.
+        """
+        rows_count, size = opening_costs.shape
+        window = self._get_window(size)
+        layer = np.full((rows_count, size + 1), np.inf)
+        layer[:, 0] = 0
+        layers = [layer]
+        if self.minimize_longest_route and self.vehicles_count > 1:
+            # Costs of routes (end x window of starts), starts before the sequence are never chosen
+            routes_costs = closing_costs[:, 1:, None] + self._get_windows(opening_costs, window)
+            candidates = np.empty_like(routes_costs)
+
+        for _ in range(1, self.vehicles_count):
+            if self.minimize_longest_route:
+                best_costs = np.maximum(self._get_windows(layer[:, :-1], window), routes_costs,
+                                        out=candidates).min(axis=2)
+            elif window < size:
+                best_costs = self._get_windows(layer[:, :-1] + opening_costs, window).min(axis=2) + closing_costs[:, 1:]
+            else:
+                best_costs = np.minimum.accumulate(layer[:, :-1] + opening_costs, axis=1) + closing_costs[:, 1:]
+            layer = layer.copy()
+            np.minimum(layer[:, 1:], best_costs, out=layer[:, 1:])
+            layers.append(layer)
+
+        return layers
+
+    def _get_window(self, size: int) -> int:
+        return size if self.max_route_length is None else min(self.max_route_length, size)
+
+    @staticmethod
+    def _get_windows(costs: np.ndarray, window: int) -> np.ndarray:
+        """
+        :return: View (rows x ends x window), where [r, j, w] holds costs[r, j - window + 1 + w] - costs of starts of
+                 routes ending at position j. Starts before the sequence cost infinity.
+        """
+        padded_costs = np.full((costs.shape[0], costs.shape[1] + window - 1), np.inf)
+        padded_costs[:, window - 1:] = costs
+        return sliding_window_view(padded_costs, window, axis=1)
+
+    def _combine(self, previous_costs: np.ndarray, route_costs: np.ndarray) -> np.ndarray:
+        if self.minimize_longest_route:
+            return np.maximum(previous_costs, route_costs)
+        else:
+            return previous_costs + route_costs
+
+    def _get_route_cost_terms(self, sequences: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Route over positions i..j-1 costs opening_costs[i] + closing_costs[j].
+
+        :return: Opening costs (n columns) and closing costs (n + 1 columns, the first one is unused).
+        """
+        d = self.distance_matrix
+        rows_count, size = sequences.shape
+        prefix = np.zeros((rows_count, size + 1))
+        np.cumsum(d[sequences[:, :-1], sequences[:, 1:]], axis=1, out=prefix[:, 2:])
+
+        opening_costs = d[0, sequences] - prefix[:, 1:]
+        closing_costs = np.zeros((rows_count, size + 1))
+        closing_costs[:, 1:] = prefix[:, 1:] + d[sequences, 0]
+
+        return opening_costs, closing_costs
+
+
+class GiantTourMoves:
+    """
+    Same interface as 'RouteMoves' for a giant tour split into vehicle routes. Moves are priced against the current
+    split - its routes are kept as a single route with the depot between them, and only costs of routes touched by
+    a move are recomputed. So a swap, a relocation or a reversal inside of a route costs O(1) like on a single route
+    (plus O(K) for the longest route objective), a reversal across routes costs O(length of the routes it touches).
+
+    Moves may move destinations between routes, but never change the number of routes. 'resplit' finds the best split
+    of the current giant tour again (O(n^2 * K) for the longest route objective), so callers do it once per block of
+    moves - the cost is never higher after it.
+    """
+
+    def __init__(self, split: GiantTourSplit, sequence: Sequence[int], distances: DistanceRows = None,
+                 symmetric: bool = None):
+        distance_matrix = split.distance_matrix
+        self._split = split
+        self._distances = distances if distances is not None else get_distance_rows(distance_matrix)
+        if symmetric is None:
+            symmetric = bool((distance_matrix == distance_matrix.T).all())
+        self._symmetric = symmetric
+        self.route: List[int] = [0, *sequence, 0]
+        self._route_of_node = [0] * len(distance_matrix)
+        self.resplit()
+
+    @property
+    def sequence(self) -> List[int]:
+        return self.route[1:-1]
+
+    def position(self, node: int) -> int:
+        return self._tour.position(node) - self._route_of_node[node]
+
+    def resplit(self) -> None:
+        """
+        Replaces the current split by the best split of the giant tour.
+        """
+        routes = self._split.split(self.sequence)
+        routes += [[] for _ in range(len(routes), self._split.vehicles_count)]
+        tour = [node for route in routes for node in (0, *route)]
+        # Routes of the split with the depot between them, positions of the giant tour are shifted by route indexes
+        self._tour = RouteMoves(self._split.distance_matrix, tour[1:], self._distances, self._symmetric)
+        self._depot_positions = [position for position, node in enumerate(self._tour.route) if node == 0]
+        for index, route in enumerate(routes):
+            for node in route:
+                self._route_of_node[node] = index
+        self._routes_costs = [self._get_path_cost([0, *route, 0]) for route in routes]
+        self.cost = self._combine(self._routes_costs)
+        self._candidate = None
+
+    def delta(self, move_type: str, position_a: int, position_b: int) -> float:
+        tour_position_a, tour_position_b = self._get_tour_position(position_a), self._get_tour_position(position_b)
+        routes_costs = self._get_moved_routes_costs(move_type, tour_position_a, tour_position_b)
+        self._candidate = tour_position_a, tour_position_b, routes_costs
+
+        if self._split.minimize_longest_route:
+            untouched_costs = (c for index, c in enumerate(self._routes_costs) if index not in routes_costs)
+            return max([*routes_costs.values(), *untouched_costs]) - self.cost
+        return sum(cost - self._routes_costs[index] for index, cost in routes_costs.items())
+
+    def apply(self, move_type: str, position_a: int, position_b: int, delta: float) -> None:
+        """
+        Applies the move priced by the last 'delta' call.
+        """
+        tour_position_a, tour_position_b, routes_costs = self._candidate
+        tour_delta = sum(cost - self._routes_costs[index] for index, cost in routes_costs.items())
+        self._tour.apply(move_type, tour_position_a, tour_position_b, tour_delta)
+        move_route(self.route, move_type, position_a, position_b)
+        for index, cost in routes_costs.items():
+            self._routes_costs[index] = cost
+        self.cost = self._combine(self._routes_costs)
+        self._update_routes(min(tour_position_a, tour_position_b), max(tour_position_a, tour_position_b))
+
+    def _get_tour_position(self, position: int) -> int:
+        return position + self._route_of_node[self.route[position]]
+
+    def _get_moved_routes_costs(self, move_type: str, position_a: int, position_b: int) -> Dict[int, float]:
+        """
+        :return: Costs of routes touched by a move (positions of the tour), by route indexes.
+        """
+        d, r = self._distances, self._tour.route
+        route_a, route_b = self._route_of_node[r[position_a]], self._route_of_node[r[position_b]]
+        if route_a == route_b:
+            return {route_a: self._routes_costs[route_a] + self._tour.delta(move_type, position_a, position_b)}
+
+        if move_type == SWAP:
+            a, b = r[position_a], r[position_b]
+            return {route_a: self._routes_costs[route_a] + self._get_replacement_delta(position_a, b),
+                    route_b: self._routes_costs[route_b] + self._get_replacement_delta(position_b, a)}
+        elif move_type == RELOCATE:
+            moved, before, after = r[position_a], r[position_a - 1], r[position_a + 1]
+            if position_b > position_a:
+                insert_after, insert_before = r[position_b], r[position_b + 1]
+            else:
+                insert_after, insert_before = r[position_b - 1], r[position_b]
+            return {route_a: self._routes_costs[route_a] + d[before][after] - d[before][moved] - d[moved][after],
+                    route_b: (self._routes_costs[route_b] + d[insert_after][moved] + d[moved][insert_before]
+                              - d[insert_after][insert_before])}
+        elif move_type == REVERSAL:
+            first, last = min(position_a, position_b), max(position_a, position_b)
+            first_route, last_route = min(route_a, route_b), max(route_a, route_b)
+            start, end = self._depot_positions[first_route], self._depot_positions[last_route + 1]
+            moved_routes = [*r[start:first], *r[last:first - 1:-1], *r[last + 1:end + 1]]
+            return self._get_routes_costs(moved_routes, first_route)
+        else:
+            raise ValueError(f'Unsupported move type: {move_type}')
+
+    def _get_replacement_delta(self, position: int, node: int) -> float:
+        d, r = self._distances, self._tour.route
+        before, replaced, after = r[position - 1], r[position], r[position + 1]
+        return d[before][node] + d[node][after] - d[before][replaced] - d[replaced][after]
+
+    def _get_routes_costs(self, routes: List[int], first_route: int) -> Dict[int, float]:
+        """
+        :param routes: Consecutive routes of the tour, separated by the depot.
+        """
+        d = self._distances
+        costs, index, cost = {}, first_route, 0
+        for a, b in zip(routes, routes[1:]):
+            cost += d[a][b]
+            if b == 0:
+                costs[index], index, cost = cost, index + 1, 0
+
+        return costs
+
+    def _update_routes(self, first: int, last: int) -> None:
+        """
+        Moves change routes of destinations and positions of the depot only between their first and last position.
+        """
+        r = self._tour.route
+        depot_positions = [p for p in self._depot_positions if p < first]
+        index = len(depot_positions) - 1
+        for position in range(first, last + 1):
+            if r[position] == 0:
+                depot_positions.append(position)
+                index += 1
+            else:
+                self._route_of_node[r[position]] = index
+        self._depot_positions = [*depot_positions, *(p for p in self._depot_positions if p > last)]
+
+    def _get_path_cost(self, path: List[int]) -> float:
+        d = self._distances
+        return sum(d[a][b] for a, b in zip(path, path[1:]))
+
+    def _combine(self, routes_costs: List[float]) -> float:
+        return max(routes_costs) if self._split.minimize_longest_route else sum(routes_costs)
+
+
+class BatchGiantTourMoves:
+    """
+    Same interface as 'BatchRouteMoves', but moves are priced by splitting whole moved sequences at once.
+    """
+
+    def __init__(self, split: GiantTourSplit, sequences: np.ndarray):
+        self._split = split
+        self.routes = np.zeros((sequences.shape[0], sequences.shape[1] + 2), dtype=np.intp)
+        self.routes[:, 1:-1] = sequences
+        self.costs = split.get_costs(self.sequences)
+        self.positions = np.zeros((len(self.routes), len(split.distance_matrix)), dtype=np.intp)
+        self._update_positions(np.arange(0, len(self.routes)))
+        self._candidates = None
+
+    @property
+    def sequences(self) -> np.ndarray:
+        return self.routes[:, 1:-1]
+
+    def deltas(self, move_type: str, positions_a: np.ndarray, positions_b: np.ndarray) -> np.ndarray:
+        sources = get_moves_sources(move_type, positions_a, positions_b, self.routes.shape[1])
+        self._candidates = np.take_along_axis(self.routes, sources, axis=1)
+
+        return self._split.get_costs(self._candidates[:, 1:-1]) - self.costs
+
+    def apply(self, move_type: str, positions_a: np.ndarray, positions_b: np.ndarray, deltas: np.ndarray,
+              accepted: np.ndarray) -> None:
+        """
+        Applies moves priced by the last 'deltas' call to routes marked in 'accepted'.
+        """
+        rows = np.flatnonzero(accepted)
+        self.routes[rows] = self._candidates[rows]
+        self.costs[rows] += deltas[rows]
+        self._update_positions(rows)
+
+    def _update_positions(self, rows: np.ndarray) -> None:
+        self.positions[rows[:, None], self.routes[rows, 1:-1]] = np.arange(1, self.routes.shape[1] - 1)
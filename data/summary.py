@@ -1,7 +1,22 @@
 import os
+import sys
 from pathlib import Path
 
 from tools.file_operations import load_csv_file
+from tools.results_store import ResultsStore
+
+# Summary of a results store (the path is the only argument) is aggregated by SQLite, without reading any rows
+if len(sys.argv) > 1:
+    with ResultsStore(sys.argv[1]) as store:
+        summary = store.get_summary()
+    print(f"Rows count: {summary['cost']['count']}")
+    for column, name in (('destinations_count', 'destinations'), ('cost', 'cost'),
+                         ('execution_time', 'execution time')):
+        print(f'{name.capitalize()} min: {summary[column]["min"]}')
+        print(f'{name.capitalize()} max: {summary[column]["max"]}')
+        print(f'{name.capitalize()} sum: {summary[column]["sum"]}')
+        print(f'AVG {name}: {summary[column]["mean"]}')
+    sys.exit()
 
 rows_count = 0
 destinations_sum = 0
@@ -0,0 +1,187 @@
+import os
+
+import numpy as np
+import pytest
+
+from algorithms.base import BaseSolver, SolverException, create_distance_callback, load_distance_matrix, \
+    load_validated_json
+from algorithms.budget import Budget
+from tools.file_operations import load_csv_file, save_to_json_file, save_to_pickle_file
+
+DISTANCE_MATRIX = [[0, 3, 5, 9],
+                   [4, 0, 2, 7],
+                   [6, 1, 0, 8],
+                   [9, 6, 3, 0]]
+
+
+class DummySolver(BaseSolver):
+    def __init__(self):
+        self.distance_matrix = self._normalize_distance_matrix(DISTANCE_MATRIX)
+
+    def _solve(self):
+        pass
+
+
+@pytest.fixture
+def solver():
+    return DummySolver()
+
+
+def test_normalize_distance_matrix(solver):
+    assert solver.distance_matrix.dtype.kind == 'i'
+    assert solver.distance_matrix.flags['C_CONTIGUOUS']
+    assert BaseSolver._normalize_distance_matrix([[0, 1.5], [2.5, 0]]).dtype == np.float64
+
+    with pytest.raises(SolverException):
+        BaseSolver._normalize_distance_matrix([[0, 1, 2], [1, 0, 2]])
+
+
+def test_normalize_distance_matrix_converts_other_floats():
+    assert BaseSolver._normalize_distance_matrix(np.ones((2, 2), dtype=np.float16)).dtype == np.float64
+    assert BaseSolver._normalize_distance_matrix(np.ones((2, 2), dtype='>f8')).dtype == np.dtype('=f8')
+
+
+def test_normalize_distance_matrix_keeps_float32_memmap(tmp_path):
+    npy_path = tmp_path / 'matrix.npy'
+    np.save(npy_path, np.ones((3, 3), dtype=np.float32))
+    matrix = np.load(npy_path, mmap_mode='r')
+
+    normalized = BaseSolver._normalize_distance_matrix(matrix)
+
+    assert normalized.dtype == np.float32
+    assert np.shares_memory(normalized, matrix)
+
+
+@pytest.mark.parametrize('sequence, expected_cost', [
+    ([1, 2, 3], 3 + 2 + 8 + 9),
+    ([3, 2, 1], 9 + 3 + 1 + 4),
+    ([2], 5 + 6),
+])
+def test_get_sequence_cost(solver, sequence, expected_cost):
+    assert solver._get_sequence_cost(sequence) == expected_cost
+
+
+def test_get_sequences_costs(solver):
+    sequences = np.array([[1, 2, 3], [3, 2, 1], [2, 1, 3]])
+
+    costs = solver._get_sequences_costs(sequences)
+
+    assert costs.tolist() == [solver._get_sequence_cost(s) for s in sequences]
+
+
+@pytest.mark.parametrize('minimize_longest_route, expected_sequence, expected_cost', [
+    (False, [1, 2, 3], 3 + 2 + 8 + 9),
+    (True, [1, 2, 0, 3], 9 + 9),
+])
+def test_decode_giant_tour(solver, minimize_longest_route, expected_sequence, expected_cost):
+    solver.vehicles_count = 2
+    solver.minimize_longest_route = minimize_longest_route
+    solver.configuration = {'configuration': {}}
+    solver._split = solver._create_split()
+
+    sequence, cost = solver._decode_giant_tour([1, 2, 3])
+
+    assert sequence == expected_sequence
+    assert cost == expected_cost
+    assert solver._get_giant_tour_cost([1, 2, 3]) == expected_cost
+
+
+def test_split_routes_have_to_fit_all_destinations(solver):
+    solver.vehicles_count = 2
+    solver.sequence_len = 3
+    solver.minimize_longest_route = False
+    solver.configuration = {'configuration': {'max_route_destinations': 2}}
+    assert solver._create_split().max_route_length == 2
+
+    solver.configuration['configuration']['max_route_destinations'] = 1
+    with pytest.raises(SolverException):
+        solver._create_split()
+
+
+def test_save_results_rows_extends_header_of_existing_file(tmp_path):
+    class LegacySolver(DummySolver):
+        OUTPUT_HEADER = ['destinations_count', 'cost', 'execution_time', 'sequence']
+
+    class IterationsSolver(DummySolver):
+        OUTPUT_HEADER = [*LegacySolver.OUTPUT_HEADER, 'iterations']
+
+    output_path = tmp_path / 'results.csv'
+    LegacySolver.save_results_rows(output_path, [(4, 11, '0.1', [1, 2, 3])])
+    IterationsSolver.save_results_rows(output_path, [(4, 10, '0.2', [3, 2, 1], 500)])
+    LegacySolver.save_results_rows(output_path, [(4, 12, '0.3', [2, 1, 3])])
+
+    header, rows = load_csv_file(output_path)
+    assert header == IterationsSolver.OUTPUT_HEADER
+    assert [(row['cost'], row['iterations']) for row in rows] == [('11', None), ('10', '500'), ('12', '')]
+
+
+def test_distance_callback_returns_integer_arc_costs():
+    callback = create_distance_callback(np.array([[0, 1.4], [2.6, 0]]))
+
+    assert (callback(0, 1), callback(1, 0), callback(1, 1)) == (1, 3, 0)
+    assert all(type(callback(a, b)) is int for a in range(0, 2) for b in range(0, 2))
+
+    callback = create_distance_callback(np.array(DISTANCE_MATRIX))
+    assert [[callback(a, b) for b in range(0, 4)] for a in range(0, 4)] == DISTANCE_MATRIX
+
+
+def test_results_row_has_resource_usage_columns(solver):
+    solver.destinations_count = 4
+    solver.budget = Budget()
+    solver.cpu_time = 0.5
+    solver.peak_memory_kb = 2048
+    solver.budget.count(1000)
+
+    row = dict(zip(BaseSolver.OUTPUT_HEADER, solver.get_results_row([1, 2, 3], 20, 2.0)))
+
+    assert (row['cpu_time'], row['peak_memory_kb']) == ('0.500000', 2048)
+    assert (row['evaluations'], row['evaluations_per_second']) == (1000, '500.0')
+
+
+class AllocatingSolver(DummySolver):
+    def __init__(self, allocated_mb):
+        super(AllocatingSolver, self).__init__()
+        self.allocated_mb = allocated_mb
+        self.budget = Budget()
+        self._post_optimization = False
+
+    def _solve(self):
+        allocated = np.ones(self.allocated_mb * 1024 * 128)  # Touched, so it is resident
+        return [1, 2, 3], float(allocated[0])
+
+
+def test_runs_in_one_process_report_their_own_peak_memory():
+    big_solver, small_solver = AllocatingSolver(200), AllocatingSolver(1)
+
+    big_solver.run()
+    small_solver.run()
+
+    assert big_solver.peak_memory_kb is None or big_solver.peak_memory_kb > 200 * 1024
+    # Only the lifetime high-water mark is known on some platforms - the small run did not raise it
+    assert small_solver.peak_memory_kb is None or small_solver.peak_memory_kb < big_solver.peak_memory_kb - 100 * 1024
+
+
+def test_validated_json_is_copied_and_reloaded_when_modified(tmp_path):
+    configuration_path = tmp_path / 'configuration.json'
+    save_to_json_file(configuration_path, {'configuration': {'minimize_longest_single_route': False}})
+
+    configuration = load_validated_json(BaseSolver.CONFIGURATION_SCHEMA_PATH, configuration_path)
+    configuration['configuration']['minimize_longest_single_route'] = True
+    assert not load_validated_json(BaseSolver.CONFIGURATION_SCHEMA_PATH, configuration_path)['configuration'][
+        'minimize_longest_single_route']
+
+    save_to_json_file(configuration_path, {'configuration': {'minimize_longest_single_route': True}})
+    os.utime(configuration_path, ns=(0, 0))
+    assert load_validated_json(BaseSolver.CONFIGURATION_SCHEMA_PATH, configuration_path)['configuration'][
+        'minimize_longest_single_route']
+
+
+def test_distance_matrix_is_reloaded_when_modified(tmp_path):
+    matrix_path = tmp_path / 'matrix.pickle'
+    save_to_pickle_file(matrix_path, {'destination_addresses': ['a', 'b'], 'matrix': [[0, 1], [1, 0]]})
+    _, matrix = load_distance_matrix(matrix_path)
+    assert load_distance_matrix(matrix_path)[1] is matrix
+
+    save_to_pickle_file(matrix_path, {'destination_addresses': ['a', 'b'], 'matrix': [[0, 2], [2, 0]]})
+    os.utime(matrix_path, ns=(0, 0))
+    assert load_distance_matrix(matrix_path)[1].tolist() == [[0, 2], [2, 0]]
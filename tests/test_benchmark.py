@@ -0,0 +1,52 @@
+import numpy as np
+
+from algorithms.genetic import GeneticSolver
+from tools.benchmark import benchmark_distance_callbacks, BenchmarkSuite
+
+
+def test_benchmark_distance_callbacks():
+    distance_matrix = np.random.default_rng(1).integers(1, 1000, size=(20, 20))
+
+    results = benchmark_distance_callbacks(distance_matrix, calls_count=1000, seed=1)
+
+    assert set(results) == {'bound_method', 'flat_closure'}
+    assert all(calls_per_second > 0 for calls_per_second in results.values())
+
+
+def test_benchmark_suite_compares_with_baseline():
+    suite = BenchmarkSuite({}, repeats=5)
+    baseline = {'repeats': 5, 'cases': {
+        'solver/genetic/A': {'cost': 100, 'time_p50': 1.0, 'time_p90': 2.0, 'throughput': 1000},
+    }}
+    results = {
+        'solver/genetic/A': {'cost': 101, 'time_p50': 1.2, 'time_p90': 3.1, 'throughput': 800},
+        'kernel/route_cost/A': {'time_p50': 1.0, 'throughput': 1.0},
+    }
+
+    regressions = suite.compare(results, baseline, time_tolerance=0.5, cost_tolerance=0.0)
+    assert [regression.split(':')[0] for regression in regressions] == ['solver/genetic/A cost',
+                                                                         'solver/genetic/A time_p90',
+                                                                         'kernel/route_cost/A']
+
+    assert suite.compare(results, baseline, time_tolerance=0.1, cost_tolerance=0.01) == [
+        'solver/genetic/A time_p50: 1.2 (baseline: 1)', 'solver/genetic/A time_p90: 3.1 (baseline: 2)',
+        'solver/genetic/A throughput: 800 (baseline: 1000)', 'kernel/route_cost/A: missing in the baseline']
+    assert BenchmarkSuite({}, repeats=3).compare(results, baseline, time_tolerance=1, cost_tolerance=0) == [
+        'kernel/route_cost/A: missing in the baseline']
+
+
+def test_benchmark_suite_reports_metrics_missing_in_baseline():
+    baseline = {'repeats': 5, 'cases': {'solver/ortools/A': {'cost': 100, 'time_p50': 1.0}}}
+    results = {'solver/ortools/A': {'cost': 100, 'time_p50': 1.0, 'throughput': 10}}
+
+    assert BenchmarkSuite({}, repeats=5).compare(results, baseline, time_tolerance=0.5, cost_tolerance=0) == [
+        'solver/ortools/A throughput: 10 (missing in the baseline)']
+
+
+def test_benchmark_suite_runs_filtered_cases():
+    results = BenchmarkSuite({'genetic': GeneticSolver}, repeats=1, cases_filter='/A').run()
+
+    assert set(results) == {'solver/genetic/A', 'solver/genetic/A/vrp-3', 'kernel/route_cost/A', 'kernel/split/A',
+                            'kernel/bounded_split/A', 'operator/pmx/A', 'operator/ox/A', 'operator/cycle/A',
+                            'operator/inversion/A'}
+    assert set(results['solver/genetic/A']) == {'cost', 'time_p50', 'time_p90', 'throughput'}
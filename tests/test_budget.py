@@ -0,0 +1,59 @@
+from algorithms.budget import Budget
+
+
+def test_unlimited_budget_is_never_exhausted():
+    budget = Budget()
+    budget.count(10 ** 9)
+
+    assert not budget.is_exhausted()
+    assert budget.get_evaluations_left() is None
+    assert budget.get_block_length(4096, 64) == 4096
+
+
+def test_evaluations_limit_shortens_blocks():
+    budget = Budget(evaluations_limit=1000)
+    assert budget.get_block_length(4096, 64) == 16
+
+    budget.count(960)
+    assert budget.get_block_length(4096, 64) == 1
+    assert not budget.is_exhausted()
+
+    budget.count(64)
+    assert budget.get_block_length(4096, 64) == 0
+    assert budget.is_exhausted()
+
+
+def test_time_limit_is_checked_often_enough():
+    budget = Budget(time_limit=60)
+    assert budget.get_block_length(4096, 64) == Budget.TIME_CHECK_EVALUATIONS // 64
+    assert not budget.is_exhausted()
+
+    assert Budget(time_limit=0).get_block_length(4096) == 0
+    assert Budget(time_limit=0).is_exhausted()
+
+
+def test_trace_keeps_improvements_only():
+    budget = Budget()
+    for cost in (10, 12, 8, 8, 9, 5):
+        budget.record(cost)
+
+    assert [cost for _, cost in budget.trace] == [10, 8, 5]
+    assert [elapsed for elapsed, _ in budget.trace] == sorted(elapsed for elapsed, _ in budget.trace)
+
+    budget.start()
+    assert budget.trace == []
+
+
+def test_fork_shares_limits_and_start_but_counts_separately():
+    budget = Budget(time_limit=60, evaluations_limit=100)
+    budget.count(40)
+    budget.record(10)
+
+    fork = budget.fork()
+    fork.count(30)
+    fork.record(5)
+
+    assert (fork.evaluations, budget.evaluations) == (70, 40)
+    assert [cost for _, cost in budget.trace] == [10]
+    assert [cost for _, cost in fork.trace] == [5]
+    assert (fork.time_limit, fork.evaluations_limit) == (60, 100)
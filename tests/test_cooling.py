@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from algorithms.cooling import create_cooling_schedule, AcceptanceRatioSchedule, GeometricSchedule, \
+    LogarithmicSchedule, ReheatingSchedule, COOLING_SCHEDULES
+
+CONFIGURATION = {'iterations_count': 10000, 'temperature_factor': 100}
+
+
+@pytest.mark.parametrize('cooling_schedule', COOLING_SCHEDULES)
+def test_temperatures_are_generated_in_blocks(cooling_schedule):
+    schedule = create_cooling_schedule({**CONFIGURATION, 'cooling_schedule': cooling_schedule})
+
+    temperatures = schedule.get_temperatures(0, 1000)
+
+    assert temperatures.shape == (1000,)
+    assert (temperatures > 0).all()
+    assert (np.diff(temperatures) <= 0).all()
+    assert schedule.get_temperatures(500, 10).tolist() == pytest.approx(temperatures[500:510].tolist())
+
+
+def test_default_schedule_is_logarithmic():
+    schedule = create_cooling_schedule(CONFIGURATION)
+
+    assert isinstance(schedule, LogarithmicSchedule)
+    assert schedule.get_temperatures(0, 1)[0] == pytest.approx(100 / np.log(2))
+
+
+def test_geometric_schedule_never_reaches_zero():
+    schedule = GeometricSchedule(100, 0.5)
+
+    assert schedule.get_temperatures(0, 3).tolist() == [100, 50, 25]
+    assert schedule.get_temperatures(10 ** 6, 1)[0] > 0
+
+
+def test_reheating_schedule_starts_over_after_window_without_improvement():
+    schedule = ReheatingSchedule(100, 0.5, reheating_window=10, reheating_ratio=0.8)
+
+    schedule.update(10, last_improvement=5, accepted_count=0, worse_count=5)
+    assert schedule.get_temperatures(10, 1)[0] == pytest.approx(100 * 0.5 ** 10)
+
+    schedule.update(20, last_improvement=5, accepted_count=0, worse_count=10)
+    assert schedule.get_temperatures(20, 2).tolist() == pytest.approx([80, 40])
+
+
+def test_acceptance_ratio_schedule_follows_target_ratio():
+    schedule = AcceptanceRatioSchedule(100, iterations_count=1000, initial_ratio=0.5, final_ratio=0.05)
+    assert schedule.get_target_ratio(0) == pytest.approx(0.5)
+    assert schedule.get_target_ratio(1000) == pytest.approx(0.05)
+
+    schedule.update(100, last_improvement=0, accepted_count=90, worse_count=100)
+    assert schedule.get_temperatures(100, 1)[0] == pytest.approx(100 / schedule.ADJUSTMENT_FACTOR)
+
+    schedule.update(200, last_improvement=0, accepted_count=0, worse_count=100)
+    assert schedule.get_temperatures(200, 1)[0] == pytest.approx(100)
@@ -0,0 +1,122 @@
+import threading
+
+import numpy as np
+import pytest
+from googlemaps.exceptions import TransportError, ApiError
+
+from tools.distance_cache import DistanceCache
+from tools.distance_matrix import DistanceMatrixManager
+
+COORDINATES = [(53.0 + i * 0.01, 22.0 + (i * 7 % 5) * 0.01) for i in range(0, 23)]
+
+
+def expected_distance(origin, destination):
+    return int(round((abs(origin[0] - destination[0]) + abs(origin[1] - destination[1])) * 100_000))
+
+
+class LocalDistanceMatrixClient:
+    """
+    Stand-in for 'googlemaps.Client' computing distances locally.
+    """
+
+    def __init__(self, failures_per_request=0, error=None):
+        self.requests = []
+        self._failures_per_request = failures_per_request
+        self._error = error or TransportError('Connection reset')
+        self._attempts = {}
+        self._lock = threading.Lock()
+
+    def distance_matrix(self, origins, destinations, **kwargs):
+        assert len(origins) <= 10 and len(destinations) <= 10
+        key = (tuple(origins), tuple(destinations))
+        with self._lock:
+            self._attempts[key] = self._attempts.get(key, 0) + 1
+            if self._attempts[key] <= self._failures_per_request:
+                raise self._error
+            self.requests.append(key)
+
+        return {
+            'destination_addresses': [f'{lat}, {lng}' for lat, lng in destinations],
+            'rows': [{'elements': [{'distance': {'value': expected_distance(o, d)},
+                                    'duration': {'value': expected_distance(o, d) // 10}} for d in destinations]}
+                     for o in origins],
+        }
+
+
+@pytest.fixture
+def expected_matrix():
+    return np.array([[expected_distance(o, d) for d in COORDINATES] for o in COORDINATES])
+
+
+@pytest.mark.parametrize('coordinates_count', [1, 10, 23])
+def test_compose_distance_matrix(expected_matrix, coordinates_count):
+    client = LocalDistanceMatrixClient()
+    manager = DistanceMatrixManager(client=client, max_concurrent_requests=4)
+
+    distance_matrix, destination_addresses = manager._compose_distance_matrix(COORDINATES[:coordinates_count])
+
+    assert distance_matrix.tolist() == expected_matrix[:coordinates_count, :coordinates_count].tolist()
+    assert destination_addresses == [f'{lat}, {lng}' for lat, lng in COORDINATES[:coordinates_count]]
+    assert len(client.requests) == int(np.ceil(coordinates_count / 10)) ** 2
+
+
+def test_failed_requests_are_retried(expected_matrix):
+    manager = DistanceMatrixManager(client=LocalDistanceMatrixClient(failures_per_request=2))
+    manager.RETRY_BASE_DELAY = 0.001
+
+    distance_matrix, _ = manager._compose_distance_matrix(COORDINATES)
+
+    assert distance_matrix.tolist() == expected_matrix.tolist()
+
+
+def test_not_retriable_error_is_raised():
+    manager = DistanceMatrixManager(client=LocalDistanceMatrixClient(failures_per_request=1,
+                                                                     error=ApiError('REQUEST_DENIED')))
+    manager.RETRY_BASE_DELAY = 0.001
+
+    with pytest.raises(ApiError):
+        manager._compose_distance_matrix(COORDINATES)
+
+
+def get_requested_pairs_count(client):
+    return sum(len(origins) * len(destinations) for origins, destinations in client.requests)
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with DistanceCache(tmp_path / 'cache.db', DistanceMatrixManager.TRAVEL_MODE) as distance_cache:
+        yield distance_cache
+
+
+def test_cached_matrix_is_not_requested_again(expected_matrix, cache):
+    DistanceMatrixManager(client=LocalDistanceMatrixClient(), cache=cache)._compose_distance_matrix(COORDINATES)
+    client = LocalDistanceMatrixClient()
+
+    distance_matrix, destination_addresses = DistanceMatrixManager(client=client, cache=cache) \
+        ._compose_distance_matrix(COORDINATES)
+
+    assert client.requests == []
+    assert distance_matrix.tolist() == expected_matrix.tolist()
+    assert destination_addresses == [f'{lat}, {lng}' for lat, lng in COORDINATES]
+
+
+def test_only_added_locations_are_requested(expected_matrix, cache):
+    DistanceMatrixManager(client=LocalDistanceMatrixClient(), cache=cache)._compose_distance_matrix(COORDINATES[:20])
+    client = LocalDistanceMatrixClient()
+
+    distance_matrix, _ = DistanceMatrixManager(client=client, cache=cache)._compose_distance_matrix(COORDINATES)
+
+    assert distance_matrix.tolist() == expected_matrix.tolist()
+    assert get_requested_pairs_count(client) == 3 * 23 + 20 * 3
+
+
+def test_expired_entries_are_requested_again(tmp_path, expected_matrix):
+    with DistanceCache(tmp_path / 'cache.db', DistanceMatrixManager.TRAVEL_MODE) as cache:
+        DistanceMatrixManager(client=LocalDistanceMatrixClient(), cache=cache)._compose_distance_matrix(COORDINATES)
+    client = LocalDistanceMatrixClient()
+
+    with DistanceCache(tmp_path / 'cache.db', DistanceMatrixManager.TRAVEL_MODE, max_age=0) as cache:
+        distance_matrix, _ = DistanceMatrixManager(client=client, cache=cache)._compose_distance_matrix(COORDINATES)
+
+    assert distance_matrix.tolist() == expected_matrix.tolist()
+    assert get_requested_pairs_count(client) == 23 * 23
@@ -0,0 +1,39 @@
+import numpy as np
+
+from tools.distance_matrix_storage import DistanceMatrixConverter, save_distance_matrix, read_distance_matrix, \
+    get_sidecar_path
+from tools.file_operations import save_to_pickle_file, save_to_csv_file
+
+ADDRESSES = ['Depot', 'First', 'Second']
+MATRIX = [[0, 10, 20], [11, 0, 5], [21, 6, 0]]
+
+
+def test_save_and_read_distance_matrix(tmp_path):
+    path = tmp_path / 'matrix.npy'
+
+    save_distance_matrix(path, ADDRESSES, np.array(MATRIX, dtype=np.int32))
+    destination_addresses, matrix = read_distance_matrix(path)
+
+    assert destination_addresses == ADDRESSES
+    assert matrix.dtype == np.int32
+    assert matrix.tolist() == MATRIX
+    assert isinstance(matrix, np.memmap)
+    assert get_sidecar_path(path).exists()
+
+
+def test_convert_directory(tmp_path):
+    source = tmp_path / 'source'
+    (source / 'A').mkdir(parents=True)
+    save_to_pickle_file(source / 'A' / 'a3.pickle', {'destination_addresses': ADDRESSES, 'matrix': MATRIX})
+    save_to_csv_file(source / 'A' / 'a3.csv', ADDRESSES, MATRIX)
+    save_to_csv_file(source / 'A' / 'only_csv.csv', ADDRESSES, MATRIX)
+
+    converted = DistanceMatrixConverter().convert(source, tmp_path / 'output')
+
+    assert sorted(p.relative_to(tmp_path).as_posix() for p in converted) == ['output/A/a3.npy',
+                                                                             'output/A/only_csv.npy']
+    for path in converted:
+        destination_addresses, matrix = read_distance_matrix(path)
+        assert destination_addresses == ADDRESSES
+        assert matrix.dtype == np.int64
+        assert matrix.tolist() == MATRIX
@@ -1,18 +1,22 @@
+import numpy as np
 import pytest
 
-from ordered_set import OrderedSet
 from mock import Mock
 
+from algorithms.budget import Budget
+from algorithms.crossover import cross, pmx, ox, cycle, CROSSOVER_OPERATORS
 from algorithms.genetic import GeneticSolver
 
 SEQUENCE_LEN = 9
-SELECTED_SEQUENCES = [[1, 6, 8, 9, 7, 2, 4, 3, 5]]
+SELECTED_SEQUENCES = np.array([[1, 6, 8, 9, 7, 2, 4, 3, 5]])
 BEST_SEQUENCE_COST = 88485
 POPULATION_WITH_COSTS = [(120810, [2, 8, 6, 7, 4, 1, 5, 3, 9]), (BEST_SEQUENCE_COST, [1, 2, 6, 5, 7, 3, 9, 4, 8]),
                          (123601, [3, 2, 6, 7, 8, 1, 5, 4, 9]), (130978, [3, 8, 6, 4, 1, 9, 5, 7, 2]),
                          (129104, [9, 1, 4, 7, 5, 8, 3, 6, 2]), (118470, [3, 8, 2, 5, 9, 1, 7, 4, 6]),
                          (122043, [7, 4, 8, 5, 6, 3, 9, 1, 2]), (121635, [3, 5, 1, 4, 8, 7, 6, 9, 2]),
                          (111556, [9, 2, 3, 1, 5, 7, 8, 4, 6]), (103951, [5, 1, 6, 4, 3, 8, 2, 9, 7])]
+POPULATION = np.array([sequence for _, sequence in POPULATION_WITH_COSTS])
+COSTS = np.array([cost for cost, _ in POPULATION_WITH_COSTS])
 ELITE_SEQUENCES = [[1, 2, 6, 5, 7, 3, 9, 4, 8], [5, 1, 6, 4, 3, 8, 2, 9, 7], [9, 2, 3, 1, 5, 7, 8, 4, 6],
                    [3, 8, 2, 5, 9, 1, 7, 4, 6], [2, 8, 6, 7, 4, 1, 5, 3, 9]]
 
@@ -27,50 +31,103 @@ def genetic_solver():
     solver._population_size = 10
     solver._elite_count = 5
     solver.sequence_max_index = 8
+    solver._rng = np.random.default_rng()
+    solver._split = None
+    solver._candidate_neighbours = None
+    solver._local_search = None
+    solver.budget = Budget()
 
     return solver
 
 
 def test_select_elites(genetic_solver):
-    elites, best_cost = genetic_solver._select_elites(POPULATION_WITH_COSTS)
+    elites, best_cost = genetic_solver._select_elites(POPULATION, COSTS)
 
-    assert elites == ELITE_SEQUENCES
-    assert BEST_SEQUENCE_COST == 88485
+    assert elites.tolist() == ELITE_SEQUENCES
+    assert best_cost == BEST_SEQUENCE_COST
 
 
 def test_perform_tournament_selection(genetic_solver):
-    result = genetic_solver._perform_tournament_selection(SELECTED_SEQUENCES, POPULATION_WITH_COSTS)
+    result = genetic_solver._perform_tournament_selection(SELECTED_SEQUENCES, POPULATION, COSTS)
 
     assert len(result) == 10
-    assert result[0] == SELECTED_SEQUENCES[0]
+    assert result[0].tolist() == SELECTED_SEQUENCES[0].tolist()
 
     for sequence in result:
         assert len(sequence) == SEQUENCE_LEN
         assert len(set(sequence)) == SEQUENCE_LEN
 
 
-sequence_1a = OrderedSet([1, 2, 3, 4, 5, 6, 7, 8, 9])
-sequence_1b = OrderedSet([9, 3, 7, 8, 2, 6, 5, 1, 4])
-sequence_2a = OrderedSet([7, 9, 5, 2, 8, 6, 4, 3, 1])
-sequence_2b = OrderedSet([3, 7, 6, 9, 5, 2, 8, 4, 1])
-sequence_3a = OrderedSet([4, 3, 6, 8, 7, 9, 5, 2, 1])  # multiple repeats example
-sequence_3b = OrderedSet([9, 3, 7, 6, 5, 2, 4, 8, 1])
-
-
-@pytest.mark.parametrize('sequence_a, sequence_b, start_index, end_index, expected_result', [
+sequence_1a = [1, 2, 3, 4, 5, 6, 7, 8, 9]
+sequence_1b = [9, 3, 7, 8, 2, 6, 5, 1, 4]
+sequence_2a = [7, 9, 5, 2, 8, 6, 4, 3, 1]
+sequence_2b = [3, 7, 6, 9, 5, 2, 8, 4, 1]
+sequence_3a = [4, 3, 6, 8, 7, 9, 5, 2, 1]  # multiple repeats example
+sequence_3b = [9, 3, 7, 6, 5, 2, 4, 8, 1]
+PMX_CASES = [
     (sequence_1a, sequence_1b, 3, 7, [9, 3, 2, 4, 5, 6, 7, 1, 8]),
     (sequence_1b, sequence_1a, 3, 7, [1, 7, 3, 8, 2, 6, 5, 4, 9]),
     (sequence_2a, sequence_2b, 0, 3, [7, 9, 5, 3, 6, 2, 8, 4, 1]),
     (sequence_2b, sequence_2a, 0, 3, [3, 7, 6, 2, 8, 5, 4, 9, 1]),
     (sequence_3a, sequence_3b, 2, 5, [9, 3, 6, 8, 7, 2, 4, 5, 1]),
     (sequence_3b, sequence_3a, 2, 5, [4, 3, 7, 6, 5, 9, 8, 2, 1]),
+]
+
+
+@pytest.mark.parametrize('sequence_a, sequence_b, start_index, end_index, expected_result', PMX_CASES)
+def test_pmx(sequence_a, sequence_b, start_index, end_index, expected_result):
+    result_sequences = pmx(np.array([sequence_a]), np.array([sequence_b]),
+                           np.array([start_index]), np.array([end_index]))
+
+    assert result_sequences.tolist() == [expected_result]
+
+
+def test_pmx_batch():
+    parents_a, parents_b, starts, ends, expected_results = (np.array(c) for c in zip(*PMX_CASES))
+
+    assert pmx(parents_a, parents_b, starts, ends).tolist() == expected_results.tolist()
+
+
+@pytest.mark.parametrize('start_index, end_index, expected_result', [
+    (3, 7, [3, 8, 2, 4, 5, 6, 7, 1, 9]),
+    (0, 3, [1, 2, 3, 8, 6, 5, 4, 9, 7]),
+    (7, 9, [3, 7, 2, 6, 5, 1, 4, 8, 9]),
 ])
-def test_get_pmx_crossed_sequence(sequence_a, sequence_b, start_index, end_index, expected_result):
-    part_from_a = OrderedSet(sequence_a[start_index:end_index])
-    part_from_b = OrderedSet(sequence_b[start_index:end_index])
+def test_ox(start_index, end_index, expected_result):
+    result_sequences = ox(np.array([sequence_1a]), np.array([sequence_1b]),
+                          np.array([start_index]), np.array([end_index]))
+
+    assert result_sequences.tolist() == [expected_result]
+
+
+def test_cycle():
+    result_sequences = cycle(np.array([[1, 2, 3, 4, 5, 6, 7, 8], [1, 2, 3, 4, 5, 6, 7, 8]]),
+                             np.array([[8, 5, 2, 1, 3, 6, 4, 7], [1, 2, 3, 4, 5, 6, 7, 8]]))
+
+    assert result_sequences.tolist() == [[1, 5, 2, 4, 3, 6, 7, 8], [1, 2, 3, 4, 5, 6, 7, 8]]
+
+
+@pytest.mark.parametrize('operator', CROSSOVER_OPERATORS)
+def test_cross_returns_permutations(operator):
+    rng = np.random.default_rng(5)
+    parents_a = rng.permuted(np.tile(np.arange(1, 30), (50, 1)), axis=1)
+    parents_b = rng.permuted(np.tile(np.arange(1, 30), (50, 1)), axis=1)
+    starts = rng.integers(0, 20, size=50)
+
+    children_1, children_2 = cross(operator, parents_a, parents_b, starts, starts + 9)
+
+    for children in (children_1, children_2):
+        assert (np.sort(children, axis=1) == np.arange(1, 30)).all()
+
+
+def test_migrate_on_ring(genetic_solver):
+    genetic_solver._islands_count = 2
+    genetic_solver._migration_size = 1
+    genetic_solver._migration_topology = 'ring'
+    genetic_solver._get_sequences_costs = lambda population: population[:, 0]
+    populations = [np.array([[3, 1, 2], [1, 2, 3], [2, 3, 1]]), np.array([[2, 1, 3], [3, 2, 1], [1, 3, 2]])]
 
-    result_sequence = GeneticSolver._get_pmx_crossed_sequence(sequence_a, sequence_b,
-                                                              part_from_a, part_from_b,
-                                                              start_index, end_index)
+    result = genetic_solver._migrate(populations)
 
-    assert result_sequence == expected_result
+    assert result[0].tolist() == [[1, 3, 2], [1, 2, 3], [2, 3, 1]]
+    assert result[1].tolist() == [[2, 1, 3], [1, 2, 3], [1, 3, 2]]
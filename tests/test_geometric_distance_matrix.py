@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+from tools.distance_matrix_storage import read_distance_matrix
+from tools.file_operations import save_to_json_file, load_csv_rows
+from tools.geometric_distance_matrix import GeometricDistanceMatrixGenerator, HAVERSINE, EUCLIDEAN
+
+LOCATIONS = [{'locationId': i, 'latitude': 53.4 + (i * 7 % 11) * 0.01, 'longitude': 22.1 + (i * 5 % 13) * 0.01}
+             for i in range(0, 25)]
+
+
+@pytest.fixture
+def locations_path(tmp_path):
+    path = tmp_path / 'locations.json'
+    save_to_json_file(path, LOCATIONS)
+    return path
+
+
+@pytest.mark.parametrize('metric', [HAVERSINE, EUCLIDEAN])
+def test_create_distance_matrix(tmp_path, locations_path, metric):
+    generator = GeometricDistanceMatrixGenerator(metric, chunk_size=7)
+
+    generator.create_distance_matrix(locations_path, tmp_path / 'matrix.npy', tmp_path / 'matrix.csv')
+    destination_addresses, matrix = read_distance_matrix(tmp_path / 'matrix.npy')
+    csv_addresses, csv_rows = load_csv_rows(tmp_path / 'matrix.csv')
+
+    assert matrix.dtype == np.int32
+    assert matrix.shape == (len(LOCATIONS), len(LOCATIONS))
+    assert destination_addresses == csv_addresses == [f"{l['latitude']}, {l['longitude']}" for l in LOCATIONS]
+    assert np.array(csv_rows, dtype=np.int32).tolist() == matrix.tolist()
+    assert (np.diagonal(matrix) == 0).all()
+    assert (matrix == matrix.T).all()
+
+
+def test_chunks_do_not_change_distances():
+    latitudes = np.array([l['latitude'] for l in LOCATIONS])
+    longitudes = np.array([l['longitude'] for l in LOCATIONS])
+    single_chunk = np.empty((len(LOCATIONS), len(LOCATIONS)), dtype=np.float64)
+    many_chunks = np.empty_like(single_chunk)
+
+    GeometricDistanceMatrixGenerator(dtype=np.float64).write_distance_matrix(latitudes, longitudes, single_chunk)
+    GeometricDistanceMatrixGenerator(dtype=np.float64, chunk_size=4) \
+        .write_distance_matrix(latitudes, longitudes, many_chunks)
+
+    assert np.array_equal(single_chunk, many_chunks)
+
+
+@pytest.mark.parametrize('metric', [HAVERSINE, EUCLIDEAN])
+def test_one_degree_of_latitude(metric):
+    matrix = np.empty((2, 2), dtype=np.int64)
+
+    GeometricDistanceMatrixGenerator(metric, dtype=np.int64) \
+        .write_distance_matrix(np.array([53.0, 54.0]), np.array([22.0, 22.0]), matrix)
+
+    assert matrix.tolist() == [[0, 111195], [111195, 0]]
@@ -0,0 +1,50 @@
+import itertools
+
+import numpy as np
+import pytest
+
+from algorithms.budget import Budget
+from algorithms.held_karp import HeldKarpSolver
+
+
+def create_solver(distance_matrix, budget=None):
+    solver = HeldKarpSolver.__new__(HeldKarpSolver)
+    solver.distance_matrix = HeldKarpSolver._normalize_distance_matrix(distance_matrix)
+    solver.destinations_count = len(solver.distance_matrix)
+    solver.sequence_len = solver.destinations_count - 1
+    solver._dtype, solver._infinity = solver._get_table_dtype()
+    solver.budget = budget or Budget()
+
+    return solver
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('destinations_count', [2, 3, 6, 8])
+def test_solve_finds_optimal_sequence(seed, destinations_count):
+    distance_matrix = np.random.default_rng(seed).integers(1, 10_000, size=(destinations_count, destinations_count))
+    solver = create_solver(distance_matrix)
+
+    sequence, cost = solver._solve()
+
+    best_cost = min(solver._get_sequence_cost(p) for p in itertools.permutations(range(1, destinations_count)))
+    assert sorted(sequence) == list(range(1, destinations_count))
+    assert cost == solver._get_sequence_cost(sequence) == best_cost
+
+
+def test_float_distances_use_float_table():
+    solver = create_solver([[0, 1.5, 2.5], [1.5, 0, 1.0], [2.5, 1.0, 0]])
+
+    sequence, cost = solver._solve()
+
+    assert solver._dtype == np.float64
+    assert cost == pytest.approx(5.0)
+
+
+def test_solve_falls_back_to_nearest_neighbour_when_budget_runs_out():
+    distance_matrix = np.random.default_rng(1).integers(1, 10_000, size=(8, 8))
+    solver = create_solver(distance_matrix, Budget(evaluations_limit=100))
+
+    sequence, cost = solver._solve()
+
+    assert sequence == solver._get_nearest_neighbour_sequence()
+    assert cost == solver._get_sequence_cost(sequence)
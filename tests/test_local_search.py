@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+
+from algorithms.budget import Budget
+from algorithms.local_search import LocalSearch
+from algorithms.moves import RouteMoves
+from algorithms.neighbours import get_candidate_neighbours
+
+DESTINATIONS_COUNT = 40
+
+
+def route_cost(distance_matrix, sequence):
+    route = [0, *sequence, 0]
+    return sum(distance_matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+@pytest.fixture(params=['symmetric', 'asymmetric'])
+def distance_matrix(request):
+    rng = np.random.default_rng(11)
+    points = rng.random((DESTINATIONS_COUNT + 1, 2)) * 1000
+    matrix = np.rint(np.linalg.norm(points[:, None] - points[None, :], axis=2)).astype(np.int64)
+    if request.param == 'asymmetric':
+        matrix += rng.integers(0, 100, size=matrix.shape)
+        np.fill_diagonal(matrix, 0)
+
+    return matrix
+
+
+def test_improve(distance_matrix):
+    sequence = np.random.default_rng(3).permutation(np.arange(1, DESTINATIONS_COUNT + 1)).tolist()
+    local_search = LocalSearch(distance_matrix, get_candidate_neighbours(distance_matrix, 8))
+
+    improved_sequence, cost = local_search.improve(sequence)
+
+    assert sorted(improved_sequence) == sorted(sequence)
+    assert cost == route_cost(distance_matrix, improved_sequence)
+    assert cost < route_cost(distance_matrix, sequence)
+
+
+@pytest.mark.parametrize('seed', [0, 5, 20, 32])
+def test_improved_route_is_two_opt_optimal(distance_matrix, seed):
+    """
+    With all destinations as candidates, no reversal can improve the route - including the ones replacing arcs
+    of the depot.
+    """
+    sequence = np.random.default_rng(seed).permutation(np.arange(1, DESTINATIONS_COUNT + 1)).tolist()
+    local_search = LocalSearch(distance_matrix, get_candidate_neighbours(distance_matrix, DESTINATIONS_COUNT))
+
+    improved_sequence, _ = local_search.improve(sequence)
+    route = RouteMoves(distance_matrix, improved_sequence)
+
+    for first in range(1, DESTINATIONS_COUNT):
+        for last in range(first + 1, DESTINATIONS_COUNT + 1):
+            assert route.reversal_delta(first, last) >= 0
+
+
+def test_improve_part_of_destinations(distance_matrix):
+    local_search = LocalSearch(distance_matrix, get_candidate_neighbours(distance_matrix, 8))
+
+    improved_sequence, cost = local_search.improve([9, 3, 7, 1, 5])
+
+    assert sorted(improved_sequence) == [1, 3, 5, 7, 9]
+    assert cost == route_cost(distance_matrix, improved_sequence)
+
+
+def test_improve_stops_when_budget_runs_out(distance_matrix):
+    sequence = np.random.default_rng(3).permutation(np.arange(1, DESTINATIONS_COUNT + 1)).tolist()
+    local_search = LocalSearch(distance_matrix, get_candidate_neighbours(distance_matrix, 8))
+    unlimited_budget = Budget()
+    _, unlimited_cost = local_search.improve(sequence, unlimited_budget, record=True)
+    budget = Budget(evaluations_limit=unlimited_budget.evaluations // 4)
+
+    improved_sequence, cost = local_search.improve(sequence, budget)
+
+    assert budget.evaluations_limit <= budget.evaluations < unlimited_budget.evaluations
+    assert unlimited_cost < cost < route_cost(distance_matrix, sequence)
+    assert cost == route_cost(distance_matrix, improved_sequence)
+    assert budget.trace == []
+    assert unlimited_budget.trace[-1][1] == unlimited_cost
+    assert all(a[1] > b[1] for a, b in zip(unlimited_budget.trace, unlimited_budget.trace[1:]))
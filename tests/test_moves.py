@@ -0,0 +1,152 @@
+import numpy as np
+import pytest
+
+from algorithms.moves import BatchRouteMoves, RouteMoves, MOVE_TYPES, REVERSAL, get_neighbour_move_positions, \
+    get_distance_rows
+
+SEQUENCE = [4, 2, 7, 1, 6, 3, 5]
+
+
+def route_cost(distance_matrix, sequence):
+    route = [0, *sequence, 0]
+    return sum(distance_matrix[a][b] for a, b in zip(route, route[1:]))
+
+
+@pytest.fixture(params=['symmetric', 'asymmetric'])
+def distance_matrix(request):
+    matrix = np.random.default_rng(7).integers(1, 1000, size=(8, 8))
+    if request.param == 'symmetric':
+        matrix = matrix + matrix.T
+    np.fill_diagonal(matrix, 0)
+
+    return matrix
+
+
+@pytest.mark.parametrize('move_type', MOVE_TYPES)
+def test_delta_matches_full_route_cost(distance_matrix, move_type):
+    for position_a in range(1, len(SEQUENCE) + 1):
+        for position_b in range(1, len(SEQUENCE) + 1):
+            if position_a == position_b:
+                continue
+            route = RouteMoves(distance_matrix, SEQUENCE)
+
+            delta = route.delta(move_type, position_a, position_b)
+            route.apply(move_type, position_a, position_b, delta)
+
+            assert sorted(route.sequence) == sorted(SEQUENCE)
+            assert route.cost == route_cost(distance_matrix, route.sequence)
+
+
+def test_route_is_changed_only_by_apply(distance_matrix):
+    route = RouteMoves(distance_matrix, SEQUENCE)
+
+    for move_type in MOVE_TYPES:
+        route.delta(move_type, 2, 5)
+
+    assert route.sequence == SEQUENCE
+    assert route.cost == route_cost(distance_matrix, SEQUENCE)
+
+
+@pytest.mark.parametrize('move_type', MOVE_TYPES)
+def test_neighbour_move_makes_destinations_adjacent(distance_matrix, move_type):
+    for position in range(1, len(SEQUENCE) + 1):
+        for neighbour_position in range(1, len(SEQUENCE) + 1):
+            if position == neighbour_position:
+                continue
+            route = RouteMoves(distance_matrix, SEQUENCE)
+            node, neighbour = route.route[position], route.route[neighbour_position]
+
+            position_a, position_b = get_neighbour_move_positions(move_type, position, neighbour_position)
+            if position_a != position_b:
+                route.apply(move_type, position_a, position_b, route.delta(move_type, position_a, position_b))
+
+            assert abs(route.position(node) - route.position(neighbour)) == 1
+            assert all(route.route[route.position(n)] == n for n in SEQUENCE)
+
+
+def test_segment_move_delta_matches_full_route_cost(distance_matrix):
+    for first in range(1, len(SEQUENCE) + 1):
+        for last in range(first, min(first + 3, len(SEQUENCE) + 1)):
+            for position_after in range(0, len(SEQUENCE) + 1):
+                if first - 1 <= position_after <= last:
+                    continue
+                route = RouteMoves(distance_matrix, SEQUENCE)
+                segment = route.route[first:last + 1]
+
+                delta = route.segment_move_delta(first, last, position_after)
+                route.move_segment(first, last, position_after, delta)
+
+                assert sorted(route.sequence) == sorted(SEQUENCE)
+                assert route.cost == route_cost(distance_matrix, route.sequence)
+                assert segment == route.route[route.position(segment[0]):route.position(segment[-1]) + 1]
+                assert all(route.route[route.position(n)] == n for n in SEQUENCE)
+
+
+def test_reversal_delta_is_exact_after_many_moves(distance_matrix):
+    rng = np.random.default_rng(3)
+    route = RouteMoves(distance_matrix, SEQUENCE)
+
+    for _ in range(0, 200):
+        position_a, position_b = (rng.choice(len(SEQUENCE), size=2, replace=False) + 1).tolist()
+        if rng.random() < 0.2 and position_b - 1 > position_a:
+            route.move_segment(position_a, position_a, position_b, route.segment_move_delta(position_a, position_a,
+                                                                                            position_b))
+        else:
+            move_type = MOVE_TYPES[rng.integers(0, len(MOVE_TYPES))]
+            route.apply(move_type, position_a, position_b, route.delta(move_type, position_a, position_b))
+
+        reversed_route = RouteMoves(distance_matrix, route.sequence)
+        reversed_route.apply(REVERSAL, position_a, position_b, route.reversal_delta(position_a, position_b))
+        assert reversed_route.cost == route_cost(distance_matrix, reversed_route.sequence)
+        assert route.cost == route_cost(distance_matrix, route.sequence)
+
+
+def test_distance_rows_share_the_matrix(distance_matrix):
+    rows = get_distance_rows(distance_matrix)
+
+    assert all(np.shares_memory(np.asarray(row), distance_matrix) for row in rows)
+    assert [[rows[a][b] for b in range(0, 8)] for a in range(0, 8)] == distance_matrix.tolist()
+    assert type(rows[1][2]) is int
+
+
+@pytest.mark.parametrize('move_type', MOVE_TYPES)
+def test_batch_moves_match_single_route_moves(distance_matrix, move_type):
+    rng = np.random.default_rng(3)
+    sequences = np.array([rng.permutation(SEQUENCE) for _ in range(6)])
+    batch = BatchRouteMoves(distance_matrix, sequences)
+    routes = [RouteMoves(distance_matrix, sequence.tolist()) for sequence in sequences]
+
+    for _ in range(20):
+        positions_a = rng.integers(1, len(SEQUENCE) + 1, size=len(routes))
+        positions_b = (positions_a + rng.integers(0, len(SEQUENCE) - 1, size=len(routes))) % len(SEQUENCE) + 1
+        accepted = rng.random(len(routes)) < 0.5
+
+        deltas = batch.deltas(move_type, positions_a, positions_b)
+        batch.apply(move_type, positions_a, positions_b, deltas, accepted)
+        for row, route in enumerate(routes):
+            delta = route.delta(move_type, positions_a[row].item(), positions_b[row].item())
+            assert deltas[row] == delta
+            if accepted[row]:
+                route.apply(move_type, positions_a[row].item(), positions_b[row].item(), delta)
+
+    assert batch.sequences.tolist() == [route.sequence for route in routes]
+    assert batch.costs.tolist() == [route.cost for route in routes]
+    assert all(batch.positions[row, route.route[1:-1]].tolist() == list(range(1, len(SEQUENCE) + 1))
+               for row, route in enumerate(routes))
+
+
+@pytest.mark.parametrize('dtype, high', [(np.int32, 2 ** 30), (np.float32, 1000)])
+def test_batch_moves_accumulate_in_wide_dtype(dtype, high):
+    rng = np.random.default_rng(5)
+    distance_matrix = rng.uniform(1, high, size=(8, 8)).astype(dtype)
+    sequences = np.array([rng.permutation(SEQUENCE) for _ in range(4)])
+    batch = BatchRouteMoves(distance_matrix, sequences)
+
+    for _ in range(0, 2000):
+        positions_a = rng.integers(1, len(SEQUENCE) + 1, size=len(sequences))
+        positions_b = (positions_a + rng.integers(0, len(SEQUENCE) - 1, size=len(sequences))) % len(SEQUENCE) + 1
+        deltas = batch.deltas(REVERSAL, positions_a, positions_b)
+        batch.apply(REVERSAL, positions_a, positions_b, deltas, np.ones(len(sequences), dtype=bool))
+
+    expected_costs = [route_cost(distance_matrix.astype(np.float64), sequence) for sequence in batch.sequences]
+    assert batch.costs == pytest.approx(expected_costs, rel=1e-12)
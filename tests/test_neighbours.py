@@ -0,0 +1,38 @@
+import os
+
+import numpy as np
+
+from algorithms.neighbours import get_candidate_neighbours, load_candidate_neighbours, \
+    get_candidate_neighbours_path
+from tools.file_operations import save_to_pickle_file
+
+DISTANCE_MATRIX = np.random.default_rng(5).permutation(100).reshape(10, 10)
+
+
+def test_get_candidate_neighbours():
+    candidates = get_candidate_neighbours(DISTANCE_MATRIX, 3)
+
+    assert candidates.shape == (10, 3)
+    assert candidates.dtype == np.uint8
+    for node, node_candidates in enumerate(candidates.tolist()):
+        others = [n for n in range(1, 10) if n != node]
+        assert node_candidates == sorted(others, key=lambda n: DISTANCE_MATRIX[node, n])[:3]
+
+
+def test_neighbours_count_is_limited_by_destinations():
+    assert get_candidate_neighbours(DISTANCE_MATRIX, 20).shape == (10, 8)
+
+
+def test_candidates_are_cached_next_to_matrix(tmp_path):
+    matrix_path = tmp_path / 'matrix.pickle'
+    save_to_pickle_file(matrix_path, {})
+    cache_path = get_candidate_neighbours_path(matrix_path, 4)
+
+    candidates = load_candidate_neighbours(matrix_path, DISTANCE_MATRIX, 4)
+    cached_candidates = load_candidate_neighbours(matrix_path, np.zeros((10, 10)), 4)
+    os.utime(matrix_path, (cache_path.stat().st_mtime + 10, ) * 2)
+    rebuilt_candidates = load_candidate_neighbours(matrix_path, DISTANCE_MATRIX[::-1, ::-1], 4)
+
+    assert cache_path.name == 'matrix.knn4.npy'
+    assert cached_candidates.tolist() == candidates.tolist()
+    assert rebuilt_candidates.tolist() == get_candidate_neighbours(DISTANCE_MATRIX[::-1, ::-1], 4).tolist()
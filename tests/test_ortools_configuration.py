@@ -0,0 +1,84 @@
+from time import monotonic
+
+import pytest
+
+from algorithms.base import BaseSolver, SolverException
+from algorithms.budget import Budget
+from algorithms.ortools_configuration import OrtoolsConfiguration, load_best_sequence, get_initial_routes
+from tools.file_operations import load_from_json_file, save_to_csv_file
+from tools.results_store import ResultsStore
+
+HEADER = ['destinations_count', 'cost', 'execution_time', 'sequence']
+
+
+def test_search_parameters_are_set_by_ortools_enum_names():
+    conf = OrtoolsConfiguration({'first_solution_strategy': 'parallel_cheapest_insertion',
+                                 'local_search_metaheuristic': 'guided_local_search', 'solution_limit': 100})
+
+    assert conf.get_search_parameters(Budget()) == {'first_solution_strategy': 'PARALLEL_CHEAPEST_INSERTION',
+                                                    'local_search_metaheuristic': 'GUIDED_LOCAL_SEARCH',
+                                                    'solution_limit': 100}
+    assert OrtoolsConfiguration({}).get_search_parameters(Budget()) == {}
+
+
+def test_every_configured_enum_value_is_mapped():
+    schema = load_from_json_file(BaseSolver.CONFIGURATION_SCHEMA_PATH)['properties']['ortools']['properties']
+
+    for parameter in OrtoolsConfiguration.ENUM_PARAMETERS:
+        for value in schema[parameter]['enum']:
+            parameters = OrtoolsConfiguration({parameter: value}).get_search_parameters(Budget())
+            assert parameters == {parameter: value.upper()}
+
+
+@pytest.mark.parametrize('time_limit_ms, time_limit, elapsed, expected_time_limit_ms', [
+    (None, None, 0, None),
+    (3000, None, 0, 3000),
+    (None, 10, 4, 6000),
+    (3000, 10, 4, 3000),
+    (30000, 10, 4, 6000),
+    (3000, 10, 12, 1),
+])
+def test_time_limit_is_clamped_to_the_budget_left(time_limit_ms, time_limit, elapsed, expected_time_limit_ms):
+    budget = Budget(time_limit)
+    budget._start = monotonic() - elapsed
+    conf = OrtoolsConfiguration({} if time_limit_ms is None else {'time_limit_ms': time_limit_ms})
+
+    time_limit_ms = conf.get_search_parameters(budget).get('time_limit_ms')
+
+    if expected_time_limit_ms in (None, 1):
+        assert time_limit_ms == expected_time_limit_ms
+    else:
+        assert expected_time_limit_ms - 100 < time_limit_ms <= expected_time_limit_ms
+
+
+def test_load_best_sequence_of_results_file(tmp_path):
+    results_path = tmp_path / 'results.csv'
+    save_to_csv_file(results_path, HEADER, [(4, 11, '0.1', '[1, 2, 3]'), (4, 9, '0.1', '(3, 1, 2)'),
+                                            (5, 5, '0.1', '[1, 2, 3, 4]'), (4, 10, '0.1', '[2, 1, 3]')])
+
+    assert load_best_sequence(results_path, 4) == [3, 1, 2]
+    with pytest.raises(SolverException):
+        load_best_sequence(results_path, 6)
+
+
+def test_load_best_sequence_of_results_store(tmp_path):
+    results_path = tmp_path / 'results.db'
+    with ResultsStore(results_path) as store:
+        store.insert_many('scan_all', 'A', 'tsp', HEADER, [(4, 11, '0.1', '(1, 2, 3)'), (4, 9, '0.1', '(3, 1, 2)')])
+
+    assert load_best_sequence(results_path, 4) == [3, 1, 2]
+
+
+def test_initial_routes_of_giant_tour():
+    assert get_initial_routes([3, 1, 0, 2, 0, 4], 5, 4) == [[3, 1], [2], [4], []]
+    assert get_initial_routes([0, 3, 1, 0, 0, 2, 4], 5, 2) == [[3, 1], [2, 4]]
+
+
+@pytest.mark.parametrize('sequence, vehicles_count', [
+    ([3, 1, 2], 1),
+    ([3, 1, 2, 4, 4], 1),
+    ([3, 0, 1, 0, 2, 4], 2),
+])
+def test_initial_routes_of_invalid_giant_tour(sequence, vehicles_count):
+    with pytest.raises(SolverException):
+        get_initial_routes(sequence, 5, vehicles_count)
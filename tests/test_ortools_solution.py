@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+
+pytest.importorskip('ortools')
+
+from ortools.constraint_solver import routing_enums_pb2
+
+from algorithms.base import BaseSolver
+from algorithms.ortools_configuration import OrtoolsConfiguration
+from algorithms.ortools_solution import OrtoolsSolver
+from tools.file_operations import load_from_json_file, save_to_csv_file, save_to_pickle_file
+
+DISTANCE_MATRIX = np.random.default_rng(7).integers(1, 100, size=(8, 8))
+np.fill_diagonal(DISTANCE_MATRIX, 0)
+
+
+@pytest.fixture
+def create_solver(tmp_path):
+    distance_matrix_path = tmp_path / 'matrix.pickle'
+    save_to_pickle_file(distance_matrix_path, {
+        'destination_addresses': [f'address {i}' for i in range(0, len(DISTANCE_MATRIX))],
+        'matrix': DISTANCE_MATRIX.tolist(),
+    })
+    vehicles_path = tmp_path / 'vehicles.json'
+    vehicles_path.write_text(json.dumps([{'vehicleId': 1}, {'vehicleId': 2}]))
+
+    def create(ortools_configuration: dict) -> OrtoolsSolver:
+        configuration_path = tmp_path / f'configuration-{len(list(tmp_path.glob("configuration-*")))}.json'
+        configuration_path.write_text(json.dumps({
+            'configuration': {'minimize_longest_single_route': False},
+            'ortools': ortools_configuration,
+        }))
+        return OrtoolsSolver(str(distance_matrix_path), str(configuration_path), str(vehicles_path), None, seed=1)
+
+    return create
+
+
+def get_giant_tour_cost(sequence):
+    route = [0, *sequence, 0]
+    return sum(DISTANCE_MATRIX[a, b] for a, b in zip(route, route[1:]))
+
+
+def test_search_parameters_are_built_by_the_solver(create_solver):
+    solver = create_solver({'first_solution_strategy': 'savings', 'local_search_metaheuristic': 'guided_local_search',
+                            'time_limit_ms': 500, 'solution_limit': 10})
+
+    search_parameters = solver._create_search_parameters()
+
+    assert search_parameters.first_solution_strategy == routing_enums_pb2.FirstSolutionStrategy.SAVINGS
+    assert search_parameters.local_search_metaheuristic == \
+        routing_enums_pb2.LocalSearchMetaheuristic.GUIDED_LOCAL_SEARCH
+    assert search_parameters.time_limit.ToMilliseconds() == 500
+    assert search_parameters.solution_limit == 10
+
+
+@pytest.mark.parametrize('parameter', ['first_solution_strategy', 'local_search_metaheuristic'])
+def test_every_configured_enum_value_is_an_ortools_one(create_solver, parameter):
+    schema = load_from_json_file(BaseSolver.CONFIGURATION_SCHEMA_PATH)['properties']['ortools']['properties']
+    enum = getattr(routing_enums_pb2, OrtoolsConfiguration.ENUM_PARAMETERS[parameter])
+
+    for value in schema[parameter]['enum']:
+        search_parameters = create_solver({parameter: value})._create_search_parameters()
+        assert getattr(search_parameters, parameter) == getattr(enum, value.upper())
+
+
+def test_warm_start_from_results_file(create_solver, tmp_path):
+    results_path = tmp_path / 'results.csv'
+    warm_start_sequence = [3, 1, 0, 2, 7, 4, 6, 5]
+    save_to_csv_file(results_path, ['destinations_count', 'cost', 'execution_time', 'sequence'],
+                     [(8, get_giant_tour_cost(warm_start_sequence), '0.1', warm_start_sequence)])
+    solver = create_solver({'warm_start_results_path': str(results_path), 'solution_limit': 5})
+
+    sequence, cost, _ = solver.run()
+
+    assert sorted(node for node in sequence if node) == list(range(1, 8))
+    assert cost == get_giant_tour_cost(sequence) <= get_giant_tour_cost(warm_start_sequence)
+
+
+def test_warm_start_from_solver(create_solver):
+    solver = create_solver({'warm_start_solver': 'local_search',
+                            'local_search_metaheuristic': 'guided_local_search', 'solution_limit': 20})
+
+    initial_sequence = solver._get_initial_sequence()
+    sequence, cost, _ = solver.run()
+
+    assert sorted(node for node in initial_sequence if node) == list(range(1, 8))
+    assert sorted(node for node in sequence if node) == list(range(1, 8))
+    assert cost == get_giant_tour_cost(sequence)
@@ -0,0 +1,41 @@
+import pytest
+
+from algorithms.profiler import Profiler, NULL_PROFILER
+
+
+def test_profiler_accumulates_chained_phases():
+    profiler = Profiler()
+    for _ in range(0, 3):
+        start = profiler.start()
+        start = profiler.stop('first', start)
+        profiler.stop('second', start)
+        profiler.count('generations')
+    profiler.count('evaluations', 10)
+
+    report = profiler.get_report()
+    assert {phase: stats['calls'] for phase, stats in report['phases'].items()} == {'first': 3, 'second': 3}
+    assert sum(stats['share'] for stats in report['phases'].values()) == pytest.approx(1.0)
+    assert report['counters'] == {'generations': 3, 'evaluations': 10}
+
+
+def test_profiler_merges_worker_profilers():
+    profiler, worker_profiler = Profiler(), Profiler()
+    profiler.stop('evaluation', profiler.start())
+    worker_profiler.stop('evaluation', worker_profiler.start())
+    worker_profiler.count('generations', 5)
+
+    profiler.merge(worker_profiler)
+    NULL_PROFILER.merge(worker_profiler)
+
+    assert profiler.calls['evaluation'] == 2
+    assert profiler.counters['generations'] == 5
+    assert NULL_PROFILER.get_report() == {'phases': {}, 'counters': {}}
+
+
+def test_null_profiler_records_nothing():
+    start = NULL_PROFILER.start()
+    NULL_PROFILER.stop('evaluation', start)
+    NULL_PROFILER.count('generations')
+
+    assert not NULL_PROFILER.enabled
+    assert NULL_PROFILER.get_report() == {'phases': {}, 'counters': {}}
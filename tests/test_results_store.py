@@ -0,0 +1,109 @@
+import pytest
+
+from algorithms.base import BaseSolver
+from tools.charts.base import BaseChart
+from tools.charts.types import GeneticDrawableStats, StatisticType
+from tools.file_operations import save_to_csv_file
+from tools.results_store import ResultsStore, load_results
+
+HEADER = ['destinations_count', 'cost', 'execution_time', 'sequence']
+
+
+class IterationsSolver(BaseSolver):
+    ALGORITHM = 'iterations'
+    OUTPUT_HEADER = [*BaseSolver.OUTPUT_HEADER, 'iterations']
+
+    def _solve(self):
+        pass
+
+
+def test_load_filters_by_labels(tmp_path):
+    with ResultsStore(tmp_path / 'results.db') as store:
+        store.insert_many('genetic', 'A', 'tsp', HEADER, [(4, 11, '0.1', [1, 2, 3]), (5, 12, '0.2', [1, 2, 3, 4])])
+        store.insert_many('genetic', 'B', 'tsp', HEADER, [(4, 13, '0.3', [3, 2, 1])])
+        store.insert_many('ortools', 'A', 'tsp', HEADER, [(4, 14, '0.4', '[2, 1, 3]'), (4, 15, '0.5', '(3, 1, 2)')])
+
+        _, rows = store.load(algorithm='genetic', dataset='A')
+        columns, costs = store.load(['destinations_count', 'cost'], dataset='A')
+        _, sequences = store.load(['sequence'], algorithm='ortools')
+
+    assert [(row['destinations_count'], row['cost'], row['execution_time'], row['sequence']) for row in rows] == \
+        [(4, 11, 0.1, '[1, 2, 3]'), (5, 12, 0.2, '[1, 2, 3, 4]')]
+    assert columns == ['destinations_count', 'cost']
+    assert costs == [{'destinations_count': 4, 'cost': 11}, {'destinations_count': 5, 'cost': 12},
+                     {'destinations_count': 4, 'cost': 14}, {'destinations_count': 4, 'cost': 15}]
+    assert [row['sequence'] for row in sequences] == ['[2, 1, 3]', '[3, 1, 2]']
+
+
+def test_save_results_rows_to_store_adds_solver_columns(tmp_path):
+    output_path = tmp_path / 'results.db'
+    IterationsSolver.save_results_rows(output_path, [(4, 10, '0.2', [3, 2, 1], '0.1', '', 800, '', 500)], 'A', 'sa')
+
+    _, rows = load_results(output_path, algorithm='iterations', dataset='A')
+
+    assert len(rows) == 1
+    assert rows[0]['experiment'] == 'sa'
+    assert (rows[0]['peak_memory_kb'], rows[0]['evaluations'], rows[0]['iterations']) == (None, 800, 500)
+
+
+def test_import_csv_tree_replaces_rows_imported_before(tmp_path):
+    root = tmp_path / 'results'
+    (root / 'A' / 'genetic' / 'long').mkdir(parents=True)
+    save_to_csv_file(root / 'A' / 'genetic' / 'tsp.csv', HEADER, [(4, 11, '0.1', [1, 2, 3])])
+    save_to_csv_file(root / 'A' / 'genetic' / 'long' / 'tsp-I.csv', HEADER,
+                     [(4, 10, '0.2', [3, 2, 1]), (5, 12, '0.3', [1, 2, 3, 4])])
+    save_to_csv_file(root / 'default.csv', HEADER, [(4, 9, '0.1', [1, 2, 3])])
+
+    with ResultsStore(tmp_path / 'results.db') as store:
+        store.import_csv_tree(root)
+        imported = store.import_csv_tree(root)
+        _, rows = store.load(['algorithm', 'dataset', 'experiment', 'cost'])
+
+    assert sorted(imported.values()) == [1, 2]
+    assert rows == [{'algorithm': 'genetic', 'dataset': 'A', 'experiment': 'long/tsp-I', 'cost': 10},
+                    {'algorithm': 'genetic', 'dataset': 'A', 'experiment': 'long/tsp-I', 'cost': 12},
+                    {'algorithm': 'genetic', 'dataset': 'A', 'experiment': 'tsp', 'cost': 11}]
+
+
+@pytest.mark.parametrize('column', ['cost per route', 'cost; DROP TABLE results', 'Cost', '"cost"'])
+def test_import_rejects_invalid_column_names(tmp_path, column):
+    root = tmp_path / 'results'
+    (root / 'A' / 'genetic').mkdir(parents=True)
+    save_to_csv_file(root / 'A' / 'genetic' / 'tsp.csv', [*HEADER, column], [(4, 11, '0.1', [1, 2, 3], 1)])
+
+    with ResultsStore(tmp_path / 'results.db') as store:
+        with pytest.raises(ValueError):
+            store.import_csv_tree(root)
+        assert store.get_columns()[-1] == 'evaluations_per_second'
+
+
+def test_columns_named_like_sql_keywords_are_quoted(tmp_path):
+    with ResultsStore(tmp_path / 'results.db') as store:
+        store.insert_many('genetic', 'A', 'tsp', [*HEADER, 'order'], [(4, 11, '0.1', [1, 2, 3], 2)])
+        _, rows = store.load(['cost', 'order'])
+
+    assert rows == [{'cost': 11, 'order': 2}]
+
+
+def test_load_results_reads_csv_files(tmp_path):
+    output_path = tmp_path / 'results.csv'
+    save_to_csv_file(output_path, HEADER, [(4, 11, '0.1', [1, 2, 3])])
+
+    header, rows = load_results(output_path, algorithm='genetic')
+
+    assert header == HEADER
+    assert rows[0]['cost'] == '11'
+
+
+def test_charts_load_experiments_of_a_store_separately(tmp_path):
+    output_path = tmp_path / 'results.db'
+    with ResultsStore(output_path) as store:
+        store.insert_many('genetic', 'A', 'tsp', HEADER, [(4, 11, '0.1', [1, 2, 3]), (4, 13, '0.1', [3, 2, 1])])
+        store.insert_many('genetic', 'A', 'long/tsp-I', HEADER, [(4, 20, '0.2', [2, 1, 3])])
+    chart = BaseChart(StatisticType.COSTS.value, 'Costs')
+
+    costs = {e: [row['cost'] for row in chart._load_results(GeneticDrawableStats(output_path, 'A', e))]
+             for e in ('tsp', 'long/tsp-I')}
+
+    assert costs == {'tsp': [11, 13], 'long/tsp-I': [20]}
+    assert len(chart._load_results(GeneticDrawableStats(output_path, 'A'))) == 3
@@ -0,0 +1,42 @@
+import numpy as np
+import pytest
+
+from algorithms.budget import Budget
+from algorithms.scan_all import ScanAllSolver, BRANCH_AND_BOUND, PERMUTATIONS
+
+
+def create_solver(distance_matrix, search, budget=None):
+    solver = ScanAllSolver.__new__(ScanAllSolver)
+    solver.distance_matrix = ScanAllSolver._normalize_distance_matrix(distance_matrix)
+    solver.destinations_count = len(solver.distance_matrix)
+    solver.sequence_len = solver.destinations_count - 1
+    solver._search = search
+    solver._workers_count = 2
+    solver._prefix_length = min(2, solver.sequence_len)
+    solver.budget = budget or Budget()
+
+    return solver
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+@pytest.mark.parametrize('destinations_count', [2, 3, 8])
+def test_branch_and_bound_finds_optimal_cost(seed, destinations_count):
+    distance_matrix = np.random.default_rng(seed).integers(1, 10_000, size=(destinations_count, destinations_count))
+
+    sequence, cost = create_solver(distance_matrix, BRANCH_AND_BOUND)._solve()
+    _, expected_cost = create_solver(distance_matrix, PERMUTATIONS)._solve()
+
+    assert sorted(sequence) == list(range(1, destinations_count))
+    assert cost == expected_cost
+
+
+def test_permutations_stop_when_budget_runs_out():
+    distance_matrix = np.random.default_rng(1).integers(1, 10_000, size=(8, 8))
+    solver = create_solver(distance_matrix, PERMUTATIONS, Budget(evaluations_limit=100))
+
+    sequence, cost = solver._solve()
+
+    assert solver.budget.evaluations == 100
+    assert sorted(sequence) == list(range(1, 8))
+    assert cost == solver._get_sequence_cost(sequence)
+    assert solver.budget.trace[-1][1] == cost
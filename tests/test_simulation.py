@@ -0,0 +1,89 @@
+import json
+
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from algorithms.simulated_annealing import SimulatedAnnealingSolver
+from tools.file_operations import save_to_pickle_file, load_csv_file
+from tools.shared_matrix import SharedDistanceMatrix
+from tools.simulation import Simulation
+
+CONFIGURATION = {
+    'configuration': {'minimize_longest_single_route': False},
+    'simulated_annealing': {'iterations_count': 200, 'temperature_factor': 100},
+}
+
+
+@pytest.fixture
+def simulation_inputs(tmp_path):
+    distance_matrix_path = tmp_path / 'matrix.pickle'
+    save_to_pickle_file(distance_matrix_path, {
+        'destination_addresses': [f'address {i}' for i in range(0, 6)],
+        'matrix': [[abs(i - j) * 10 + (i * j) % 7 for j in range(0, 6)] for i in range(0, 6)],
+    })
+    configuration_path = tmp_path / 'configuration.json'
+    configuration_path.write_text(json.dumps(CONFIGURATION))
+    vehicles_path = tmp_path / 'vehicles.json'
+    vehicles_path.write_text(json.dumps([{'vehicleId': 1}]))
+
+    return str(distance_matrix_path), str(configuration_path), str(vehicles_path)
+
+
+@pytest.mark.parametrize('workers_count', [1, 2])
+def test_simulation_saves_all_runs_and_is_reproducible(simulation_inputs, tmp_path, workers_count):
+    output_paths = [tmp_path / 'first.csv', tmp_path / 'second.csv']
+    for output_path in output_paths:
+        Simulation(SimulatedAnnealingSolver, *simulation_inputs, str(output_path), workers_count, seed=3).run(8)
+
+    _, first_rows = load_csv_file(output_paths[0])
+    _, second_rows = load_csv_file(output_paths[1])
+    assert len(first_rows) == 8
+    assert [r['sequence'] for r in first_rows] == [r['sequence'] for r in second_rows]
+
+
+def test_simulation_respects_budget_and_saves_traces(simulation_inputs, tmp_path):
+    distance_matrix_path, _, vehicles_path = simulation_inputs
+    configuration_path = tmp_path / 'budget.json'
+    configuration_path.write_text(json.dumps({
+        **CONFIGURATION,
+        'configuration': {'minimize_longest_single_route': False, 'evaluations_limit': 50, 'convergence_trace': True},
+    }))
+    output_path = tmp_path / 'results.csv'
+
+    Simulation(SimulatedAnnealingSolver, distance_matrix_path, str(configuration_path), vehicles_path,
+               str(output_path), 1, seed=3).run(4)
+
+    _, rows = load_csv_file(output_path)
+    trace_path = SimulatedAnnealingSolver.get_trace_path(output_path)
+    traces = [json.loads(line) for line in trace_path.read_text().splitlines()]
+    assert [row['iterations'] for row in rows] == ['50'] * 4
+    assert [trace['evaluations'] for trace in traces] == [50] * 4
+    assert [float(row['cost']) for row in rows] == [trace['trace'][-1][1] for trace in traces]
+
+
+def test_shared_distance_matrix_is_removed_on_close():
+    matrix = np.arange(16).reshape(4, 4)
+
+    with SharedDistanceMatrix(['a', 'b', 'c', 'd'], matrix) as shared_matrix:
+        attached = shared_matrix.attach()
+        assert (attached == matrix).all()
+        assert not attached.flags.writeable
+
+    assert not Path(shared_matrix.path).exists()
+
+
+def test_shared_distance_matrix_attaches_to_npy_file_without_copying(tmp_path):
+    npy_path = tmp_path / 'matrix.npy'
+    np.save(npy_path, np.arange(16, dtype=np.float32).reshape(4, 4))
+    matrix = np.ascontiguousarray(np.load(npy_path, mmap_mode='r'))
+
+    with SharedDistanceMatrix(['a', 'b', 'c', 'd'], matrix) as shared_matrix:
+        assert shared_matrix.path == str(npy_path)
+        assert (shared_matrix.attach() == matrix).all()
+    assert npy_path.exists()
+
+    with SharedDistanceMatrix(['a', 'b'], matrix[:2, :2]) as shared_matrix:
+        assert shared_matrix.path != str(npy_path)
+        assert (shared_matrix.attach() == matrix[:2, :2]).all()
@@ -0,0 +1,122 @@
+from itertools import combinations
+
+import numpy as np
+import pytest
+
+from algorithms.split import GiantTourSplit, GiantTourMoves
+from algorithms.moves import MOVE_TYPES, move_route
+
+DISTANCE_MATRIX = np.random.default_rng(3).integers(1, 100, size=(8, 8))
+np.fill_diagonal(DISTANCE_MATRIX, 0)
+
+
+def get_route_cost(route):
+    padded_route = [0, *route, 0]
+    return sum(DISTANCE_MATRIX[a, b] for a, b in zip(padded_route, padded_route[1:]))
+
+
+def get_best_split_cost(sequence, vehicles_count, minimize_longest_route, max_route_length=None):
+    """
+    Checks all ways to cut the sequence into at most 'vehicles_count' routes.
+    """
+    best_cost = np.inf
+    for cuts_count in range(0, min(vehicles_count, len(sequence))):
+        for cuts in combinations(range(1, len(sequence)), cuts_count):
+            bounds = [0, *cuts, len(sequence)]
+            if max_route_length and max(end - start for start, end in zip(bounds, bounds[1:])) > max_route_length:
+                continue
+            costs = [get_route_cost(sequence[start:end]) for start, end in zip(bounds, bounds[1:])]
+            best_cost = min(best_cost, max(costs) if minimize_longest_route else sum(costs))
+
+    return best_cost
+
+
+@pytest.mark.parametrize('vehicles_count', [1, 2, 3])
+@pytest.mark.parametrize('minimize_longest_route', [False, True])
+def test_split(vehicles_count, minimize_longest_route):
+    rng = np.random.default_rng(vehicles_count)
+    sequences = np.array([rng.permutation(np.arange(1, 8)) for _ in range(0, 20)])
+    split = GiantTourSplit(DISTANCE_MATRIX, vehicles_count, minimize_longest_route)
+    split.MAX_CHUNK_ELEMENTS = 100
+
+    costs = split.get_costs(sequences)
+
+    for sequence, cost in zip(sequences.tolist(), costs.tolist()):
+        expected_cost = get_best_split_cost(sequence, vehicles_count, minimize_longest_route)
+        routes = split.split(sequence)
+        routes_costs = [get_route_cost(route) for route in routes]
+
+        assert cost == expected_cost
+        assert 1 <= len(routes) <= vehicles_count
+        assert [node for route in routes for node in route] == sequence
+        assert (max(routes_costs) if minimize_longest_route else sum(routes_costs)) == expected_cost
+
+
+@pytest.mark.parametrize('vehicles_count, max_route_length', [(2, 4), (3, 3), (3, 5), (2, 7)])
+@pytest.mark.parametrize('minimize_longest_route', [False, True])
+def test_split_with_max_route_length(vehicles_count, max_route_length, minimize_longest_route):
+    rng = np.random.default_rng(max_route_length)
+    sequences = np.array([rng.permutation(np.arange(1, 8)) for _ in range(0, 20)])
+    split = GiantTourSplit(DISTANCE_MATRIX, vehicles_count, minimize_longest_route, max_route_length)
+
+    costs = split.get_costs(sequences)
+
+    for sequence, cost in zip(sequences.tolist(), costs.tolist()):
+        expected_cost = get_best_split_cost(sequence, vehicles_count, minimize_longest_route, max_route_length)
+        routes = split.split(sequence)
+        routes_costs = [get_route_cost(route) for route in routes]
+
+        assert cost == expected_cost
+        assert max(len(route) for route in routes) <= max_route_length
+        assert [node for route in routes for node in route] == sequence
+        assert (max(routes_costs) if minimize_longest_route else sum(routes_costs)) == expected_cost
+
+
+def test_single_vehicle_cost_is_route_cost():
+    sequence = [3, 1, 7, 5, 2, 6, 4]
+
+    cost = GiantTourSplit(DISTANCE_MATRIX, 1, True).get_costs(np.array([sequence]))[0]
+
+    assert cost == get_route_cost(sequence)
+
+
+def get_fixed_split_cost(tour, minimize_longest_route):
+    """
+    :param tour: Routes separated by the depot.
+    """
+    routes = [[]]
+    for node in tour:
+        if node == 0:
+            routes.append([])
+        else:
+            routes[-1].append(node)
+    costs = [get_route_cost(route) for route in routes]
+    return max(costs) if minimize_longest_route else sum(costs)
+
+
+@pytest.mark.parametrize('vehicles_count', [2, 3])
+@pytest.mark.parametrize('minimize_longest_route', [False, True])
+def test_giant_tour_moves_are_priced_against_the_split(vehicles_count, minimize_longest_route):
+    rng = np.random.default_rng(vehicles_count)
+    split = GiantTourSplit(DISTANCE_MATRIX, vehicles_count, minimize_longest_route)
+    moves = GiantTourMoves(split, [3, 1, 7, 5, 2, 6, 4])
+    assert moves.cost == get_best_split_cost(moves.sequence, vehicles_count, minimize_longest_route)
+
+    for _ in range(0, 300):
+        move_type = MOVE_TYPES[rng.integers(0, len(MOVE_TYPES))]
+        position_a, position_b = rng.choice(np.arange(1, 8), size=2, replace=False).tolist()
+        cost = moves.cost + moves.delta(move_type, position_a, position_b)
+        expected_sequence = moves.route.copy()
+        move_route(expected_sequence, move_type, position_a, position_b)
+
+        moves.apply(move_type, position_a, position_b, cost - moves.cost)
+
+        assert moves.route == expected_sequence
+        assert [node for node in moves._tour.route if node] == moves.sequence
+        assert moves.cost == pytest.approx(cost)
+        assert moves.cost == pytest.approx(get_fixed_split_cost(moves._tour.route[1:-1], minimize_longest_route))
+        assert moves.cost >= get_best_split_cost(moves.sequence, vehicles_count, minimize_longest_route)
+        assert all(moves.route[moves.position(node)] == node for node in range(1, 8))
+
+    moves.resplit()
+    assert moves.cost == get_best_split_cost(moves.sequence, vehicles_count, minimize_longest_route)
@@ -0,0 +1,219 @@
+from pathlib import Path
+from time import perf_counter
+from types import MethodType, SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Type, Union
+
+import numpy as np
+
+from algorithms.base import BaseSolver, create_distance_callback
+from algorithms.crossover import cross, CROSSOVER_OPERATORS
+from algorithms.genetic import GeneticSolver
+from algorithms.held_karp import HeldKarpSolver
+from algorithms.scan_all import ScanAllSolver
+from algorithms.split import GiantTourSplit
+from tools.file_operations import load_from_json_file, save_to_json_file
+
+CALLBACKS_COUNT = 1_000_000
+
+
+def benchmark_distance_callbacks(distance_matrix: np.ndarray, calls_count: int = CALLBACKS_COUNT,
+                                 seed: Optional[int] = None) -> Dict[str, float]:
+    """
+    Measures arc cost callbacks handed to OR-Tools - the solver's bound '_arc_cost' method (used before) and the flat
+    list closure. Both are called for the same random arcs, the way the routing engine calls them during a search.
+
+    :return: Calls per second by callback name.
+    """
+    rng = np.random.default_rng(seed)
+    arcs = rng.integers(0, len(distance_matrix), size=(calls_count, 2)).tolist()
+    callbacks = {
+        'bound_method': MethodType(BaseSolver._arc_cost, SimpleNamespace(distance_matrix=distance_matrix)),
+        'flat_closure': create_distance_callback(distance_matrix),
+    }
+
+    return {name: calls_count / _time_calls(callback, arcs) for name, callback in callbacks.items()}
+
+
+def _time_calls(callback: Callable[[int, int], int], arcs: list) -> float:
+    start = perf_counter()
+    for from_node, to_node in arcs:
+        callback(from_node, to_node)
+    return perf_counter() - start
+
+
+class BenchmarkSuite:
+    """
+    Reproducible benchmarks of solvers, the route cost and split kernels and genetic operators on fixed instances of
+    every dataset. Solvers, which split giant tours, are run with a single vehicle and with 'VRP_VEHICLES_PATH'
+    vehicles. Every case reports solution cost (solvers only), latency percentiles and throughput, which are compared
+    with a stored baseline - a slower, less productive or worse solving case is a regression.
+    """
+    DATASETS = ('A', 'B', 'C', 'D')
+    DISTANCE_MATRIXES_DIRECTORY = Path('data', 'distance_matrix')
+    CONFIGURATION_PATH = Path('data', 'benchmarks', 'configuration.json')
+    VEHICLES_PATH = Path('data', 'vehicles', 'tsp.json')
+    VRP_VEHICLES_PATH = Path('data', 'vehicles', 'vrp-3.json')
+    BASELINE_PATH = Path('data', 'benchmarks', 'baseline.json')
+    INSTANCE_SIZE = 30
+    EXACT_INSTANCE_SIZES = {ScanAllSolver: 9, HeldKarpSolver: 12}  # Exact solvers do not scale to 30 destinations
+    SEED = 2019
+    KERNEL_CALLS_COUNT = 200
+    SPLIT_MAX_ROUTE_LENGTH = 15  # Of the bounded split kernel - about a half of the destinations
+    POPULATION_SIZE = 1000
+    LOWER_IS_BETTER = ('cost', 'time_p50', 'time_p90')
+    HIGHER_IS_BETTER = ('throughput',)
+
+    def __init__(self, solvers: Dict[str, Type[BaseSolver]], repeats: int = 5, cases_filter: Optional[str] = None):
+        """
+        :param solvers: Solver classes by name.
+        :param cases_filter: Only cases, whose names contain it, are run.
+        """
+        self.solvers = solvers
+        self.repeats = repeats
+        self.cases_filter = cases_filter
+
+    def run(self) -> Dict[str, Dict[str, float]]:
+        """
+        :return: Metrics by case name, e.g. 'solver/genetic/A', 'solver/genetic/A/vrp-3' or 'operator/pmx/B'.
+        """
+        results: Dict[str, Dict[str, float]] = {}
+        vrp_suffix = self.VRP_VEHICLES_PATH.stem
+        for dataset in self.DATASETS:
+            for name, solver_class in self.solvers.items():
+                self._run_case(results, f'solver/{name}/{dataset}', self._benchmark_solver, solver_class, dataset)
+                if solver_class not in self.EXACT_INSTANCE_SIZES:
+                    self._run_case(results, f'solver/{name}/{dataset}/{vrp_suffix}', self._benchmark_solver,
+                                   solver_class, dataset, self.VRP_VEHICLES_PATH)
+            self._run_case(results, f'kernel/route_cost/{dataset}', self._benchmark_route_cost, dataset)
+            self._run_case(results, f'kernel/split/{dataset}', self._benchmark_split, dataset, None)
+            self._run_case(results, f'kernel/bounded_split/{dataset}', self._benchmark_split, dataset,
+                           self.SPLIT_MAX_ROUTE_LENGTH)
+            for operator in CROSSOVER_OPERATORS:
+                self._run_case(results, f'operator/{operator}/{dataset}', self._benchmark_crossover, operator, dataset)
+            self._run_case(results, f'operator/inversion/{dataset}', self._benchmark_mutation, dataset)
+
+        return results
+
+    def _run_case(self, results: Dict[str, Dict[str, float]], case: str, benchmark: Callable, *args) -> None:
+        if self.cases_filter and self.cases_filter not in case:
+            return
+        results[case] = benchmark(*args)
+        print(f'{case}: ' + ', '.join(f'{metric}={value:.6g}' for metric, value in results[case].items()))
+
+    def _get_distance_matrix_path(self, dataset: str, size: int) -> str:
+        return str(self.DISTANCE_MATRIXES_DIRECTORY / dataset / f'{dataset.lower()}{size}.pickle')
+
+    def _create_solver(self, solver_class: Type[BaseSolver], dataset: str, seed: Union[int, np.random.SeedSequence],
+                       vehicles_path: Optional[Path] = None) -> BaseSolver:
+        size = self.EXACT_INSTANCE_SIZES.get(solver_class, self.INSTANCE_SIZE)
+        return solver_class(self._get_distance_matrix_path(dataset, size), str(self.CONFIGURATION_PATH),
+                            str(vehicles_path or self.VEHICLES_PATH), None, seed=seed)
+
+    def _benchmark_solver(self, solver_class: Type[BaseSolver], dataset: str,
+                          vehicles_path: Optional[Path] = None) -> Dict[str, float]:
+        """
+        Throughput is the number of evaluations (priced solutions) per second.
+        """
+        costs, execution_times, evaluations = [], [], 0
+        for seed in np.random.SeedSequence(self.SEED).spawn(self.repeats):
+            solver = self._create_solver(solver_class, dataset, seed, vehicles_path)
+            _, cost, execution_time = solver.run()
+            costs.append(cost)
+            execution_times.append(execution_time)
+            evaluations += solver.budget.evaluations
+
+        metrics = {'cost': float(np.mean(costs)), **self._get_latencies(execution_times)}
+        if evaluations:
+            metrics['throughput'] = evaluations / sum(execution_times)
+        return metrics
+
+    def _benchmark_route_cost(self, dataset: str) -> Dict[str, float]:
+        solver = self._create_solver(GeneticSolver, dataset, self.SEED)
+        sequences = self._generate_population(solver)
+
+        return self._measure(lambda: solver._get_sequences_costs(sequences), len(sequences))
+
+    def _benchmark_split(self, dataset: str, max_route_length: Optional[int]) -> Dict[str, float]:
+        solver = self._create_solver(GeneticSolver, dataset, self.SEED, self.VRP_VEHICLES_PATH)
+        split = GiantTourSplit(solver.distance_matrix, solver.vehicles_count, solver.minimize_longest_route,
+                               max_route_length)
+        sequences = self._generate_population(solver)
+
+        return self._measure(lambda: split.get_costs(sequences), len(sequences))
+
+    def _benchmark_crossover(self, operator: str, dataset: str) -> Dict[str, float]:
+        solver = self._create_solver(GeneticSolver, dataset, self.SEED)
+        population = self._generate_population(solver)
+        parents_a, parents_b = population[0::2], population[1::2]
+        starts = np.random.default_rng(self.SEED).integers(0, solver.sequence_len // 2, size=len(parents_a))
+        ends = starts + solver.sequence_len // 2
+
+        return self._measure(lambda: cross(operator, parents_a, parents_b, starts, ends), len(population))
+
+    def _benchmark_mutation(self, dataset: str) -> Dict[str, float]:
+        solver = self._create_solver(GeneticSolver, dataset, self.SEED)
+        population = solver._population.copy()
+
+        return self._measure(lambda: solver._mutate_population(population), solver._mutated_sequences_per_population)
+
+    def _generate_population(self, solver: BaseSolver) -> np.ndarray:
+        population = np.tile(np.arange(1, solver.destinations_count, dtype=np.intp), (self.POPULATION_SIZE, 1))
+        return np.random.default_rng(self.SEED).permuted(population, axis=1)
+
+    def _measure(self, function: Callable[[], Any], items_count: int) -> Dict[str, float]:
+        """
+        :return: Latency percentiles of a call and throughput in items (sequences, children, mutations) per second.
+        """
+        function()  # Warm up
+        latencies = []
+        for _ in range(0, self.KERNEL_CALLS_COUNT):
+            start = perf_counter()
+            function()
+            latencies.append(perf_counter() - start)
+
+        return {**self._get_latencies(latencies), 'throughput': items_count * len(latencies) / sum(latencies)}
+
+    @staticmethod
+    def _get_latencies(latencies: List[float]) -> Dict[str, float]:
+        p50, p90 = np.percentile(latencies, [50, 90]).tolist()
+        return {'time_p50': p50, 'time_p90': p90}
+
+    def save(self, path: Union[Path, str], results: Dict[str, Dict[str, float]]) -> None:
+        save_to_json_file(path, {'repeats': self.repeats, 'cases': results})
+
+    @staticmethod
+    def load_baseline(path: Union[Path, str]) -> dict:
+        return load_from_json_file(path)
+
+    def compare(self, results: Dict[str, Dict[str, float]], baseline: dict, time_tolerance: float,
+                cost_tolerance: float) -> List[str]:
+        """
+        Cases and metrics missing in the baseline are regressions too - a case nobody compares could regress
+        unnoticed, so the baseline has to be updated, when cases are added. Mean costs are compared only with the same
+        number of repeats, as other repeats use other seeds.
+
+        :param time_tolerance: Allowed relative change of latencies and throughput.
+        :param cost_tolerance: Allowed relative increase of cost.
+        :return: Descriptions of regressions.
+        """
+        regressions = []
+        for case, metrics in results.items():
+            if case not in baseline['cases']:
+                regressions.append(f'{case}: missing in the baseline')
+                continue
+            for metric, value in metrics.items():
+                baseline_value = baseline['cases'][case].get(metric)
+                if baseline_value is None:
+                    regressions.append(f'{case} {metric}: {value:.6g} (missing in the baseline)')
+                    continue
+                if metric == 'cost' and baseline['repeats'] != self.repeats:
+                    continue
+                tolerance = cost_tolerance if metric == 'cost' else time_tolerance
+                if metric in self.LOWER_IS_BETTER:
+                    regressed = value > baseline_value * (1 + tolerance)
+                else:
+                    regressed = value < baseline_value * (1 - tolerance)
+                if regressed:
+                    regressions.append(f'{case} {metric}: {value:.6g} (baseline: {baseline_value:.6g})')
+
+        return regressions
@@ -4,13 +4,12 @@ from plotly.graph_objs import Scatter
 
 from tools.charts.base import BaseChart
 from tools.charts.types import AggregatorType, DrawableStats, get_styles_for_aggregator
-from tools.file_operations import load_csv_file
 
 
 class AggregationChart(BaseChart):
     def build(self, drawable_stats: DrawableStats, aggregation_types: Iterable, filename: str):
         figure_data = []
-        _, results = load_csv_file(drawable_stats.stats_path)
+        results = self._load_results(drawable_stats)
         chart_data = self._get_chart_data_from_csv_results(results)
 
         for at in aggregation_types:
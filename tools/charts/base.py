@@ -4,10 +4,13 @@ from random import randint
 from numpy import array, percentile
 from plotly.offline import plot
 
-from tools.charts.types import StatisticType, AggregatorType
+from tools.charts.types import StatisticType, AggregatorType, DrawableStats
+from tools.results_store import load_results
 
 
 class BaseChart:
+    RESULTS_COLUMNS = ('destinations_count', 'cost', 'execution_time', 'evaluations_per_second')
+
     def __init__(self, statistic_type: str, chart_tilte=str):
         self._statistic_type = StatisticType(statistic_type)
         self._chart_title = chart_tilte
@@ -15,23 +18,38 @@ class BaseChart:
             self._yaxis = {'title': 'Solution distance [m]'}
         elif self._statistic_type is StatisticType.EXECUTION_TIMES:
             self._yaxis = {'title': 'Time [s]'}
+        elif self._statistic_type is StatisticType.EVALUATIONS_PER_SECOND:
+            self._yaxis = {'title': 'Evaluations per second'}
         else:
             raise Exception(f'Chart not implemented for: {statistic_type}')
         self._colors = ['rgb(255,0,0)', 'rgb(0,255,0)', 'rgb(0,0,255)', 'rgb(0,0,0)', 'rgb(255,0,255)']
 
+    def _load_results(self, drawable_stats: DrawableStats) -> List[dict]:
+        """
+        Sequences are not read, as no chart needs them.
+        """
+        _, results = load_results(drawable_stats.stats_path, self.RESULTS_COLUMNS, algorithm=drawable_stats.ALGORITHM,
+                                  dataset=drawable_stats.dataset, experiment=drawable_stats.experiment)
+        return results
+
     def _get_chart_data_from_csv_results(self, csv_results: List[dict]) -> Dict[int, Dict]:
         chart_data: Dict[int, Dict] = {}
         for result in csv_results:
             destinations_count = int(result['destinations_count'])
             if chart_data.get(destinations_count) is None:
-                chart_data[destinations_count] = {'costs': [], 'execution_times': []}
+                chart_data[destinations_count] = {'costs': [], 'execution_times': [], 'evaluations_per_second': []}
 
             chart_data[destinations_count]['costs'].append(float(result['cost']))
             chart_data[destinations_count]['execution_times'].append(float(result['execution_time']))
+            # Missing in results saved before the column was added and in results of solvers not counting evaluations
+            if result.get('evaluations_per_second'):
+                chart_data[destinations_count]['evaluations_per_second'].append(
+                    float(result['evaluations_per_second']))
 
         for record in chart_data.values():
             record['costs'] = array(record['costs'])
             record['execution_times'] = array(record['execution_times'])
+            record['evaluations_per_second'] = array(record['evaluations_per_second'])
 
         return chart_data
 
@@ -53,6 +71,8 @@ class BaseChart:
         destinations_counts = []
         statistic_type_values = []
         for destinations_count, record in chart_data.items():
+            if not len(record[self._statistic_type.value]):
+                continue
             destinations_counts.append(destinations_count)
             aggregated_statistic_type_values = aggregate(record[self._statistic_type.value])
             statistic_type_values.append(aggregated_statistic_type_values)
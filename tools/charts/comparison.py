@@ -4,7 +4,6 @@ from plotly.graph_objs import Scatter
 
 from tools.charts.base import BaseChart
 from tools.charts.types import AggregatorType, DrawableStats
-from tools.file_operations import load_csv_file
 
 
 class ComparisonChart(BaseChart):
@@ -12,7 +11,7 @@ class ComparisonChart(BaseChart):
         aggregation_type = AggregatorType(aggregation_type)
         figure_data = []
         for ds in drawable_stats:
-            _, results = load_csv_file(ds.stats_path)
+            results = self._load_results(ds)
             chart_data = self._get_chart_data_from_csv_results(results)
             x, y = self._get_data_to_plot(chart_data, aggregation_type)
             figure_data.append(Scatter(x=x, y=y, mode='lines+markers', name=str(ds)))
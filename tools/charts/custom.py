@@ -4,7 +4,6 @@ from plotly.graph_objs import Scatter
 
 from tools.charts.base import BaseChart
 from tools.charts.types import AggregatorType, DrawableStats
-from tools.file_operations import load_csv_file
 
 
 class CustomChart(BaseChart):
@@ -16,7 +15,7 @@ class CustomChart(BaseChart):
     def build(self, drawable_stats: List[DrawableStats], filename: str):
         figure_data = []
         for i, ds in enumerate(drawable_stats):
-            _, results = load_csv_file(ds.stats_path)
+            results = self._load_results(ds)
             chart_data = self._get_chart_data_from_csv_results(results)
             x, y = self._get_data_to_plot(chart_data, self._aggregation_type)
             figure_data.append(Scatter(x=x, y=y, mode='lines+markers', name=str(ds),
@@ -5,6 +5,7 @@ from pathlib import Path
 class StatisticType(Enum):
     COSTS = 'costs'
     EXECUTION_TIMES = 'execution_times'
+    EVALUATIONS_PER_SECOND = 'evaluations_per_second'
 
 
 class AggregatorType(Enum):
@@ -27,9 +28,16 @@ AGGREGATOR_TYPES = [t.value for t in list(AggregatorType)]
 
 class DrawableStats:
     NAME = 'Name to display'
+    ALGORITHM = None  # Selects results of an algorithm from a results store
 
-    def __init__(self, stats_path):
+    def __init__(self, stats_path, dataset=None, experiment=None):
+        """
+        :param dataset: Selects results of a dataset from a results store, all datasets by default.
+        :param experiment: Selects results of an experiment from a results store, all experiments by default.
+        """
         self.stats_path = Path(stats_path)
+        self.dataset = dataset
+        self.experiment = experiment
 
     def __str__(self):
         return self.NAME
@@ -37,21 +45,36 @@ class DrawableStats:
 
 class ScanAllDrawableStats(DrawableStats):
     NAME = 'Scan all'
+    ALGORITHM = 'scan_all'
+
+
+class HeldKarpDrawableStats(DrawableStats):
+    NAME = 'Held-Karp'
+    ALGORITHM = 'held_karp'
 
 
 class ORToolsDrawableStats(DrawableStats):
     NAME = 'OR-Tools'
+    ALGORITHM = 'ortools'
 
 
 class GeneticDrawableStats(DrawableStats):
     NAME = 'Genetic algorithm'
+    ALGORITHM = 'genetic'
 
 
 class SimulatedAnnealingDrawableStats(DrawableStats):
     NAME = 'Simulated annealing'
+    ALGORITHM = 'simulated_annealing'
+
+
+class LocalSearchDrawableStats(DrawableStats):
+    NAME = 'Local search'
+    ALGORITHM = 'local_search'
 
 
 class CustomDrawableStats(DrawableStats):
-    def __init__(self, stats_path):
-        super(CustomDrawableStats, self).__init__(stats_path)
-        self.NAME = self.stats_path.name
+    def __init__(self, stats_path, dataset=None, experiment=None, algorithm=None):
+        super(CustomDrawableStats, self).__init__(stats_path, dataset, experiment)
+        self.NAME = experiment or self.stats_path.name
+        self.ALGORITHM = algorithm
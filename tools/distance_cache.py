@@ -0,0 +1,122 @@
+import sqlite3
+
+from pathlib import Path
+from time import time
+from typing import List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+Coordinates = Tuple[float, float]
+
+
+class DistanceCache:
+    """
+    On-disk (SQLite) cache of distances and durations between pairs of coordinates for a travel mode.
+    Coordinates are rounded to 'COORDINATES_PRECISION' decimal places (about 1 meter), entries older
+    than 'max_age' seconds are treated as missing.
+    """
+    COORDINATES_PRECISION = 5
+
+    def __init__(self, path: Union[Path, str], mode: str, max_age: Optional[float] = None):
+        self._connection = sqlite3.connect(str(path))
+        self._mode = mode
+        self._max_age = max_age
+        with self._connection:
+            self._connection.executescript('''
+                CREATE TABLE IF NOT EXISTS distances (
+                    origin_latitude INTEGER NOT NULL,
+                    origin_longitude INTEGER NOT NULL,
+                    destination_latitude INTEGER NOT NULL,
+                    destination_longitude INTEGER NOT NULL,
+                    mode TEXT NOT NULL,
+                    distance INTEGER NOT NULL,
+                    duration INTEGER,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (origin_latitude, origin_longitude, destination_latitude, destination_longitude, mode)
+                );
+                CREATE TABLE IF NOT EXISTS addresses (
+                    latitude INTEGER NOT NULL,
+                    longitude INTEGER NOT NULL,
+                    address TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    PRIMARY KEY (latitude, longitude)
+                );
+            ''')
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_matrixes(self, coordinates: Sequence[Coordinates]) \
+            -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[Optional[str]]]:
+        """
+        :return: Distances, durations, a mask of pairs found in the cache and destination addresses
+                 (None when unknown).
+        """
+        size = len(coordinates)
+        distances = np.zeros((size, size), dtype=np.int64)
+        durations = np.zeros((size, size), dtype=np.int64)
+        known = np.zeros((size, size), dtype=bool)
+
+        with self._connection:
+            self._connection.execute('CREATE TEMP TABLE IF NOT EXISTS requested '
+                                     '(idx INTEGER, latitude INTEGER, longitude INTEGER)')
+            self._connection.execute('DELETE FROM requested')
+            self._connection.executemany('INSERT INTO requested VALUES (?, ?, ?)',
+                                         [(i, *self._get_key(c)) for i, c in enumerate(coordinates)])
+            rows = self._connection.execute('''
+                SELECT o.idx, d.idx, c.distance, c.duration
+                FROM distances c
+                JOIN requested o ON c.origin_latitude = o.latitude AND c.origin_longitude = o.longitude
+                JOIN requested d ON c.destination_latitude = d.latitude AND c.destination_longitude = d.longitude
+                WHERE c.mode = ? AND c.fetched_at >= ?
+            ''', (self._mode, self._get_oldest_valid_time())).fetchall()
+            addresses = self._connection.execute('''
+                SELECT r.idx, a.address
+                FROM addresses a
+                JOIN requested r ON a.latitude = r.latitude AND a.longitude = r.longitude
+                WHERE a.fetched_at >= ?
+            ''', (self._get_oldest_valid_time(),)).fetchall()
+
+        if rows:
+            origins, destinations, distance_values, duration_values = zip(*rows)
+            distances[origins, destinations] = distance_values
+            durations[origins, destinations] = [d if d is not None else 0 for d in duration_values]
+            known[origins, destinations] = True
+
+        destination_addresses: List[Optional[str]] = [None] * size
+        for index, address in addresses:
+            destination_addresses[index] = address
+
+        return distances, durations, known, destination_addresses
+
+    def put_matrixes(self, coordinates: Sequence[Coordinates], distances: np.ndarray, durations: np.ndarray,
+                     fetched: np.ndarray, destination_addresses: Sequence[Optional[str]]) -> None:
+        """
+        Saves (or refreshes) pairs marked in 'fetched' and destination addresses, which are not None.
+        """
+        now = time()
+        keys = [self._get_key(c) for c in coordinates]
+        origins, destinations = np.nonzero(fetched)
+        with self._connection:
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO distances VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                ((*keys[o], *keys[d], self._mode, int(distances[o, d]), int(durations[o, d]), now)
+                 for o, d in zip(origins.tolist(), destinations.tolist()))
+            )
+            self._connection.executemany(
+                'INSERT OR REPLACE INTO addresses VALUES (?, ?, ?, ?)',
+                ((*keys[i], address, now) for i, address in enumerate(destination_addresses) if address is not None)
+            )
+
+    def _get_key(self, coordinates: Coordinates) -> Tuple[int, int]:
+        scale = 10 ** self.COORDINATES_PRECISION
+        return int(round(coordinates[0] * scale)), int(round(coordinates[1] * scale))
+
+    def _get_oldest_valid_time(self) -> float:
+        return time() - self._max_age if self._max_age is not None else float('-inf')
@@ -1,22 +1,42 @@
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from math import ceil
-from numpy import vstack, hstack, ndarray
-from typing import Union, List, Tuple, Optional
+from random import uniform
+from time import sleep
+from typing import Any, List, Optional, Sequence, Tuple
 
 import googlemaps
+import numpy as np
+from googlemaps.exceptions import ApiError, Timeout, TransportError
 
+from tools.distance_cache import DistanceCache
+from tools.distance_matrix_storage import save_distance_matrix
 from tools.file_operations import load_json_and_validate, save_to_pickle_file, save_to_csv_file
 
+# (origin indexes, destination indexes) of a single Distance Matrix API request
+Tile = Tuple[Sequence[int], Sequence[int]]
+
 
 class DistanceMatrixManager:
     LOCATIONS_SCHEMA_PATH = Path('data', 'schemas', 'locations_schema.json')
     MAX_COORDINATES_SIZE_PER_REQUEST = 10
-
-    def __init__(self, app_key: str) -> None:
-        self.gmaps = googlemaps.Client(key=app_key)
+    TRAVEL_MODE = 'driving'
+    MAX_CONCURRENT_REQUESTS = 8
+    MAX_ATTEMPTS = 5
+    RETRY_BASE_DELAY = 1.0  # seconds, doubled after each failed attempt
+    RETRIABLE_API_STATUSES = ('OVER_QUERY_LIMIT', 'UNKNOWN_ERROR')
+
+    def __init__(self, app_key: str = None, client: Any = None,
+                 max_concurrent_requests: int = MAX_CONCURRENT_REQUESTS, cache: DistanceCache = None) -> None:
+        """
+        :param client: Object with the same 'distance_matrix' method as 'googlemaps.Client', used instead of it.
+        :param cache: Pairs found in the cache are not requested again, fetched ones are saved in it.
+        """
+        self.gmaps = client if client is not None else googlemaps.Client(key=app_key)
+        self.max_concurrent_requests = max_concurrent_requests
+        self.cache = cache
 
     def create_distance_matrix(self, locations_json_path: str, output_csv_path: str,
-                               output_pickle_path: str = None) -> None:
+                               output_pickle_path: str = None, output_npy_path: str = None) -> None:
 
         locations = load_json_and_validate(schema_path=self.LOCATIONS_SCHEMA_PATH, file_path=locations_json_path)
         coordinates = self._extract_coordinates(locations)
@@ -32,6 +52,9 @@ class DistanceMatrixManager:
             }
             save_to_pickle_file(path=output_pickle_path, content=pickle_file_content)
 
+        if output_npy_path:
+            save_distance_matrix(output_npy_path, destination_addresses, distance_matrix)
+
     @staticmethod
     def _extract_coordinates(locations: List[dict]) -> list:
         coordinates = []
@@ -40,69 +63,134 @@ class DistanceMatrixManager:
 
         return coordinates
 
-    def _compose_distance_matrix(self, coordinates: list) -> Tuple[Union[list, ndarray], list]:
+    def _compose_distance_matrix(self, coordinates: list) -> Tuple[np.ndarray, list]:
         """
-        In a simple case it just returns a result of Google Distance Matrix API call.
-        The API has a limit - returning matrix of maximum size 10x10.
-        For more than 10 destinations, this method performs multiple API calls and combines results into one matrix.
+        Google Distance Matrix API has a limit - returning matrix of maximum size 10x10.
+        The matrix is split into such tiles, which are requested concurrently and written straight
+        into a preallocated matrix. With a cache, only rows and columns of missing pairs are requested.
 
         :return: Distance matrix and a list of destination addresses.
         """
-        if len(coordinates) <= 10:
-            return self._get_distance_matrix_from_gmaps(origins=coordinates, destinations=coordinates)
-
-        distance_matrix = None
-        destinations_addresses: List[str] = []
-        addresses_part: List[str] = []
-
-        parts_count = ceil(len(coordinates) / self.MAX_COORDINATES_SIZE_PER_REQUEST)
-        for d in range(0, parts_count):
-            destinations = self._get_coordinates_by_part_number(coordinates, part_number=d)
-            matrix_vertical_part = None
-            for o in range(0, parts_count):
-                origins = self._get_coordinates_by_part_number(coordinates, part_number=o)
-                matrix_atom_part, addresses_part = self._get_distance_matrix_from_gmaps(origins, destinations)
-                matrix_vertical_part = self._stack_matrixes(matrix_vertical_part, matrix_atom_part, vstack)
-
-            destinations_addresses += addresses_part
-            distance_matrix = self._stack_matrixes(distance_matrix, matrix_vertical_part, hstack)
-
-        return distance_matrix, destinations_addresses
-
-    def _get_coordinates_by_part_number(self, coordinates: list, part_number: int) -> list:
-        coordinates_from = part_number * self.MAX_COORDINATES_SIZE_PER_REQUEST
-        coordinates_to = (part_number + 1) * self.MAX_COORDINATES_SIZE_PER_REQUEST
+        size = len(coordinates)
+        if self.cache:
+            distance_matrix, durations, known, destination_addresses = self.cache.get_matrixes(coordinates)
+            np.fill_diagonal(known, True)
+        else:
+            distance_matrix = np.zeros((size, size), dtype=np.int64)
+            durations = np.zeros((size, size), dtype=np.int64)
+            known = np.zeros((size, size), dtype=bool)
+            destination_addresses = [None] * size
+
+        # Addresses come with destinations, so columns of unknown addresses have to be requested as well
+        missing = ~known
+        missing[:, [i for i, address in enumerate(destination_addresses) if address is None]] = True
+        rows, columns = self._cover_missing_pairs(missing)
+
+        all_indexes = list(range(0, size))
+        other_rows = sorted(set(all_indexes) - set(rows))
+        tiles = self._split_into_tiles(rows, all_indexes) + self._split_into_tiles(other_rows, columns)
+        fetched = np.zeros((size, size), dtype=bool)
+        fetched_addresses: List[Optional[str]] = [None] * size
+        self._fetch_tiles(coordinates, tiles, distance_matrix, durations, fetched, fetched_addresses)
+
+        for index, address in enumerate(fetched_addresses):
+            if address is not None:
+                destination_addresses[index] = address
+        if self.cache:
+            self.cache.put_matrixes(coordinates, distance_matrix, durations, fetched, fetched_addresses)
 
-        return coordinates[coordinates_from:coordinates_to]
+        return distance_matrix, destination_addresses
 
-    def _get_distance_matrix_from_gmaps(self, origins: list, destinations: list) -> Tuple[Union[list, ndarray], list]:
+    @staticmethod
+    def _cover_missing_pairs(missing: np.ndarray) -> Tuple[List[int], List[int]]:
+        """
+        Greedily picks rows (origins) and columns (destinations) to request, so every missing pair is covered.
+        Adding k locations to n cached ones ends up with k rows and k columns - O(k * n) pairs instead of O(n^2).
+        """
+        missing = missing.copy()
+        rows: List[int] = []
+        columns: List[int] = []
+        rows_counts = missing.sum(axis=1)
+        columns_counts = missing.sum(axis=0)
+        while rows_counts.any():
+            row, column = int(rows_counts.argmax()), int(columns_counts.argmax())
+            if rows_counts[row] >= columns_counts[column]:
+                rows.append(row)
+                columns_counts -= missing[row, :]
+                rows_counts[row] = 0
+                missing[row, :] = False
+            else:
+                columns.append(column)
+                rows_counts -= missing[:, column]
+                columns_counts[column] = 0
+                missing[:, column] = False
+
+        return sorted(rows), sorted(columns)
+
+    def _split_into_tiles(self, origin_indexes: Sequence[int], destination_indexes: Sequence[int]) -> List[Tile]:
+        size = self.MAX_COORDINATES_SIZE_PER_REQUEST
+        return [(origin_indexes[o:o + size], destination_indexes[d:d + size])
+                for o in range(0, len(origin_indexes), size)
+                for d in range(0, len(destination_indexes), size)]
+
+    def _fetch_tiles(self, coordinates: list, tiles: List[Tile], distance_matrix: np.ndarray,
+                     durations: np.ndarray, fetched: np.ndarray, destination_addresses: List[Optional[str]]) -> None:
+        """
+        Requests tiles with bounded concurrency. Results are written only by the calling thread.
+        """
+        with ThreadPoolExecutor(max_workers=self.max_concurrent_requests) as executor:
+            futures = {
+                executor.submit(self._get_distance_matrix_with_retries,
+                                [coordinates[i] for i in origin_indexes],
+                                [coordinates[i] for i in destination_indexes]): (origin_indexes, destination_indexes)
+                for origin_indexes, destination_indexes in tiles
+            }
+            for future in as_completed(futures):
+                origin_indexes, destination_indexes = futures[future]
+                tile_distances, tile_durations, tile_addresses = future.result()
+                tile_indexes = np.ix_(list(origin_indexes), list(destination_indexes))
+                distance_matrix[tile_indexes] = tile_distances
+                durations[tile_indexes] = tile_durations
+                fetched[tile_indexes] = True
+                for index, address in zip(destination_indexes, tile_addresses):
+                    destination_addresses[index] = address
+
+    def _get_distance_matrix_with_retries(self, origins: list, destinations: list) -> Tuple[list, list, list]:
+        """
+        Retries failed requests with exponential backoff and a random jitter.
+        """
+        attempt = 1
+        while True:
+            try:
+                return self._get_distance_matrix_from_gmaps(origins, destinations)
+            except (Timeout, TransportError, ApiError) as e:
+                retriable = not isinstance(e, ApiError) or e.status in self.RETRIABLE_API_STATUSES
+                if not retriable or attempt >= self.MAX_ATTEMPTS:
+                    raise
+                delay = self.RETRY_BASE_DELAY * 2 ** (attempt - 1)
+                sleep(delay + uniform(0, delay))
+                attempt += 1
+
+    def _get_distance_matrix_from_gmaps(self, origins: list, destinations: list) -> Tuple[list, list, list]:
         distance_matrix_response = self.gmaps.distance_matrix(origins, destinations,
-                                                              mode='driving',
+                                                              mode=self.TRAVEL_MODE,
                                                               units='metric',
                                                               language='pl',
                                                               region='pl')
         distance_matrix = self._extract_raw_distance_matrix(distance_matrix_response)
+        durations = self._extract_raw_distance_matrix(distance_matrix_response, value='duration')
         destination_addresses = distance_matrix_response['destination_addresses']
 
-        return distance_matrix, destination_addresses
+        return distance_matrix, durations, destination_addresses
 
     @staticmethod
-    def _extract_raw_distance_matrix(distance_matrix: dict) -> list:
+    def _extract_raw_distance_matrix(distance_matrix: dict, value: str = 'distance') -> list:
         raw_distance_matrix = []
 
         for row in distance_matrix['rows']:
             raw_distance_matrix_row = []
             for element in row['elements']:
-                raw_distance_matrix_row.append(element['distance']['value'])
+                raw_distance_matrix_row.append(element[value]['value'])
             raw_distance_matrix.append(raw_distance_matrix_row)
 
         return raw_distance_matrix
-
-    @staticmethod
-    def _stack_matrixes(base_matrix: Optional[ndarray],
-                        new_matrix: Union[list, ndarray],
-                        stack_function: Union[vstack, hstack]) -> ndarray:
-        if base_matrix is None:
-            return new_matrix
-        else:
-            return stack_function((base_matrix, new_matrix))
@@ -0,0 +1,105 @@
+from pathlib import Path
+from typing import List, Tuple, Union, Any, Optional
+
+import numpy as np
+
+from tools.file_operations import load_from_pickle_file, load_from_json_file, load_csv_rows, \
+    load_from_npy_file, save_to_npy_file, save_to_json_file
+
+NPY_SUFFIX = '.npy'
+PICKLE_SUFFIX = '.pickle'
+CSV_SUFFIX = '.csv'
+FORMAT_VERSION = 1
+
+
+def get_sidecar_path(matrix_path: Union[Path, str]) -> Path:
+    """
+    Destination addresses and metadata of a '.npy' matrix are kept in a JSON file with the same name.
+    """
+    return Path(matrix_path).with_suffix('.json')
+
+
+def save_distance_matrix(path: Union[Path, str], destination_addresses: List[str], matrix: Any,
+                         **metadata) -> None:
+    matrix = np.ascontiguousarray(matrix)
+    save_to_npy_file(path, matrix)
+    write_sidecar(path, destination_addresses, matrix.shape, matrix.dtype, **metadata)
+
+
+def write_sidecar(path: Union[Path, str], destination_addresses: List[str], shape: Tuple[int, ...],
+                  dtype: np.dtype, **metadata) -> None:
+    save_to_json_file(get_sidecar_path(path), {
+        'format_version': FORMAT_VERSION,
+        'shape': list(shape),
+        'dtype': np.dtype(dtype).str,
+        **metadata,
+        'destination_addresses': destination_addresses,
+    })
+
+
+def read_distance_matrix(path: Union[Path, str]) -> Tuple[List[str], Any]:
+    """
+    Reads a '.npy' matrix (memory-mapped, with its JSON sidecar) or a legacy pickle file.
+
+    :return: Destination addresses and the matrix.
+    """
+    path = Path(path)
+    if path.suffix == NPY_SUFFIX:
+        sidecar = load_from_json_file(get_sidecar_path(path))
+        return sidecar['destination_addresses'], load_from_npy_file(path)
+
+    distance_matrix = load_from_pickle_file(path)
+    return distance_matrix['destination_addresses'], distance_matrix['matrix']
+
+
+class DistanceMatrixConverter:
+    """
+    Converts pickle and CSV distance matrixes into the '.npy' + JSON sidecar format.
+    """
+
+    def convert(self, input_path: Union[Path, str], output_directory: Optional[Union[Path, str]] = None) -> List[Path]:
+        """
+        'input_path' can be a single file or a directory, which is searched recursively. A CSV file is skipped
+        when a pickle with the same name exists, as both of them hold the same matrix.
+
+        :return: Paths of created '.npy' files.
+        """
+        input_path = Path(input_path)
+        if input_path.is_dir():
+            files = sorted(p for p in input_path.rglob('*') if p.suffix in (PICKLE_SUFFIX, CSV_SUFFIX))
+            files = [p for p in files if not (p.suffix == CSV_SUFFIX and p.with_suffix(PICKLE_SUFFIX).exists())]
+        else:
+            files = [input_path]
+
+        converted = []
+        for file_path in files:
+            target_directory = Path(output_directory) if output_directory else file_path.parent
+            if output_directory and input_path.is_dir():
+                target_directory = target_directory / file_path.parent.relative_to(input_path)
+            target_directory.mkdir(parents=True, exist_ok=True)
+
+            output_path = target_directory / f'{file_path.stem}{NPY_SUFFIX}'
+            destination_addresses, matrix = self._read_source(file_path)
+            save_distance_matrix(output_path, destination_addresses, np.asarray(matrix), source=file_path.name)
+            converted.append(output_path)
+
+        return converted
+
+    @staticmethod
+    def _read_source(path: Path) -> Tuple[List[str], Any]:
+        if path.suffix == CSV_SUFFIX:
+            return load_csv_matrix(path)
+        else:
+            return read_distance_matrix(path)
+
+
+def load_csv_matrix(path: Union[Path, str]) -> Tuple[List[str], np.ndarray]:
+    """
+    CSV matrixes have destination addresses in the header and a row of distances per origin.
+    """
+    header, rows = load_csv_rows(path)
+    matrix = np.array(rows, dtype=np.float64)
+    if (matrix == matrix.round()).all():
+        matrix = matrix.astype(np.int64)
+
+    return header, matrix
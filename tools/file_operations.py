@@ -5,6 +5,7 @@ import pickle
 from pathlib import Path
 from typing import Union, Any, Iterable, List, Tuple, Sequence
 
+import numpy as np
 from jsonschema import validate
 
 
@@ -35,6 +36,33 @@ def save_to_pickle_file(path: Union[Path, str], content: Any) -> None:
         pickle.dump(content, f)
 
 
+def save_to_npy_file(path: Union[Path, str], matrix: np.ndarray) -> None:
+    path = Path(path)
+    with path.open('wb') as f:
+        np.save(f, matrix, allow_pickle=False)
+
+
+def load_from_npy_file(path: Union[Path, str], mmap_mode: str = 'r') -> np.ndarray:
+    """
+    By default the file is memory-mapped read-only, so only the touched pages are read and they are shared
+    by all processes using the same file.
+    """
+    return np.load(Path(path), mmap_mode=mmap_mode, allow_pickle=False)
+
+
+def save_to_json_file(path: Union[Path, str], content: Any) -> None:
+    path = Path(path)
+    with path.open('w', encoding='UTF-8') as f:
+        json.dump(content, f, ensure_ascii=False, indent=2)
+
+
+def append_to_jsonl_file(path: Union[Path, str], records: Iterable[Any]) -> None:
+    path = Path(path)
+    with path.open('a', encoding='UTF-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+
 def save_to_csv_file(path: Union[Path, str], header: Iterable[Any], rows: Iterable[Any], delimiter: str = ';') -> None:
     path = Path(path)
     with path.open('w', newline='', encoding='UTF-8') as f:
@@ -57,3 +85,30 @@ def load_csv_file(path: Union[Path, str], delimiter: str = ';') -> Tuple[Sequenc
     with path.open(mode='r') as csv_file:
         csv_reader = csv.DictReader(csv_file, delimiter=delimiter)
         return csv_reader.fieldnames, list(csv_reader)
+
+
+def load_csv_rows(path: Union[Path, str], delimiter: str = ';') -> Tuple[List[str], List[List[str]]]:
+    path = Path(path)
+    with path.open(mode='r', newline='', encoding='UTF-8') as csv_file:
+        csv_reader = csv.reader(csv_file, delimiter=delimiter)
+        header = next(csv_reader)
+        return header, list(csv_reader)
+
+
+def load_csv_header(path: Union[Path, str], delimiter: str = ';') -> List[str]:
+    path = Path(path)
+    with path.open(mode='r', newline='', encoding='UTF-8') as csv_file:
+        return next(csv.reader(csv_file, delimiter=delimiter), [])
+
+
+def replace_csv_header(path: Union[Path, str], header: Iterable[Any], delimiter: str = ';') -> None:
+    """
+    Rewrites the file with a new first line. Rows are kept as they are.
+    """
+    path = Path(path)
+    with path.open(mode='r', newline='', encoding='UTF-8') as csv_file:
+        csv_file.readline()
+        rows = csv_file.read()
+    with path.open('w', newline='', encoding='UTF-8') as csv_file:
+        csv.writer(csv_file, delimiter=delimiter).writerow(header)
+        csv_file.write(rows)
@@ -0,0 +1,122 @@
+from pathlib import Path
+from typing import List, Tuple, Union
+
+import numpy as np
+
+from tools.distance_matrix_storage import write_sidecar
+from tools.file_operations import load_json_and_validate, save_to_csv_file
+
+HAVERSINE = 'haversine'
+EUCLIDEAN = 'euclidean'
+METRICS = (HAVERSINE, EUCLIDEAN)
+DTYPES = ('int32', 'int64', 'float32', 'float64')
+
+
+class GeometricDistanceMatrixGenerator:
+    """
+    Creates distance matrixes offline - from straight-line distances (in meters) between locations.
+    Rows are computed in chunks and written straight into a memory-mapped '.npy' file, so big matrixes
+    never have to fit in memory.
+    """
+    LOCATIONS_SCHEMA_PATH = Path('data', 'schemas', 'locations_schema.json')
+    EARTH_RADIUS = 6_371_000  # meters
+    CHUNK_SIZE = 256  # rows
+
+    def __init__(self, metric: str = HAVERSINE, dtype: Union[str, np.dtype] = np.int32,
+                 chunk_size: int = CHUNK_SIZE) -> None:
+        """
+        :param metric: 'haversine' (great-circle distance) or 'euclidean' (on an equirectangular projection).
+        :param dtype: Integer types keep distances rounded to meters.
+        """
+        if metric not in METRICS:
+            raise ValueError(f'Unknown metric: {metric}')
+        self.metric = metric
+        self.dtype = np.dtype(dtype)
+        self.chunk_size = chunk_size
+
+    def create_distance_matrix(self, locations_json_path: str, output_npy_path: str,
+                               output_csv_path: str = None) -> None:
+        locations = load_json_and_validate(schema_path=self.LOCATIONS_SCHEMA_PATH, file_path=locations_json_path)
+        latitudes, longitudes = self._extract_coordinates(locations)
+        destination_addresses = [f'{latitude}, {longitude}' for latitude, longitude in zip(latitudes, longitudes)]
+
+        size = len(locations)
+        matrix = np.lib.format.open_memmap(output_npy_path, mode='w+', dtype=self.dtype, shape=(size, size))
+        self.write_distance_matrix(latitudes, longitudes, matrix)
+        matrix.flush()
+        write_sidecar(output_npy_path, destination_addresses, matrix.shape, matrix.dtype,
+                      source=Path(locations_json_path).name, metric=self.metric)
+
+        if output_csv_path:
+            save_to_csv_file(path=output_csv_path, header=destination_addresses, rows=(row.tolist() for row in matrix))
+
+    @staticmethod
+    def _extract_coordinates(locations: List[dict]) -> Tuple[np.ndarray, np.ndarray]:
+        latitudes = np.array([location['latitude'] for location in locations], dtype=np.float64)
+        longitudes = np.array([location['longitude'] for location in locations], dtype=np.float64)
+
+        return latitudes, longitudes
+
+    def write_distance_matrix(self, latitudes: np.ndarray, longitudes: np.ndarray, matrix: np.ndarray) -> None:
+        """
+        Fills 'matrix' chunk by chunk. A single float64 buffer (and one temporary) of 'chunk_size' rows is reused
+        for all chunks.
+        """
+        size = len(latitudes)
+        buffer = np.empty((min(self.chunk_size, size), size), dtype=np.float64)
+        temporary = np.empty_like(buffer)
+        if self.metric == HAVERSINE:
+            points = np.radians(latitudes), np.radians(longitudes), np.cos(np.radians(latitudes))
+            distance = self._get_haversine_distances
+        else:
+            points = self._project(latitudes, longitudes)
+            distance = self._get_euclidean_distances
+
+        for start in range(0, size, self.chunk_size):
+            rows = slice(start, min(start + self.chunk_size, size))
+            chunk = buffer[:rows.stop - rows.start]
+            distance(points, rows, chunk, temporary[:len(chunk)])
+            if self.dtype.kind in 'iu':
+                np.rint(chunk, out=chunk)
+            matrix[rows] = chunk
+
+    def _project(self, latitudes: np.ndarray, longitudes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Equirectangular projection to meters, scaled at the mean latitude.
+        """
+        latitudes, longitudes = np.radians(latitudes), np.radians(longitudes)
+        scale = np.cos(latitudes.mean()) if len(latitudes) else 1.0
+        return latitudes * self.EARTH_RADIUS, longitudes * scale * self.EARTH_RADIUS
+
+    @staticmethod
+    def _get_euclidean_distances(points: Tuple[np.ndarray, np.ndarray], rows: slice, out: np.ndarray,
+                                 temporary: np.ndarray) -> None:
+        ys, xs = points
+        np.subtract(ys[rows, None], ys[None, :], out=out)
+        np.square(out, out=out)
+        np.subtract(xs[rows, None], xs[None, :], out=temporary)
+        np.square(temporary, out=temporary)
+        out += temporary
+        np.sqrt(out, out=out)
+
+    def _get_haversine_distances(self, points: Tuple[np.ndarray, np.ndarray, np.ndarray], rows: slice,
+                                 out: np.ndarray, temporary: np.ndarray) -> None:
+        """
+        hav(d / R) = sin^2(dlat / 2) + cos(lat1) * cos(lat2) * sin^2(dlng / 2)
+        """
+        latitudes, longitudes, cosines = points
+        np.subtract(longitudes[rows, None], longitudes[None, :], out=out)
+        out *= 0.5
+        np.sin(out, out=out)
+        np.square(out, out=out)
+        out *= cosines[rows, None]
+        out *= cosines[None, :]
+        np.subtract(latitudes[rows, None], latitudes[None, :], out=temporary)
+        temporary *= 0.5
+        np.sin(temporary, out=temporary)
+        np.square(temporary, out=temporary)
+        out += temporary
+        np.clip(out, 0.0, 1.0, out=out)
+        np.sqrt(out, out=out)
+        np.arcsin(out, out=out)
+        out *= 2 * self.EARTH_RADIUS
@@ -0,0 +1,35 @@
+from multiprocessing import Pool, current_process
+from typing import Callable, Iterable, Iterator, List, Any
+
+
+class SequentialPool:
+    """
+    Stand-in for 'multiprocessing.Pool', which does all the work in the current process.
+    """
+
+    def __init__(self, initializer: Callable = None, initargs: tuple = ()):
+        if initializer is not None:
+            initializer(*initargs)
+
+    def map(self, function: Callable, iterable: Iterable, chunksize: int = None) -> List[Any]:
+        return [function(item) for item in iterable]
+
+    def imap_unordered(self, function: Callable, iterable: Iterable, chunksize: int = 1) -> Iterator[Any]:
+        return (function(item) for item in iterable)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def create_pool(processes: int, initializer: Callable = None, initargs: tuple = ()):
+    """
+    Daemonic processes (e.g. workers of a simulation) are not allowed to have children,
+    so inside of them, as well as for a single process, the work is done sequentially.
+    """
+    if processes <= 1 or current_process().daemon:
+        return SequentialPool(initializer, initargs)
+
+    return Pool(processes, initializer=initializer, initargs=initargs)
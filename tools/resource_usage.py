@@ -0,0 +1,85 @@
+import os
+import sys
+
+from pathlib import Path
+from time import process_time
+from typing import Optional
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+
+def get_cpu_time() -> float:
+    """
+    User and system CPU time of the process and of its finished children (e.g. workers of a pool) in seconds.
+    Children are reported in clock ticks only, the process itself with the best available resolution.
+    """
+    times = os.times()
+    return process_time() + times.children_user + times.children_system
+
+
+class PeakMemoryMeter:
+    """
+    Peak resident memory of a single run in kilobytes. High-water marks of a process last for its whole life, so
+    in a reused process (e.g. a simulation worker) they would report the biggest of all earlier runs:
+
+    - On Linux the peak of the process is reset at the start of a run (through '/proc/self/clear_refs').
+    - Elsewhere, and for finished children (e.g. workers of a pool), the high-water mark counts for the run only,
+      when the run raised it.
+    """
+    CLEAR_REFS_PATH = Path('/proc/self/clear_refs')
+    STATUS_PATH = Path('/proc/self/status')
+
+    def __init__(self):
+        self._reset = False
+        self._start_peaks = {}
+
+    def start(self) -> None:
+        self._reset = self._reset_peak()
+        self._start_peaks = {who: self._get_rusage_peak(who) for who in self._get_rusage_targets()}
+
+    def get_peak_memory_kb(self) -> Optional[int]:
+        """
+        :return: None, when the peak of the run is not known - the platform does not report it or the run did not
+                 raise the high-water mark.
+        """
+        peaks = [self._read_peak()] if self._reset else []
+        for who in self._get_rusage_targets():
+            peak = self._get_rusage_peak(who)
+            if peak > self._start_peaks.get(who, peak):
+                peaks.append(peak)
+
+        peaks = [peak for peak in peaks if peak is not None]
+        return max(peaks) if peaks else None
+
+    def _reset_peak(self) -> bool:
+        try:
+            self.CLEAR_REFS_PATH.write_text('5')  # Resets the peak resident memory of the process
+            return True
+        except OSError:
+            return False
+
+    def _read_peak(self) -> Optional[int]:
+        try:
+            for line in self.STATUS_PATH.read_text().splitlines():
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1])
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _get_rusage_targets(self) -> tuple:
+        if resource is None:
+            return ()
+        if self._reset:
+            return resource.RUSAGE_CHILDREN,
+        return resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN
+
+    @staticmethod
+    def _get_rusage_peak(who: int) -> int:
+        peak = resource.getrusage(who).ru_maxrss
+        if sys.platform == 'darwin':
+            return peak // 1024  # Reported in bytes
+        return peak
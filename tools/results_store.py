@@ -0,0 +1,193 @@
+import json
+import re
+import sqlite3
+
+from ast import literal_eval
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+from tools.file_operations import load_csv_file, load_csv_rows
+
+RESULTS_STORE_SUFFIX = '.db'
+COLUMN_NAME_PATTERN = re.compile(r'^[a-z_][a-z0-9_]*$')
+
+
+class ResultsStore:
+    """
+    SQLite store of solver results - a row per run, like in results CSV files, labeled with the algorithm,
+    the dataset and the experiment. Rows are filtered by indexes, so charts and summaries read only the runs and
+    columns they need, instead of parsing whole files.
+
+    Columns of solvers with extra statistics (e.g. 'iterations') are added to the table on the first insert.
+    Column names come from CSV headers too, so only lowercase identifiers matching 'COLUMN_NAME_PATTERN' are allowed
+    and they are always quoted (a column may be named like an SQL keyword).
+    Rows are inserted in batches, each in a single transaction. Several simulations can write to the same store,
+    a writer waits up to 'TIMEOUT' seconds for another one to commit.
+    """
+    TIMEOUT = 60.0
+    LABELS = ('algorithm', 'dataset', 'experiment', 'source')
+    COLUMNS = {
+        'destinations_count': 'INTEGER NOT NULL',
+        'cost': 'REAL NOT NULL',
+        'execution_time': 'REAL NOT NULL',
+        'sequence': 'TEXT NOT NULL',
+        'cpu_time': 'REAL',
+        'peak_memory_kb': 'INTEGER',
+        'evaluations': 'INTEGER',
+        'evaluations_per_second': 'REAL',
+    }
+
+    def __init__(self, path: Union[Path, str]):
+        self._connection = sqlite3.connect(str(path), timeout=self.TIMEOUT)
+        self._connection.row_factory = sqlite3.Row
+        # Readers do not block the writer and the other way round
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        columns = ',\n'.join(f'{column} {column_type}' for column, column_type in self.COLUMNS.items())
+        with self._connection:
+            self._connection.executescript(f'''
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY,
+                    algorithm TEXT NOT NULL,
+                    dataset TEXT NOT NULL,
+                    experiment TEXT NOT NULL,
+                    source TEXT,
+                    {columns}
+                );
+                CREATE INDEX IF NOT EXISTS results_algorithm
+                    ON results (algorithm, dataset, destinations_count);
+                CREATE INDEX IF NOT EXISTS results_dataset ON results (dataset, destinations_count);
+                CREATE INDEX IF NOT EXISTS results_destinations_count ON results (destinations_count);
+                CREATE INDEX IF NOT EXISTS results_source ON results (source);
+            ''')
+
+    def close(self) -> None:
+        self._connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def get_columns(self) -> List[str]:
+        return [row['name'] for row in self._connection.execute('PRAGMA table_info(results)')]
+
+    def insert_many(self, algorithm: str, dataset: str, experiment: str, header: Sequence[str],
+                    rows: Iterable[Sequence[Any]], source: Optional[str] = None) -> int:
+        """
+        :param header: Column names of 'rows', e.g. 'OUTPUT_HEADER' of a solver. Empty values are saved as NULL,
+                       sequences (lists or their reprs) as JSON lists.
+        :param source: Results file, which rows are imported from.
+        :return: Number of inserted rows.
+        """
+        self._check_column_names(header)
+        columns = [*self.LABELS, *header]
+        labels = (algorithm, dataset, experiment, source)
+        sequence_index = list(header).index('sequence') if 'sequence' in header else None
+        values = [(*labels, *[self._to_value(value, i == sequence_index) for i, value in enumerate(row)])
+                  for row in rows]
+
+        with self._connection:
+            self._add_columns(header)
+            self._connection.executemany(f'INSERT INTO results ({self._quote(columns)}) '
+                                         f'VALUES ({", ".join("?" * len(columns))})', values)
+
+        return len(values)
+
+    def load(self, columns: Optional[Sequence[str]] = None, algorithm: Optional[str] = None,
+             dataset: Optional[str] = None, experiment: Optional[str] = None) -> Tuple[List[str], List[dict]]:
+        """
+        :param columns: All columns by default. Reading only the needed ones skips sequences.
+        :return: Column names and rows of runs matching all given labels, like 'load_csv_file'.
+        """
+        columns = list(columns) if columns else [c for c in self.get_columns() if c not in ('id', 'source')]
+        self._check_column_names(columns)
+        filters = {'algorithm': algorithm, 'dataset': dataset, 'experiment': experiment}
+        filters = {label: value for label, value in filters.items() if value is not None}
+        where = ' AND '.join(f'{label} = ?' for label in filters) or '1'
+
+        cursor = self._connection.execute(f'SELECT {self._quote(columns)} FROM results WHERE {where} ORDER BY id',
+                                          tuple(filters.values()))
+        return columns, [dict(row) for row in cursor]
+
+    def get_summary(self, columns: Sequence[str] = ('destinations_count', 'cost', 'execution_time')) \
+            -> Dict[str, Dict[str, float]]:
+        """
+        :return: Count, min, max, sum and mean of every column over all runs.
+        """
+        self._check_column_names(columns)
+        aggregates = ', '.join(f'COUNT("{c}"), MIN("{c}"), MAX("{c}"), SUM("{c}"), AVG("{c}")' for c in columns)
+        row = self._connection.execute(f'SELECT {aggregates} FROM results').fetchone()
+
+        return {column: dict(zip(('count', 'min', 'max', 'sum', 'mean'), row[i * 5:i * 5 + 5]))
+                for i, column in enumerate(columns)}
+
+    def import_csv_tree(self, root: Union[Path, str]) -> Dict[Path, int]:
+        """
+        Imports results files laid out as '<dataset>/<algorithm>/<experiment>.csv' under 'root', where
+        the experiment may include subdirectories. Rows imported from the same file before are replaced, so
+        importing a tree again does not duplicate them.
+
+        :return: Number of rows imported from every file.
+        """
+        root = Path(root)
+        imported = {}
+        for path in sorted(root.rglob('*.csv')):
+            parts = path.relative_to(root).with_suffix('').parts
+            if len(parts) < 3:
+                continue  # Not a results file of a dataset and algorithm, e.g. a default output file
+            header, rows = load_csv_rows(path)
+            source = path.relative_to(root).as_posix()
+            with self._connection:
+                self._connection.execute('DELETE FROM results WHERE source = ?', (source,))
+                imported[path] = self.insert_many(parts[1], parts[0], '/'.join(parts[2:]), header, rows, source)
+
+        return imported
+
+    def _add_columns(self, header: Sequence[str]) -> None:
+        existing_columns = self.get_columns()
+        for column in header:
+            if column not in existing_columns:
+                self._connection.execute(f'ALTER TABLE results ADD COLUMN "{column}"')
+
+    @staticmethod
+    def _check_column_names(columns: Sequence[str]) -> None:
+        for column in columns:
+            if not COLUMN_NAME_PATTERN.match(column):
+                raise ValueError(f'Invalid results column name: {column!r}')
+
+    @staticmethod
+    def _quote(columns: Sequence[str]) -> str:
+        return ', '.join(f'"{column}"' for column in columns)
+
+    @staticmethod
+    def _to_value(value: Any, is_sequence: bool) -> Any:
+        if value == '' or value is None:
+            return None
+        if is_sequence:
+            # CSV files keep sequences as Python list or tuple reprs, the store keeps JSON lists
+            if isinstance(value, str):
+                value = literal_eval(value)
+            return json.dumps([int(node) for node in value])
+        if isinstance(value, str):
+            try:
+                return float(value) if any(c in value for c in '.eE') else int(value)
+            except ValueError:
+                return value
+        return value.item() if hasattr(value, 'item') else value
+
+
+def is_results_store(path: Union[Path, str]) -> bool:
+    return Path(path).suffix == RESULTS_STORE_SUFFIX
+
+
+def load_results(path: Union[Path, str], columns: Optional[Sequence[str]] = None, algorithm: Optional[str] = None,
+                 dataset: Optional[str] = None, experiment: Optional[str] = None) -> Tuple[Sequence[str], List[dict]]:
+    """
+    :return: Results of a store (filtered by labels) or of a CSV file (all rows, labels are ignored).
+    """
+    if not is_results_store(path):
+        return load_csv_file(path)
+
+    with ResultsStore(path) as store:
+        return store.load(columns, algorithm=algorithm, dataset=dataset, experiment=experiment)
@@ -0,0 +1,87 @@
+import os
+import tempfile
+import weakref
+
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+
+SHARED_MEMORY_DIRECTORY = Path('/dev/shm')
+
+
+class SharedDistanceMatrix:
+    """
+    Single copy of a distance matrix for many worker processes. The matrix is written once to a memory-mapped
+    .npy file (kept in shared memory when the system has it) and every worker attaches to it without copying.
+    The file is removed by 'close', at the end of a 'with' block or at the latest at interpreter exit.
+
+    A matrix, which already maps a whole .npy file on disk, is not copied - workers attach to that file and it is
+    never removed.
+    """
+
+    def __init__(self, destinations: List[str], matrix: np.ndarray):
+        self.destinations = destinations
+        self.path = _get_npy_file_path(matrix)
+        if self.path is not None:
+            self._finalizer = None
+            return
+
+        directory = SHARED_MEMORY_DIRECTORY if SHARED_MEMORY_DIRECTORY.is_dir() else None
+        file_descriptor, path = tempfile.mkstemp(prefix='vrp-distance-matrix-', suffix='.npy', dir=directory)
+        with os.fdopen(file_descriptor, 'wb') as f:
+            np.save(f, np.ascontiguousarray(matrix))
+
+        self.path = path
+        self._finalizer = weakref.finalize(self, _remove_file, path, os.getpid())
+
+    def attach(self) -> np.ndarray:
+        """
+        Read-only view of the shared matrix.
+        """
+        return np.load(self.path, mmap_mode='r')
+
+    def close(self) -> None:
+        if self._finalizer is not None:
+            self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __getstate__(self):
+        # Worker processes only attach, the owner alone removes the file
+        return {'path': self.path, 'destinations': self.destinations}
+
+    def __setstate__(self, state):
+        self.path = state['path']
+        self.destinations = state['destinations']
+        self._finalizer = None
+
+
+def _get_npy_file_path(matrix: np.ndarray) -> Optional[str]:
+    """
+    :return: Path of the .npy file mapped by 'matrix' (or by the array it views) as a whole, None otherwise.
+    """
+    memmap = matrix
+    while memmap is not None and not isinstance(memmap, np.memmap):
+        memmap = getattr(memmap, 'base', None)
+    if memmap is None or memmap.filename is None or not str(memmap.filename).endswith('.npy'):
+        return None
+
+    # Workers load the whole file, so it has to hold exactly the same matrix
+    maps_whole_file = (memmap.ctypes.data == matrix.ctypes.data and memmap.shape == matrix.shape
+                       and memmap.dtype == matrix.dtype and matrix.flags['C_CONTIGUOUS'])
+    return str(memmap.filename) if maps_whole_file else None
+
+
+def _remove_file(path: str, owner_pid: int) -> None:
+    # Forked workers inherit the finalizer, but only the owner process may remove the file
+    if os.getpid() != owner_pid:
+        return
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
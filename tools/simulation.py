@@ -0,0 +1,92 @@
+import os
+
+from pathlib import Path
+from typing import List, Optional, Tuple, Type
+
+import numpy as np
+
+from algorithms.base import BaseSolver, load_distance_matrix, load_validated_json, register_distance_matrix
+from tools.parallel import create_pool
+from tools.shared_matrix import SharedDistanceMatrix
+
+# Simulation worker process state, set once by '_init_simulation_worker'
+_solver_class: Optional[Type[BaseSolver]] = None
+_solver_arguments: tuple = ()
+
+
+class Simulation:
+    """
+    Solves the same problem many times inside of a worker pool. Inputs are loaded once (before workers
+    are forked), workers attach to a single shared copy of the distance matrix and all results are saved
+    with a single write at the end.
+    """
+
+    def __init__(self, solver_class: Type[BaseSolver], distance_matrix_path: str, configuration_path: str,
+                 vehicles_path: str, output_path: Optional[str], workers_count: Optional[int] = None,
+                 seed: Optional[int] = None):
+        self._solver_class = solver_class
+        self._solver_arguments = (distance_matrix_path, configuration_path, vehicles_path, output_path)
+        self._output_path = Path(output_path) if output_path else solver_class.DEFAULT_OUTPUT_PATH
+        self._workers_count = workers_count or os.cpu_count() or 1
+        self._seed = seed
+
+    def run(self, iterations: int) -> None:
+        destinations, matrix = load_distance_matrix(self._solver_arguments[0])
+        load_validated_json(self._solver_class.CONFIGURATION_SCHEMA_PATH, self._solver_arguments[1])
+        load_validated_json(self._solver_class.VEHICLES_SCHEMA_PATH, self._solver_arguments[2])
+
+        # Every run gets its own, statistically independent random generator seed
+        seeds = np.random.SeedSequence(self._seed).spawn(iterations)
+
+        workers_count = min(self._workers_count, iterations)
+        if workers_count > 1:
+            with SharedDistanceMatrix(destinations, matrix) as shared_matrix:
+                results = self._run_in_pool(workers_count, seeds, shared_matrix)
+        else:
+            results = self._run_in_pool(workers_count, seeds)
+
+        rows = [row for row, _ in results]
+        dataset, experiment = self._solver_class.get_results_labels(*self._solver_arguments[:2])
+        self._solver_class.save_results_rows(self._output_path, rows, dataset, experiment)
+        traces = [trace for _, trace in results if trace is not None]
+        if traces:
+            self._solver_class.save_traces(self._output_path, traces)
+        self._print_summary(rows)
+
+    def _run_in_pool(self, workers_count: int, seeds: List[np.random.SeedSequence],
+                     shared_matrix: Optional[SharedDistanceMatrix] = None) -> List[Tuple[tuple, Optional[dict]]]:
+        initargs = (self._solver_class, self._solver_arguments, shared_matrix)
+        with create_pool(workers_count, _init_simulation_worker, initargs) as pool:
+            return pool.map(_run_simulation, seeds, chunksize=max(1, len(seeds) // (4 * workers_count)))
+
+    def _print_summary(self, rows: List[tuple]) -> None:
+        columns = {column: [row[i] for row in rows] for i, column in enumerate(self._solver_class.OUTPUT_HEADER)}
+        costs = np.array(columns['cost'])
+        execution_times = np.array(columns['execution_time'], dtype=np.float64)
+        print(f'Runs: {len(rows)}')
+        print(f'Cost min: {costs.min()}, mean: {costs.mean()}, max: {costs.max()}')
+        print(f'Execution time mean: {execution_times.mean()} seconds, '
+              f'CPU time mean: {np.array(columns["cpu_time"], dtype=np.float64).mean()} seconds')
+        evaluations_per_second = [float(value) for value in columns['evaluations_per_second'] if value != '']
+        if evaluations_per_second:
+            print(f'Evaluations per second mean: {np.mean(evaluations_per_second)}')
+
+
+def _init_simulation_worker(solver_class: Type[BaseSolver], solver_arguments: tuple,
+                            shared_matrix: Optional[SharedDistanceMatrix]) -> None:
+    global _solver_class, _solver_arguments
+    _solver_class = solver_class
+    _solver_arguments = solver_arguments
+    if shared_matrix is not None:
+        register_distance_matrix(solver_arguments[0], shared_matrix.destinations, shared_matrix.attach())
+
+
+def _run_simulation(seed: np.random.SeedSequence) -> Tuple[tuple, Optional[dict]]:
+    """
+    :return: Results row and convergence trace (when enabled) of a single run.
+    """
+    solver = _solver_class(*_solver_arguments, seed=seed)
+    sequence, sequence_cost, execution_time = solver.run()
+    trace = solver.get_trace_record(sequence_cost) if solver.convergence_trace else None
+
+    return solver.get_results_row(sequence, sequence_cost, execution_time), trace
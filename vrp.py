@@ -1,23 +1,44 @@
-from subprocess import run
-
 import click
 
+from pathlib import Path
+
+from algorithms.base import load_distance_matrix
 from algorithms.genetic import GeneticSolver
+from algorithms.held_karp import HeldKarpSolver
+from algorithms.local_search_solution import LocalSearchSolver
+from algorithms.profiler import Profiler
 from algorithms.ortools_solution import OrtoolsSolver
 from algorithms.scan_all import ScanAllSolver
 from algorithms.simulated_annealing import SimulatedAnnealingSolver
+from tools.benchmark import benchmark_distance_callbacks, BenchmarkSuite, CALLBACKS_COUNT
 from tools.charts.aggregations import AggregationChart
 from tools.charts.comparison import ComparisonChart
 from tools.charts.custom import CustomChart
 from tools.charts.types import STATISTIC_TYPES, AGGREGATOR_TYPES, ScanAllDrawableStats, ORToolsDrawableStats, \
-    GeneticDrawableStats, SimulatedAnnealingDrawableStats, AggregatorType, CustomDrawableStats
+    GeneticDrawableStats, SimulatedAnnealingDrawableStats, AggregatorType, CustomDrawableStats, HeldKarpDrawableStats, \
+    LocalSearchDrawableStats
+from tools.distance_cache import DistanceCache
 from tools.distance_matrix import DistanceMatrixManager
+from tools.distance_matrix_storage import DistanceMatrixConverter
+from tools.geometric_distance_matrix import GeometricDistanceMatrixGenerator, METRICS, DTYPES, HAVERSINE
+from tools.results_store import ResultsStore
+from tools.simulation import Simulation
 
 SCAN_ALL = 'scan-all'
+HELD_KARP = 'held-karp'
 ORTOOLS = 'ortools'
 GENETIC = 'genetic'
 SIMULATED_ANNEALING = 'simulated-annealing'
-ALGORITHM_COMMANDS = (SCAN_ALL, ORTOOLS, GENETIC, SIMULATED_ANNEALING)
+LOCAL_SEARCH = 'local-search'
+ALGORITHM_COMMANDS = (SCAN_ALL, HELD_KARP, ORTOOLS, GENETIC, SIMULATED_ANNEALING, LOCAL_SEARCH)
+SOLVERS = {
+    SCAN_ALL: ScanAllSolver,
+    HELD_KARP: HeldKarpSolver,
+    ORTOOLS: OrtoolsSolver,
+    GENETIC: GeneticSolver,
+    SIMULATED_ANNEALING: SimulatedAnnealingSolver,
+    LOCAL_SEARCH: LocalSearchSolver,
+}
 
 
 @click.group()
@@ -33,11 +54,56 @@ def cli():
 @click.option('--locations-json', '-i', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--output-csv', '-oc', type=click.Path(writable=True, resolve_path=True), required=True)
 @click.option('--output-pickle', '-op', type=click.Path(writable=True, resolve_path=True))
-def distance_matrix(app_key, locations_json, output_csv, output_pickle):
+@click.option('--output-npy', '-on', type=click.Path(writable=True, resolve_path=True))
+@click.option('--max-concurrent-requests', '-mc', type=click.IntRange(1, 100), required=False,
+              default=DistanceMatrixManager.MAX_CONCURRENT_REQUESTS)
+@click.option('--cache', '-ca', type=click.Path(dir_okay=False, writable=True, resolve_path=True), required=False)
+@click.option('--cache-max-age-days', '-cd', type=click.FloatRange(min=0), required=False)
+def distance_matrix(app_key, locations_json, output_csv, output_pickle, output_npy, max_concurrent_requests, cache,
+                    cache_max_age_days):
+    """
+    Creates distance matrix files (CSV, pickle, npy) from input JSONs using Google Distance Matrix API.
+    With a cache, only pairs missing (or expired) in it are requested.
+    """
+    distance_cache = None
+    if cache:
+        max_age = cache_max_age_days * 24 * 60 * 60 if cache_max_age_days is not None else None
+        distance_cache = DistanceCache(cache, DistanceMatrixManager.TRAVEL_MODE, max_age)
+    try:
+        manager = DistanceMatrixManager(app_key, max_concurrent_requests=max_concurrent_requests, cache=distance_cache)
+        manager.create_distance_matrix(locations_json, output_csv, output_pickle, output_npy)
+    finally:
+        if distance_cache:
+            distance_cache.close()
+
+
+@cli.command()
+@click.option('--locations-json', '-i', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--output-npy', '-on', type=click.Path(writable=True, resolve_path=True), required=True)
+@click.option('--output-csv', '-oc', type=click.Path(writable=True, resolve_path=True))
+@click.option('--metric', '-m', type=click.Choice(METRICS), required=False, default=HAVERSINE)
+@click.option('--dtype', '-t', type=click.Choice(DTYPES), required=False, default='int32')
+@click.option('--chunk-size', '-cs', type=click.IntRange(min=1), required=False,
+              default=GeometricDistanceMatrixGenerator.CHUNK_SIZE)
+def geometric_distance_matrix(locations_json, output_npy, output_csv, metric, dtype, chunk_size):
+    """
+    Creates distance matrix files (npy, CSV) offline from straight-line distances between locations.
+    """
+    generator = GeometricDistanceMatrixGenerator(metric, dtype, chunk_size)
+    generator.create_distance_matrix(locations_json, output_npy, output_csv)
+
+
+@cli.command()
+@click.option('--input-path', '-i', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--output-directory', '-od', type=click.Path(file_okay=False, writable=True, resolve_path=True),
+              required=False)
+def convert_distance_matrix(input_path, output_directory):
     """
-    Creates distance matrix files (CSV, pickle) from input JSONs using Google Distance Matrix API.
+    Converts pickle and CSV distance matrixes (a single file or a whole directory) into memory-mappable
+    npy files with JSON sidecars. Output files are placed next to the input ones by default.
     """
-    DistanceMatrixManager(app_key).create_distance_matrix(locations_json, output_csv, output_pickle)
+    for path in DistanceMatrixConverter().convert(input_path, output_directory):
+        print(f'Created: {path}')
 
 
 @cli.command()
@@ -52,6 +118,18 @@ def scan_all(distance_matrix, configuration, vehicles, output_file):
     ScanAllSolver(distance_matrix, configuration, vehicles, output_file).solve()
 
 
+@cli.command()
+@click.option('--distance-matrix', '-d', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--configuration', '-c', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--vehicles', '-v', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--output-file', '-o', type=click.Path(writable=True, resolve_path=True), required=False)
+def held_karp(distance_matrix, configuration, vehicles, output_file):
+    """
+    Solves VRP exactly using Held-Karp dynamic programming.
+    """
+    HeldKarpSolver(distance_matrix, configuration, vehicles, output_file).solve()
+
+
 @cli.command()
 @click.option('--distance-matrix', '-d', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--configuration', '-c', type=click.Path(exists=True, resolve_path=True), required=True)
@@ -81,11 +159,28 @@ def simulated_annealing(distance_matrix, configuration, vehicles, output_file):
 @click.option('--configuration', '-c', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--vehicles', '-v', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--output-file', '-o', type=click.Path(writable=True, resolve_path=True), required=False)
-def genetic(distance_matrix, configuration, vehicles, output_file):
+def local_search(distance_matrix, configuration, vehicles, output_file):
+    """
+    Solves VRP using nearest neighbour route polished with 2-opt and Or-opt local search.
+    """
+    LocalSearchSolver(distance_matrix, configuration, vehicles, output_file).solve()
+
+
+@cli.command()
+@click.option('--distance-matrix', '-d', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--configuration', '-c', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--vehicles', '-v', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--output-file', '-o', type=click.Path(writable=True, resolve_path=True), required=False)
+@click.option('--profile', '-p', is_flag=True,
+              help="Times phases of every generation and saves them to a '<output file>.profile.jsonl' sidecar.")
+def genetic(distance_matrix, configuration, vehicles, output_file, profile):
     """
     Solves VRP using genetic algorithm.
     """
-    GeneticSolver(distance_matrix, configuration, vehicles, output_file).solve()
+    solver = GeneticSolver(distance_matrix, configuration, vehicles, output_file)
+    if profile:
+        solver.profiler = Profiler()
+    solver.solve()
 
 
 @cli.command()
@@ -95,16 +190,81 @@ def genetic(distance_matrix, configuration, vehicles, output_file):
 @click.option('--configuration', '-c', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--vehicles', '-v', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--output-file', '-o', type=click.Path(writable=True, resolve_path=True), required=False)
-def simulation(algorithm, iterations, distance_matrix, configuration, vehicles, output_file):
+@click.option('--workers-count', '-w', type=click.IntRange(1, 1024), required=False,
+              help='Number of worker processes. Defaults to the number of CPUs.')
+@click.option('--seed', '-s', type=click.INT, required=False, help='Seed making the whole simulation reproducible.')
+def simulation(algorithm, iterations, distance_matrix, configuration, vehicles, output_file, workers_count, seed):
     """
     'iterations' times solves a VRP using chosen algorithm.
     """
-    for _ in range(0, iterations):
-        run(['python', 'vrp.py', algorithm,
-             '-d', distance_matrix,
-             '-c', configuration,
-             '-v', vehicles,
-             '-o', output_file])
+    Simulation(SOLVERS[algorithm], distance_matrix, configuration, vehicles, output_file,
+               workers_count, seed).run(iterations)
+
+
+@cli.command()
+@click.option('--baseline', '-b', type=click.Path(dir_okay=False, resolve_path=True), required=False,
+              default=str(BenchmarkSuite.BASELINE_PATH))
+@click.option('--update-baseline', '-u', is_flag=True, help='Saves results as the new baseline instead of comparing.')
+@click.option('--repeats', '-r', type=click.IntRange(1, 1000), required=False, default=5,
+              help='Number of runs of every solver case (with fixed seeds).')
+@click.option('--cases-filter', '-k', type=click.STRING, required=False,
+              help="Runs only cases, whose names contain it, e.g. 'genetic' or '/A'.")
+@click.option('--time-tolerance', '-tt', type=click.FloatRange(min=0), required=False, default=0.5,
+              help='Allowed relative change of latencies and throughput.')
+@click.option('--cost-tolerance', '-ct', type=click.FloatRange(min=0), required=False, default=0.01,
+              help='Allowed relative increase of solution cost.')
+@click.option('--output-file', '-o', type=click.Path(writable=True, resolve_path=True), required=False)
+def benchmark(baseline, update_baseline, repeats, cases_filter, time_tolerance, cost_tolerance, output_file):
+    """
+    Benchmarks solvers, the route cost and split kernels and genetic operators on fixed instances of A-D datasets
+    and fails, when any case regressed in comparison with the baseline.
+    """
+    suite = BenchmarkSuite(SOLVERS, repeats, cases_filter)
+    results = suite.run()
+    if output_file:
+        suite.save(output_file, results)
+    if update_baseline:
+        suite.save(baseline, results)
+        return
+    if not Path(baseline).exists():
+        print(f'No baseline in {baseline}, nothing to compare with.')
+        return
+
+    regressions = suite.compare(results, suite.load_baseline(baseline), time_tolerance, cost_tolerance)
+    for regression in regressions:
+        print(f'Regression: {regression}')
+    if regressions:
+        raise click.ClickException(f'{len(regressions)} benchmark metrics regressed.')
+
+
+@cli.command()
+@click.option('--distance-matrix', '-d', type=click.Path(exists=True, resolve_path=True), required=True)
+@click.option('--calls-count', '-n', type=click.IntRange(1, 100_000_000), required=False, default=CALLBACKS_COUNT)
+@click.option('--seed', '-s', type=click.INT, required=False)
+def callback_benchmark(distance_matrix, calls_count, seed):
+    """
+    Measures calls per second of arc cost callbacks handed to OR-Tools.
+    """
+    _, matrix = load_distance_matrix(distance_matrix)
+    for name, calls_per_second in benchmark_distance_callbacks(matrix, calls_count, seed).items():
+        print(f'{name}: {calls_per_second:,.0f} calls per second')
+
+
+@cli.command()
+@click.option('--input-directory', '-i', type=click.Path(exists=True, file_okay=False, resolve_path=True),
+              required=False, default=str(Path('data', 'results')))
+@click.option('--output-file', '-o', type=click.Path(dir_okay=False, writable=True, resolve_path=True),
+              required=True)
+def import_results(input_directory, output_file):
+    """
+    Imports results CSV files laid out as '<dataset>/<algorithm>/<experiment>.csv' into a results store (.db).
+    Files imported before are replaced, not duplicated.
+    """
+    with ResultsStore(output_file) as store:
+        imported = store.import_csv_tree(input_directory)
+    for path, rows_count in imported.items():
+        print(f'{path}: {rows_count} rows')
+    print(f'Imported {sum(imported.values())} rows from {len(imported)} files.')
 
 
 @cli.command()
@@ -114,23 +274,34 @@ def simulation(algorithm, iterations, distance_matrix, configuration, vehicles,
 @click.option('--aggregation-type', '-at', type=click.Choice(AGGREGATOR_TYPES), required=False,
               default=AggregatorType.MEAN)
 @click.option('--scan-all', '-sca', type=click.Path(exists=True, resolve_path=True), required=False)
+@click.option('--held-karp', '-hk', type=click.Path(exists=True, resolve_path=True), required=False)
 @click.option('--ortools', '-or', type=click.Path(exists=True, resolve_path=True), required=False)
 @click.option('--genetic', '-g', type=click.Path(exists=True, resolve_path=True), required=False)
 @click.option('--simulated-annealing', '-sia', type=click.Path(exists=True, resolve_path=True), required=False)
+@click.option('--local-search', '-ls', type=click.Path(exists=True, resolve_path=True), required=False)
+@click.option('--dataset', '-ds', type=click.STRING, required=False,
+              help='Dataset of results read from a results store (.db), all datasets by default.')
+@click.option('--experiment', '-ex', type=click.STRING, required=False,
+              help="Experiment of results read from a results store (.db), e.g. 'tsp'. All experiments by default.")
 def comparison_chart(chart_title, statistic_type, output_filename, aggregation_type,
-                     scan_all=None, ortools=None, genetic=None, simulated_annealing=None):
+                     scan_all=None, held_karp=None, ortools=None, genetic=None, simulated_annealing=None,
+                     local_search=None, dataset=None, experiment=None):
     """
-    Compares different algorithms results.
+    Compares different algorithms results. Results are read from CSV files or results stores.
     """
     drawable_stats = []
     if scan_all:
-        drawable_stats.append(ScanAllDrawableStats(scan_all))
+        drawable_stats.append(ScanAllDrawableStats(scan_all, dataset, experiment))
+    if held_karp:
+        drawable_stats.append(HeldKarpDrawableStats(held_karp, dataset, experiment))
     if ortools:
-        drawable_stats.append(ORToolsDrawableStats(ortools))
+        drawable_stats.append(ORToolsDrawableStats(ortools, dataset, experiment))
     if genetic:
-        drawable_stats.append(GeneticDrawableStats(genetic))
+        drawable_stats.append(GeneticDrawableStats(genetic, dataset, experiment))
     if simulated_annealing:
-        drawable_stats.append(SimulatedAnnealingDrawableStats(simulated_annealing))
+        drawable_stats.append(SimulatedAnnealingDrawableStats(simulated_annealing, dataset, experiment))
+    if local_search:
+        drawable_stats.append(LocalSearchDrawableStats(local_search, dataset, experiment))
 
     if drawable_stats:
         chart = ComparisonChart(statistic_type, chart_title)
@@ -144,19 +315,28 @@ def comparison_chart(chart_title, statistic_type, output_filename, aggregation_t
 @click.option('--input-file', '-if', type=click.Path(exists=True, resolve_path=True), required=True)
 @click.option('--aggregation-type', '-at', type=click.Choice(AGGREGATOR_TYPES), required=True, multiple=True)
 @click.option('--output-filename', '-of', type=click.STRING, required=True)
-def aggregation_chart(chart_title, statistic_type, algorithm, input_file, aggregation_type, output_filename):
+@click.option('--dataset', '-ds', type=click.STRING, required=False,
+              help='Dataset of results read from a results store (.db), all datasets by default.')
+@click.option('--experiment', '-ex', type=click.STRING, required=False,
+              help="Experiment of results read from a results store (.db), e.g. 'tsp'. All experiments by default.")
+def aggregation_chart(chart_title, statistic_type, algorithm, input_file, aggregation_type, output_filename,
+                      dataset, experiment):
     """
     Combines multiple result aggregations for a single algorithm. Multiple 'aggregation-type'
     parameters can be provided.
     """
     if algorithm == SCAN_ALL:
-        drawable_stats = ScanAllDrawableStats(input_file)
+        drawable_stats = ScanAllDrawableStats(input_file, dataset, experiment)
+    elif algorithm == HELD_KARP:
+        drawable_stats = HeldKarpDrawableStats(input_file, dataset, experiment)
     elif algorithm == ORTOOLS:
-        drawable_stats = ORToolsDrawableStats(input_file)
+        drawable_stats = ORToolsDrawableStats(input_file, dataset, experiment)
     elif algorithm == GENETIC:
-        drawable_stats = GeneticDrawableStats(input_file)
+        drawable_stats = GeneticDrawableStats(input_file, dataset, experiment)
     elif algorithm == SIMULATED_ANNEALING:
-        drawable_stats = SimulatedAnnealingDrawableStats(input_file)
+        drawable_stats = SimulatedAnnealingDrawableStats(input_file, dataset, experiment)
+    elif algorithm == LOCAL_SEARCH:
+        drawable_stats = LocalSearchDrawableStats(input_file, dataset, experiment)
     else:
         raise Exception('Implementation error')
 
@@ -171,11 +351,20 @@ def aggregation_chart(chart_title, statistic_type, algorithm, input_file, aggreg
 @click.option('--aggregation-type', '-at', type=click.Choice(AGGREGATOR_TYPES), required=False,
               default=AggregatorType.MEAN)
 @click.option('--input-file', '-if', type=click.Path(exists=True, resolve_path=True), required=False, multiple=True)
-def custom_chart(chart_title, statistic_type, output_filename, aggregation_type, input_file):
+@click.option('--algorithm', '-al', type=click.Choice(ALGORITHM_COMMANDS), required=False,
+              help='Algorithm of results read from a results store (.db), all algorithms by default.')
+@click.option('--dataset', '-ds', type=click.STRING, required=False,
+              help='Dataset of results read from a results store (.db), all datasets by default.')
+@click.option('--experiment', '-ex', type=click.STRING, required=False, multiple=True,
+              help='Experiment of results read from a results store (.db), a series per experiment.')
+def custom_chart(chart_title, statistic_type, output_filename, aggregation_type, input_file, algorithm, dataset,
+                 experiment):
     """
-    Compares custom results. Multiple 'input_file' parameters can be provided.
+    Compares custom results. Multiple 'input_file' parameters can be provided. Multiple 'experiment' parameters
+    select series of every results store.
     """
-    drawable_stats = [CustomDrawableStats(i) for i in input_file]
+    algorithm = SOLVERS[algorithm].ALGORITHM if algorithm else None
+    drawable_stats = [CustomDrawableStats(i, dataset, e, algorithm) for i in input_file for e in experiment or [None]]
     chart = CustomChart(statistic_type, chart_title, aggregation_type)
     chart.build(drawable_stats, output_filename)
 